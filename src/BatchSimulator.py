@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:03:18 2026
+
+@author: Mickael Grima
+"""
+
+import numpy as np
+from Simulator import Simulator
+
+
+class BatchSimulator(Simulator):
+    """ This class simulates many independent runs of the same :class:`TimePetriNet <petrinet_simulator.TimePetriNet>`
+        topology together. Each run has its own marking, its own durations and its own clock, and all the runs are
+        advanced at once with array operations: at each step, every run that is not blocked fires its transition with
+        the minimal firing time.
+
+        The tokens are only counted (see :class:`CompiledPetriNet <petrinet_simulator.CompiledPetriNet>`). For each run
+        and each token we save the time from whose the token is available, i.e. its arrival time plus the duration of
+        its place. The tokens of a place are consumed in their order of arrival, as in the
+        :class:`TimePetriNet <petrinet_simulator.TimePetriNet>`: since the clock of a run never decreases, it is also
+        the order of their availabilities.
+
+        A transition ``t`` enabled in a run fires at the time
+        ``max(availability of the consumed tokens, minimumStartingTime, last firing of t) + duration of t``,
+        and never before the clock of the run.
+    """
+
+    def __init__(self, petriNet, runs=1, markings=None, placeTimes=None, transitionTimes=None, traceLength=64,
+                 capacity=None):
+        """ :param petriNet: the simulated petriNet
+            :type petriNet: :class:`TimePetriNet <petrinet_simulator.TimePetriNet>`
+
+            * options:
+
+                * ``runs = 1``: number of runs simulated together
+                * ``markings = None``: initial marking of each run, as an array ``runs x places`` (or a vector used
+                  for every run). If None, the number of tokens on each place of ``petriNet`` is taken
+                * ``placeTimes = None``: durations of the places for each run, as an array ``runs x places`` (or a
+                  vector). If None, the attribute :attr:`time <petrinet_simulator.TimeNode.time>` of the places
+                * ``transitionTimes = None``: durations of the transitions for each run, as an array
+                  ``runs x transitions`` (or a vector). If None, the attribute
+                  :attr:`time <petrinet_simulator.TimeNode.time>` of the transitions
+                * ``traceLength = 64``: initial number of steps saved in the traces. It is doubled when necessary
+                * ``capacity = None``: initial number of tokens whose availability is saved on each place. If None,
+                  the maximal number of tokens on a place in the initial markings. It is doubled when necessary
+
+            .. Note:: The places and transitions are ordered as in
+                      :attr:`places <petrinet_simulator.BatchSimulator.places>` and
+                      :attr:`transitions <petrinet_simulator.BatchSimulator.transitions>`
+        """
+        compiled = petriNet.compile()
+        self.places = compiled.places
+        """ List of places. The index of a place is its column in the markings
+        """
+        self.transitions = compiled.transitions
+        """ List of transitions. The index of a transition is its column in the durations and firings
+        """
+        self.runs = runs
+        """ Number of runs simulated together
+        """
+
+        # matrices transitions x places
+        self.pre, self.post = compiled.pre.T.copy(), compiled.post.T.copy()
+        self.__inputs = [np.flatnonzero(self.pre[t]) for t in range(len(self.transitions))]
+
+        self.initialMarking = self.__batch(markings, compiled.marking, len(self.places), np.int64, 'markings')
+        """ Initial marking of each run
+        """
+        self.placeTimes = self.__batch(placeTimes, [getattr(p, 'time', 0.0) for p in self.places],
+                                       len(self.places), np.float64, 'placeTimes')
+        """ Durations of the places for each run
+        """
+        self.transitionTimes = self.__batch(transitionTimes, [getattr(t, 'time', 0.0) for t in self.transitions],
+                                            len(self.transitions), np.float64, 'transitionTimes')
+        """ Durations of the transitions for each run
+        """
+        self.minimumStartingTimes = np.array([float(getattr(t, 'minimumStartingTime', -np.inf))
+                                              for t in self.transitions])
+        """ No transition can fire before its minimum starting time
+        """
+        self.startClock = getattr(petriNet, 'currentClock', 0.0)
+        """ Clock of every run at the beginning of the simulation
+        """
+        self.traceLength = traceLength
+        self.capacity = max(1, int(self.initialMarking.max()) if capacity is None else capacity)
+
+        self.reinitialized()
+
+    def __batch(self, values, default, size, dtype, name):
+        values = np.asarray(default if values is None else values, dtype=dtype)
+        if values.ndim == 1:
+            values = np.tile(values, (self.runs, 1))
+        if values.shape != (self.runs, size):
+            raise ValueError('%s: array of shape %s expected, got %s instead' % (name, (self.runs, size), values.shape))
+        return values
+
+    def reinitialized(self):
+        """ Set every run back to its initial marking and to the start clock
+        """
+        self.marking = self.initialMarking.copy()
+        """ Current marking of each run
+        """
+        self.clock = np.full(self.runs, self.startClock, dtype=np.float64)
+        """ Current clock of each run. At the end of the simulation, it is the completion time of the run
+        """
+        self.ready = np.full((self.runs, len(self.places), max(self.capacity, int(self.marking.max()))), np.inf)
+        """ For each run and each place, the times from whose the tokens on the place are available, in their order
+            of arrival. The slots after the last token are infinite
+        """
+        initial = np.arange(self.ready.shape[2]) < self.marking[:, :, np.newaxis]
+        self.ready[initial] = np.broadcast_to((self.startClock + self.placeTimes)[:, :, np.newaxis],
+                                              self.ready.shape)[initial]
+        self.lastFiring = np.full((self.runs, len(self.transitions)), -np.inf)
+        """ For each run and each transition, the time of the last firing
+        """
+        self.firings = np.zeros((self.runs, len(self.transitions)), dtype=np.int64)
+        """ For each run, the number of firings of each transition
+        """
+        self.steps = np.zeros(self.runs, dtype=np.int64)
+        """ Number of firings of each run
+        """
+        self.traceTransitions = np.full((self.runs, self.traceLength), -1, dtype=np.int64)
+        """ For each run, the index of the transition fired at each step. -1 after the last step
+        """
+        self.traceTimes = np.full((self.runs, self.traceLength), np.nan)
+        """ For each run, the time of each firing. nan after the last step
+        """
+        self.__active = np.arange(self.runs)
+
+    def reinitialize(self):
+        """ See :func:`reinitialized <petrinet_simulator.BatchSimulator.reinitialized>`
+        """
+        self.reinitialized()
+
+    def has_next(self):
+        """ :returns: True if some runs may still fire a transition
+        """
+        return len(self.__active) > 0
+
+    def __firingTimes(self, active):
+        marking, ready, clock = self.marking[active], self.ready[active], self.clock[active]
+        firingTimes = np.full((len(active), len(self.transitions)), np.inf)
+        for t, inputs in enumerate(self.__inputs):
+            enabled = (marking[:, inputs] >= self.pre[t, inputs]).all(axis=1)
+            if not enabled.any():
+                continue
+            start = np.maximum(self.lastFiring[active, t], self.minimumStartingTimes[t])
+            if len(inputs) > 0:
+                # the last consumed token on each place up is the latest available one
+                start = np.maximum(start, ready[:, inputs, self.pre[t, inputs] - 1].max(axis=1))
+            firing = np.maximum(clock, start + self.transitionTimes[active, t])
+            firingTimes[enabled, t] = firing[enabled]
+        return firingTimes
+
+    def __reserve(self, nb_tokens):
+        # double the number of slots of the places until nb_tokens tokens fit in
+        while nb_tokens > self.ready.shape[2]:
+            self.ready = np.concatenate([self.ready, np.full(self.ready.shape, np.inf)], axis=2)
+
+    def __saveTrace(self, active, transitions, times):
+        steps = self.steps[active]
+        while steps.max() >= self.traceTransitions.shape[1]:
+            width = self.traceTransitions.shape[1]
+            self.traceTransitions = np.hstack([self.traceTransitions, np.full((self.runs, width), -1, dtype=np.int64)])
+            self.traceTimes = np.hstack([self.traceTimes, np.full((self.runs, width), np.nan)])
+        self.traceTransitions[active, steps] = transitions
+        self.traceTimes[active, steps] = times
+        self.steps[active] += 1
+
+    def next(self):
+        """ Each run that is not blocked fires the transition with the minimal firing time
+
+            :returns: The number of runs that fired a transition
+        """
+        if not self.has_next():
+            return 0
+
+        firingTimes = self.__firingTimes(self.__active)
+        transitions = firingTimes.argmin(axis=1)
+        times = firingTimes[np.arange(len(transitions)), transitions]
+
+        # the runs without enabled transitions are over
+        fired = np.isfinite(times)
+        active, transitions, times = self.__active[fired], transitions[fired], times[fired]
+        self.__active = active
+        if not len(active):
+            return 0
+
+        pre, post = self.pre[transitions], self.post[transitions]
+        remaining = self.marking[active] - pre
+        self.marking[active] = remaining + post
+        self.__reserve(self.marking[active].max())
+
+        # the consumed tokens are the first ones, the new ones arrive after the remaining ones and wait the duration
+        # of the place
+        slots = np.arange(self.ready.shape[2])
+        ready = self.ready[active]
+        shifted = slots + pre[:, :, np.newaxis]
+        ready = np.where(shifted < len(slots),
+                         np.take_along_axis(ready, np.minimum(shifted, len(slots) - 1), axis=2), np.inf)
+        arrived = (slots >= remaining[:, :, np.newaxis]) & (slots < (remaining + post)[:, :, np.newaxis])
+        arrival = times[:, np.newaxis] + self.placeTimes[active]
+        self.ready[active] = np.where(arrived, arrival[:, :, np.newaxis], ready)
+
+        self.lastFiring[active, transitions] = times
+        self.clock[active] = times
+        self.firings[active, transitions] += 1
+        self.__saveTrace(active, transitions, times)
+
+        return len(active)
+
+    def simulation(self, niter=-1):
+        """ Advance every run until it is blocked
+
+            * options:
+
+                * ``niter = -1``: If positive each run fires at most ``niter`` transitions
+
+            :returns: the dictionnary given by :func:`statistics <petrinet_simulator.BatchSimulator.statistics>`
+        """
+        n = 0
+        while self.has_next() and (niter < 0 or n < niter):
+            self.next()
+            n += 1
+        return self.statistics()
+
+    def trace(self, run):
+        """ :returns: the list of tuples (:class:`Transition <petrinet_simulator.Transition>`, firing time) of ``run``
+        """
+        return [(self.transitions[t], time)
+                for t, time in zip(self.traceTransitions[run, :self.steps[run]], self.traceTimes[run, :self.steps[run]])]
+
+    def statistics(self, percentiles=(5, 50, 95)):
+        """ Compute statistics over the runs
+
+            * options:
+
+                * ``percentiles = (5, 50, 95)``: the percentiles of the completion time to compute
+
+            :returns: A dictionnary with the keys:
+
+                * ``'runs'``: number of runs
+                * ``'blocked'``: number of runs without enabled transition anymore
+                * ``'completionTime'``: dictionnary ``'mean'``, ``'std'``, ``'min'``, ``'max'`` and ``'percentiles'``
+                  of the clocks of the runs
+                * ``'firings'``: dictionnary :class:`Transition <petrinet_simulator.Transition>`: mean number of firings
+        """
+        blocked = np.ones(self.runs, dtype=bool)
+        if len(self.__active):
+            blocked[self.__active] = np.isinf(self.__firingTimes(self.__active).min(axis=1))
+        return {
+            'runs': self.runs,
+            'blocked': int(blocked.sum()),
+            'completionTime': {
+                'mean': self.clock.mean(),
+                'std': self.clock.std(),
+                'min': self.clock.min(),
+                'max': self.clock.max(),
+                'percentiles': dict(zip(percentiles, np.percentile(self.clock, percentiles)))
+            },
+            'firings': dict(zip(self.transitions, self.firings.mean(axis=0)))
+        }
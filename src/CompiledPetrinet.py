@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:12:41 2026
+
+@author: Mickael Grima
+"""
+
+import heapq
+import numpy as np
+from Token import Token
+
+
+class CompiledPetriNet(object):
+    """ This class represents a compiled :class:`PetriNet <petrinet_simulator.PetriNet>`: the tokens are only counted
+        on each place in a marking vector, and the inputs and outputs are given by the two incidence matrices
+        :attr:`pre <petrinet_simulator.CompiledPetriNet.pre>` and :attr:`post <petrinet_simulator.CompiledPetriNet.post>`
+
+        It is built by the method :func:`PetriNet.compile <petrinet_simulator.PetriNet.compile>` and makes sense only
+        for plain petriNets (see :func:`PetriNet.isPlain <petrinet_simulator.PetriNet.isPlain>`), whose tokens have
+        neither names nor advanced properties.
+
+        Places and transitions are identified by their index in
+        :attr:`places <petrinet_simulator.CompiledPetriNet.places>` and
+        :attr:`transitions <petrinet_simulator.CompiledPetriNet.transitions>`
+    """
+
+    def __init__(self, petriNet):
+        self.petriNet = petriNet
+        """ The compiled petriNet. :func:`writeMarking <petrinet_simulator.CompiledPetriNet.writeMarking>` writes the
+            marking back into it
+        """
+        self.places = list(petriNet.places)
+        """ List of places. The :attr:`index <petrinet_simulator.Node.index>` of a place is its line in the incidence
+            matrices
+        """
+        self.transitions = list(petriNet.transitions)
+        """ List of transitions. The :attr:`index <petrinet_simulator.Node.index>` of a transition is its column in the
+            incidence matrices
+        """
+
+        self.pre = np.zeros((len(self.places), len(self.transitions)), dtype=np.int64)
+        """ ``pre[p, t]`` is the number of tokens needed on place ``p`` by the transition ``t``
+        """
+        self.post = np.zeros((len(self.places), len(self.transitions)), dtype=np.int64)
+        """ ``post[p, t]`` is the number of tokens given to place ``p`` by the transition ``t``
+        """
+        for p, dct in enumerate(petriNet.inputs):
+            for t, nb in dct.iteritems():
+                self.pre[p, t] = nb
+        for p, dct in enumerate(petriNet.outputs):
+            for t, nb in dct.iteritems():
+                self.post[p, t] = nb
+
+        self.incidence = self.post - self.pre
+        """ Incidence matrix: firing the transition ``t`` adds the column ``incidence[:, t]`` to the marking
+        """
+        self.marking = np.array([len(p.token) for p in self.places], dtype=np.int64)
+        """ Vector of the number of tokens on each place
+        """
+        self.initialMarking = self.marking.copy()
+        """ Marking at the compilation time
+        """
+
+        # transitions whose enabling may change when a given transition fires
+        self.__neighbours = [
+            np.flatnonzero((self.pre[self.incidence[:, t] != 0, :] > 0).any(axis=0))
+            for t in range(len(self.transitions))
+        ]
+
+    def __repr__(self):
+        return '<CompiledPetriNet : %s>' % self.petriNet.name
+
+    def __str__(self):
+        return '%s: %s place(s), %s transition(s)' % (self.petriNet.name, len(self.places), len(self.transitions))
+
+    def enabledTransitionsSet(self, marking=None):
+        """ Compute the enabled transitions for ``marking``
+
+            * options:
+
+                * ``marking = None``: if None, we consider :attr:`marking <petrinet_simulator.CompiledPetriNet.marking>`
+
+            :returns: A boolean vector whose length is the number of transitions
+        """
+        marking = self.marking if marking is None else marking
+        return (marking[:, np.newaxis] >= self.pre).all(axis=0)
+
+    def isEnabled(self, transition, marking=None):
+        """ :returns: True if the transition whose index is ``transition`` is enabled for ``marking``
+        """
+        marking = self.marking if marking is None else marking
+        return bool((marking >= self.pre[:, transition]).all())
+
+    def isBlocked(self):
+        """ :returns: True if no transition is enabled for the current marking
+        """
+        return not self.enabledTransitionsSet().any()
+
+    def fire(self, transition, marking=None):
+        """ Fire the transition whose index is ``transition``.
+
+            * options:
+
+                * ``marking = None``: if None, we fire on :attr:`marking <petrinet_simulator.CompiledPetriNet.marking>`
+                  and modify it, otherwise a new marking is returned
+
+            :returns: The marking after the firing
+
+            .. Warning:: The transition must be enabled, otherwise a ValueError is raised
+        """
+        if not self.isEnabled(transition, marking):
+            raise ValueError('transition %s is not enabled' % self.transitions[transition].name)
+        if marking is None:
+            self.marking += self.incidence[:, transition]
+            return self.marking
+        return marking + self.incidence[:, transition]
+
+    def simulation(self, niter=-1, untilChoice=False):
+        """ Fire transitions until no transition is enabled anymore. At each step the enabled transition with the highest
+            index fires: this is the choice of :func:`PetriNet.computeFiringTransition
+            <petrinet_simulator.PetriNet.computeFiringTransition>` for a plain petriNet, where every transition has the
+            same preference. After a firing, only the transitions sharing a place with the fired transition are checked.
+
+            * options:
+
+                * ``niter = -1``: If positive we do at most ``niter`` firings
+                * ``untilChoice = False``: If True, the simulation stops as soon as several transitions are enabled
+
+            :returns: a generator of the index of the fired transitions
+        """
+        enabled = self.enabledTransitionsSet()
+        nb_enabled = int(np.count_nonzero(enabled))
+        # max-heap of the enabled transitions: the entries of the transitions not enabled anymore are dropped when they
+        # come on top, ``queued`` tells which transitions have an entry
+        heap = [-t for t in np.flatnonzero(enabled)]
+        heapq.heapify(heap)
+        queued = enabled.copy()
+        n = 0
+        while nb_enabled > 0 and (niter < 0 or n < niter):
+            if untilChoice and nb_enabled > 1:
+                break
+            while not enabled[-heap[0]]:
+                queued[-heapq.heappop(heap)] = False
+            transition = -heap[0]
+            self.marking += self.incidence[:, transition]
+            neighbours = self.__neighbours[transition]
+            now_enabled = (self.marking[:, np.newaxis] >= self.pre[:, neighbours]).all(axis=0)
+            nb_enabled += int(np.count_nonzero(now_enabled)) - int(np.count_nonzero(enabled[neighbours]))
+            enabled[neighbours] = now_enabled
+            for t in neighbours[now_enabled & ~queued[neighbours]]:
+                queued[t] = True
+                heapq.heappush(heap, -t)
+            n += 1
+            yield int(transition)
+
+    def reinitialized(self):
+        """ Set the marking back to :attr:`initialMarking <petrinet_simulator.CompiledPetriNet.initialMarking>`
+        """
+        self.marking = self.initialMarking.copy()
+
+    def writeMarking(self):
+        """ Write :attr:`marking <petrinet_simulator.CompiledPetriNet.marking>` into the compiled petriNet: on each
+            place we remove the tokens in excess or we add new :class:`Tokens <petrinet_simulator.Token>`
+        """
+        for place, nb in zip(self.places, self.marking):
+            delta = nb - len(place.token)
+            if delta < 0:
+                self.petriNet.removeToken(place, *place.token[delta:])
+            elif delta > 0:
+                self.petriNet.addToken(place, *[Token() for i in range(delta)])
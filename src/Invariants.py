@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:27:14 2026
+
+@author: Mickael Grima
+"""
+
+from fractions import gcd
+from itertools import chain
+
+
+def incidence(petriNet):
+    """ Build the sparse incidence matrix of ``petriNet``
+
+        :returns: A list indexed by the places: to ``place.index`` we associate a dictionnary ``transition.index``:
+                  variation of the number of tokens on ``place`` when ``transition`` fires. The null variations are
+                  left out
+    """
+    rows = [dict(dct) for dct in petriNet.outputs]
+    for p, dct in enumerate(petriNet.inputs):
+        row = rows[p]
+        for t, nb in dct.iteritems():
+            variation = row.get(t, 0) - nb
+            if variation:
+                row[t] = variation
+            else:
+                del row[t]
+    return rows
+
+
+def transpose(rows, nbColumns):
+    """ :returns: The transposed matrix of the sparse matrix ``rows``, of ``nbColumns`` columns
+    """
+    columns = [{} for i in range(nbColumns)]
+    for i, row in enumerate(rows):
+        for j, value in row.iteritems():
+            columns[j][i] = value
+    return columns
+
+
+def _lowest(mask):
+    # index of the lowest bit set in mask
+    return (mask & -mask).bit_length() - 1
+
+
+def _combine(row, other, a, b):
+    # sparse a * row + b * other, without the null values
+    result = {k: a * v for k, v in row.iteritems()}
+    for k, v in other.iteritems():
+        value = result.get(k, 0) + b * v
+        if value:
+            result[k] = value
+        else:
+            del result[k]
+    return result
+
+
+class _Rows(object):
+    # rows of the Farkas algorithm, indexed by the columns where they are positive or negative, and by the lowest
+    # element of their support
+
+    def __init__(self):
+        self.rows = {}
+        self.positive, self.negative = {}, {}
+        self.lowest = {}
+        self.count = 0
+
+    def add(self, values, support, coefficients):
+        key, self.count = self.count, self.count + 1
+        self.rows[key] = (values, support, coefficients)
+        for j, value in values.iteritems():
+            (self.positive if value > 0 else self.negative).setdefault(j, set()).add(key)
+        self.lowest.setdefault(_lowest(support), set()).add(key)
+
+    def remove(self, key):
+        values, support, _ = self.rows.pop(key)
+        for j, value in values.iteritems():
+            index = self.positive if value > 0 else self.negative
+            keys = index.get(j)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[j]
+        keys = self.lowest[_lowest(support)]
+        keys.discard(key)
+        if not keys:
+            del self.lowest[_lowest(support)]
+
+    def covers(self, support, *excluded):
+        # True if a row, apart from the excluded ones, has its support included in support
+        mask = support
+        while mask:
+            i = _lowest(mask)
+            mask &= mask - 1
+            for key in self.lowest.get(i, ()):
+                if key not in excluded and not self.rows[key][1] & ~support:
+                    return True
+        return False
+
+
+def semiflows(rows):
+    """ Compute the minimal semiflows of the sparse integer matrix ``rows`` with the Farkas algorithm: the non-negative
+        integer vectors ``y`` such that ``y.rows = 0``, of minimal support. Every non-negative solution is a
+        non-negative combination of them.
+
+        Each row of the matrix is extended with the matching row of the identity, and the columns are eliminated one
+        by one: the rows with a null value in the column are kept, and each row with a positive value is combined
+        with each row with a negative one. The rows are sparse and their supports, the non-null values of their
+        identity part, are bitsets. The number of rows is kept low by:
+
+            * eliminating first the column creating the least rows
+            * combining two rows only if no other row has its support included in the union of their supports: the
+              combination couldn't lead to a semiflow of minimal support. The rows are indexed by the lowest element
+              of their support, so only the rows whose lowest element belongs to the union are looked at
+
+        :param rows: list of dictionnaries column: non-null value
+        :type rows: list
+
+        :returns: The list of the semiflows, as dictionnaries row: positive coefficient, sorted by support
+    """
+    current = _Rows()
+    for i, row in enumerate(rows):
+        current.add(dict(row), 1 << i, {i: 1})
+
+    positive, negative = current.positive, current.negative
+
+    def created(j):
+        # variation of the number of rows if the column j is eliminated
+        p, n = len(positive.get(j, ())), len(negative.get(j, ()))
+        return p * n - p - n, j
+
+    while positive or negative:
+        column = min(set(positive).union(negative), key=created)
+        pos, neg = list(positive.get(column, ())), list(negative.get(column, ()))
+        new = {}
+        for key in pos:
+            values, support, coefficients = current.rows[key]
+            for key_ in neg:
+                values_, support_, coefficients_ = current.rows[key_]
+                union = support | support_
+                # the combinations of same support are proportional: one is enough
+                if union in new or current.covers(union, key, key_):
+                    continue
+                a, b = -values_[column], values[column]
+                g = gcd(a, b)
+                combined = _combine(values, values_, a // g, b // g)
+                combinedCoefficients = _combine(coefficients, coefficients_, a // g, b // g)
+                g = reduce(gcd, (abs(v) for v in chain(combined.itervalues(), combinedCoefficients.itervalues())))
+                if g > 1:
+                    combined = {k: v // g for k, v in combined.iteritems()}
+                    combinedCoefficients = {k: v // g for k, v in combinedCoefficients.iteritems()}
+                new[union] = (combined, union, combinedCoefficients)
+
+        for key in pos + neg:
+            current.remove(key)
+        for union in sorted(new):
+            current.add(*new[union])
+
+    return [coefficients for _, _, coefficients in sorted(current.rows.itervalues(), key=lambda row: row[1])]
+
+
+def pInvariants(petriNet):
+    """ Compute the minimal P-semiflows of ``petriNet``: the weightings of the places whose weighted number of tokens
+        is the same in every reachable marking
+
+        :returns: The list of the P-semiflows, as dictionnaries ``place.index``: positive coefficient
+    """
+    return semiflows(incidence(petriNet))
+
+
+def tInvariants(petriNet):
+    """ Compute the minimal T-semiflows of ``petriNet``: the numbers of firings of the transitions which give back the
+        marking they start from
+
+        :returns: The list of the T-semiflows, as dictionnaries ``transition.index``: positive coefficient
+    """
+    return semiflows(transpose(incidence(petriNet), len(petriNet.transitions)))
@@ -8,11 +8,15 @@ Created on Sat Jul 16 17:55:32 2016
 import logging
 
 
-class Node:
+class Node(object):
     """ This class represents a node in the :class:`PetriNet <petrinet_simulator.PetriNet>`
         In particulary it the parent class of the classes :class:`Transition <petrinet_simulator.Transition>`
         and :class:`Place <petrinet_simulator.Place>`
+
+        .. Note:: The nodes and their subclasses store their attributes in ``__slots__``
     """
+    __slots__ = ('name', 'idd', 'index', 'logger')
+
     def __init__(self, name='', logger=logging):
         self.name = name
         """Name of the node
@@ -20,6 +24,13 @@ class Node:
         self.idd = None
         """To difference the nodes if necessary
         """
+        self.index = None
+        """ Index of the node in the :class:`PetriNet <petrinet_simulator.PetriNet>` it belongs to. It is given when
+            the node is added to the petriNet: the places (respectively the transitions) of a petriNet are indexed
+            ``0, 1, 2, ...`` in the order they have been added.
+
+            .. Warning:: A node belongs to only one petriNet: adding it to another petriNet changes its index
+        """
         self.logger = logger
 
     def __repr__(self):
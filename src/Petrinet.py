@@ -6,17 +6,54 @@ Created on Wed Apr 01 21:38:37 2015
 """
 
 import sys
+from collections import namedtuple
+from itertools import islice
 sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
 
 from Token import Token
 from Place import Place
 from Transition import Transition
-from utils.tools import pref_func, get_id
+from utils.tools import pref_func, bits
 from Simulator import Simulator
+from CompiledPetrinet import CompiledPetriNet
+import Reachability
+import Invariants
+import Siphons
+from Replay import Replay
 import graphviz as gz
+import heapq
 import logging
 
 
+Snapshot = namedtuple('Snapshot', ['tokens', 'counts', 'enabledTokens', 'satisfiedInputs', 'readyTransitions',
+                                   'tokenQueues', 'tokenQueuesAfterFire', 'currentClock'])
+""" Immutable state of a petriNet taken by :func:`snapshot <petrinet_simulator.PetriNet.snapshot>`. Every field is a
+    tuple indexed by the places or by the transitions, except ``currentClock`` (None for a
+    :class:`PetriNet <petrinet_simulator.PetriNet>`). The tokens are private copies: they are copied again at each
+    :func:`restore <petrinet_simulator.PetriNet.restore>`, so a snapshot can be restored several times.
+"""
+
+FiringEvent = namedtuple('FiringEvent', ['step', 'clock', 'transition', 'consumed', 'produced'])
+""" Firing of a transition generated by :func:`simulate_iter <petrinet_simulator.PetriNet.simulate_iter>`:
+    ``step`` is the number of firings before this one, ``clock`` the date of the firing (None for a
+    :class:`PetriNet <petrinet_simulator.PetriNet>`), ``transition`` the index of the fired transition, ``consumed``
+    and ``produced`` the tuples of the ``id`` of the tokens removed from the places up and added to the places down.
+    It holds no reference to the tokens.
+"""
+
+StructuralIndex = namedtuple('StructuralIndex', ['upplaces', 'downplaces', 'consumers', 'producers', 'conflicts',
+                                                 'causes'])
+""" Bitsets of the structure of a petriNet, computed by
+    :func:`getStructuralIndex <petrinet_simulator.PetriNet.getStructuralIndex>`. Every field is a tuple of integers,
+    the bit ``i`` of an integer being set if the node of index ``i`` belongs to the set:
+
+        * ``upplaces[t]``, ``downplaces[t]``: the input places and the output places of the transition ``t``
+        * ``consumers[p]``, ``producers[p]``: the transitions having the place ``p`` as input and as output
+        * ``conflicts[t]``: the transitions in structural conflict with ``t``, i.e. sharing an input place with it
+        * ``causes[t]``: the transitions having an input place among the output places of ``t``
+"""
+
+
 class PetriNet(Simulator):
     """This class represents a petriNet
     """
@@ -25,52 +62,119 @@ class PetriNet(Simulator):
         self.name = name
         """ Name of the petriNet
         """
-        self.places = {}
-        """ Dictionnary of places to whose we associate a number that represents the order we add the place
-            in the petriNet
+        self.places = []
+        """ List of places. The place ``self.places[i]`` has the :attr:`index <petrinet_simulator.Node.index>` ``i``,
+            i.e. the places are in the order we add them in the petriNet
         """
-        self.transitions = {}
-        """ Dictionnary of transitions to whose we associate a number that represents the order we add the transition
+        self.transitions = []
+        """ List of transitions. The transition ``self.transitions[i]`` has the
+            :attr:`index <petrinet_simulator.Node.index>` ``i``, i.e. the transitions are in the order we add them
             in the petriNet
         """
 
-        self.inputs = {}
-        """ Dictionnary of ``place`` to whose we associate a dictionnary of transitions: number of tokens.
-            If a ``transition`` and an associated ``nb`` belongs to this dictionnary, it means that the ``transition``
-            has the ``place`` as input and the input needs ``nb`` tokens to be activated.
+        # The adjacency structures are indexed by the indices of the nodes
+        self.inputs = []
+        """ List of dictionnaries indexed by the places: to ``place.index`` we associate a dictionnary
+            ``transition.index``: number of tokens. If a ``transition`` and an associated ``nb`` belongs to this
+            dictionnary, it means that the ``transition`` has the ``place`` as input and the input needs ``nb`` tokens
+            to be activated.
+        """
+        self.outputs = []
+        """ List of dictionnaries indexed by the places: to ``place.index`` we associate a dictionnary
+            ``transition.index``: number of tokens. If a ``transition`` and an associated ``nb`` belongs to this
+            dictionnary, it means that the ``transition`` has the ``place`` as output and the output gives ``nb``
+            tokens to the place down.
+        """
+        self.upplaces = []
+        """ List of dictionnaries indexed by the transitions: to ``transition.index`` we associate a dictionnary
+            ``place.index``: number of tokens. If a ``place`` and an associated ``nb`` belongs to this dictionnary,
+            it means that the ``transition`` has the ``place`` as input and the input needs ``nb`` tokens to be
+            activated.
+        """
+        self.downplaces = []
+        """ List of dictionnaries indexed by the transitions: to ``transition.index`` we associate a dictionnary
+            ``place.index``: number of tokens. If a ``place`` and an associated ``nb`` belongs to this dictionnary,
+            it means that the ``transition`` has the ``place`` as output and the output gives ``nb`` tokens to the
+            place down.
+        """
+        self.structuralIndex = None
+        """ :class:`StructuralIndex <petrinet_simulator.StructuralIndex>` of the petriNet, None if it hasn't been
+            computed since the last change of the structure. It is computed by
+            :func:`getStructuralIndex <petrinet_simulator.PetriNet.getStructuralIndex>` and reset by the methods adding
+            or removing nodes, inputs and outputs
+        """
+        self.invariants = {}
+        """ Dictionnary of the invariants computed by :func:`pInvariants <petrinet_simulator.PetriNet.pInvariants>`
+            and :func:`tInvariants <petrinet_simulator.PetriNet.tInvariants>`, under the keys ``'P'`` and ``'T'``. As
+            :attr:`structuralIndex <petrinet_simulator.PetriNet.structuralIndex>`, it is emptied when the structure
+            changes
+        """
+        self.token = []
+        """ List indexed by the places: ``self.token[place.index]`` is the number of tokens that are on ``place``
+        """
+
+        self.enabledTokens = []
+        """ List of dictionnaries indexed by the places: to ``place.index`` we associate a dictionnary
+            ``transition.index``: number of tokens.
+            For each input between ``place`` and ``transition`` we count the tokens on ``place`` that are enabled for
+            ``transition`` (see :func:`Token.isEnabled <petrinet_simulator.Token.isEnabled>`).
+            It is maintained incrementally by :func:`addToken <petrinet_simulator.PetriNet.addToken>`,
+            :func:`removeToken <petrinet_simulator.PetriNet.removeToken>` and
+            :func:`changeFireToken <petrinet_simulator.PetriNet.changeFireToken>`
+        """
+        self.priorityQueues = []
+        """ List of dictionnaries indexed by the places: to ``place.index`` we associate a dictionnary
+            ``transition.index``: binary heap of the tokens on ``place``, for each input between ``place`` and
+            ``transition``. An entry of a heap is the tuple (negated priority value, arrival, token), see
+            :func:`get_priority_value <petrinet_simulator.Token.get_priority_value>`: the most priority token, and
+            the first arrived among the equal ones, is at the top. The entries of the removed tokens are left in the
+            heaps and skipped, the heaps are rebuilt when they become the most numerous
         """
-        self.outputs = {}
-        """ Dictionnary of ``place`` to whose we associate a dictionnary of transitions: number of tokens.
-            If a ``transition`` and an associated ``nb`` belongs to this dictionnary, it means that the ``transition``
-            has the ``place`` as output and the output gives ``nb`` tokens to the place down.
+        self.arrivals = []
+        """ List of dictionnaries indexed by the places: to ``place.index`` we associate a dictionnary
+            ``id(token)``: arrival number of the tokens on ``place``. An entry of
+            :attr:`priorityQueues <petrinet_simulator.PetriNet.priorityQueues>` is valid only if its arrival is still
+            the one of its token
         """
-        self.upplaces = {}
-        """ Dictionnary of ``transition`` to whose we associate a dictionnary of places: number of tokens.
-            If a ``place`` and an associated ``nb`` belongs to this dictionnary, it means that the ``transition``
-            has the ``place`` as input and the input needs ``nb`` tokens to be activated.
+        self.__arrival = 0
+        self.preferences = {}
+        """ Dictionnary of the preferences computed by :func:`pref <petrinet_simulator.PetriNet.pref>`: to
+            ``transition.index`` we associate the tuple (first list of its
+            :attr:`tokenQueue <petrinet_simulator.Transition.tokenQueue>`, preference). A preference is removed when
+            the tokens on a place up to its transition change, and ignored if the first list of the tokenQueue isn't
+            the same anymore
         """
-        self.downplaces = {}
-        """ Dictionnary of ``transition`` to whose we associate a dictionnary of places: number of tokens.
-            If a ``place`` and an associated ``nb`` belongs to this dictionnary, it means that the ``transition``
-            has the ``place`` as output and the output gives ``nb`` tokens to the place down.
+        self.satisfiedInputs = []
+        """ List indexed by the transitions: to ``transition.index`` we associate the number of its inputs whose place
+            contains enough enabled tokens, i.e.
+            ``self.enabledTokens[place.index][transition.index] >= self.inputs[place.index][transition.index]``
         """
-        self.token = {}
-        """ Dictionnary of ``place`` to whose we associate ``nb``, the number of tokens that are on ``place``
+        self.readyTransitions = {}
+        """ Dictionnary of the transitions whose inputs are all satisfied, to whose we associate their index. Apart from
+            the
+            :attr:`tokenQueue <petrinet_simulator.Transition.tokenQueue>` condition, these are exactly the enabled
+            transitions. It has the same form as the set returned by
+            :func:`enabledTransitionsSet <petrinet_simulator.PetriNet.enabledTransitionsSet>`
         """
 
-        self.initialState = {}
-        """ In this dictionnary we save all the necessary informations thanks to the method
-            :func:'setInitialState <petrinet_simulator.PetriNet.setInitialState>` in order to reinitialized the petriNet
-            after a simulation.
+        self.initialState = None
+        """ :class:`Snapshot <petrinet_simulator.Snapshot>` taken by the method
+            :func:`setInitialState <petrinet_simulator.PetriNet.setInitialState>` in order to reinitialized the petriNet
+            after a simulation. None if there is no initial state
+        """
+        self.snapshots = {}
+        """ Dictionnary of the named :class:`snapshots <petrinet_simulator.Snapshot>`, see
+            :func:`snapshot <petrinet_simulator.PetriNet.snapshot>`
         """
 
-        self.posPlaces = {}
-        """ Dictionnary of ``place`` to whose we associate ``pos`` the position of ``place`` in the graph build thanks
-            to the method :func:`Tools.write_graph <petrinet_simulator.Tools.write_graph>`
+        self.posPlaces = []
+        """ List indexed by the places: ``self.posPlaces[place.index]`` is the position of ``place`` in the graph build
+            thanks to the method :func:`Tools.write_graph <petrinet_simulator.Tools.write_graph>`
         """
-        self.posTransitions = {}
-        """ Dictionnary of ``transition`` to whose we associate ``pos`` the position of ``transition`` in the graph
-            build thanks to the method :func:`Tools.write_graph <petrinet_simulator.Tools.write_graph>`
+        self.posTransitions = []
+        """ List indexed by the transitions: ``self.posTransitions[transition.index]`` is the position of
+            ``transition`` in the graph build thanks to the method
+            :func:`Tools.write_graph <petrinet_simulator.Tools.write_graph>`
         """
         self.paths = {}
         """ Dictionnary of tuple (``place``, ``transition``) (respectively (``transition``, ``place``)) to whose we
@@ -78,7 +182,13 @@ class PetriNet(Simulator):
             represent the angle of the edge. First point is the position of ``place`` (respectively ``transition``),
             last point is the position of ``transition`` (respectively ``place``).
         """
+        self.checkpointInterval = 100
+        """ Number of firings between two checkpoints of the :class:`Replay <petrinet_simulator.Replay>` used by
+            :func:`next <petrinet_simulator.PetriNet.next>`, :func:`previous <petrinet_simulator.PetriNet.previous>`
+            and :func:`seek <petrinet_simulator.PetriNet.seek>`
+        """
         self.logger = logger or logging.getLogger(__name__)
+        self.__replay = None
 
     def __repr__(self):
         return '<PetriNet : %s>' % self.name
@@ -100,25 +210,21 @@ class PetriNet(Simulator):
             raise TypeError('PetriNet expected, got a %s instead' % petriNet.__class__.__name__)
 
         pn = PetriNet(petriNet.name)
-        copy = {}
-        # Copy places
-        for p, k in petriNet.places.iteritems():
-            pl = Place.copy(p)
-            pn.addPlace(pl)
-            copy.setdefault(p, pl)
-        # copy transitions
-        for t, c in petriNet.transitions.iteritems():
-            tr = Transition.copy(t)
-            pn.addTransition(tr)
-            copy.setdefault(t, tr)
-        for p, dct in petriNet.inputs.iteritems():
+        # Copy places and transitions: the copies get the same indices
+        for p in petriNet.places:
+            pn.addPlace(Place.copy(p), petriNet.posPlaces[p.index])
+        for t in petriNet.transitions:
+            pn.addTransition(Transition.copy(t), petriNet.posTransitions[t.index])
+        for p, dct in enumerate(petriNet.inputs):
             for t, n in dct.iteritems():
-                pn.addInput(copy[p], copy[t], n)
-        for p, dct in petriNet.outputs.iteritems():
+                pn.addInput(pn.places[p], pn.transitions[t], n)
+        for p, dct in enumerate(petriNet.outputs):
             for t, n in dct.iteritems():
-                pn.addOutput(copy[p], copy[t], n)
-        for p, n in petriNet.token.iteritems():
-            pn.token.setdefault(copy[p], n)
+                pn.addOutput(pn.places[p], pn.transitions[t], n)
+
+        # the copied tokens are already on the places
+        pn.token = list(petriNet.token)
+        pn.adapteEnabledTokens(*pn.places)
 
         return pn
 
@@ -136,13 +242,28 @@ class PetriNet(Simulator):
 
               * ``pos = (0.0, 0.0)`` : We add ``pos`` with the key ``place`` to the petriNet's attribute
                                        :attr:`posPlaces <petrinet_simulator.PetriNet.posPlaces>`
+
+            .. Note:: ``place`` receives the next place's :attr:`index <petrinet_simulator.Node.index>`.
+                      If ``place`` already exists in the petriNet, only its position is modified
         """
         if not isinstance(place, Place):
             self.logger.error('Place expected, got a %s instead', place.__class__.__name__)
             raise TypeError('Place expected, got a %s instead' % place.__class__.__name__)
 
-        self.places.setdefault(get_id(place), place)
-        self.posPlaces[get_id(place)] = pos
+        if self.hasPlace(place):
+            self.posPlaces[place.index] = pos
+            return
+
+        place.index = len(self.places)
+        self.__structureChanged()
+        self.places.append(place)
+        self.posPlaces.append(pos)
+        self.inputs.append({})
+        self.outputs.append({})
+        self.token.append(0)
+        self.enabledTokens.append({})
+        self.priorityQueues.append({})
+        self.arrivals.append({})
         self.logger.info('Place "%s" added in petrinet "%s"', place.name, self.name)
 
     def addTransition(self, transition, pos=(0.0, 0.0)):
@@ -155,13 +276,26 @@ class PetriNet(Simulator):
 
               * ``pos = (0.0, 0.0)`` : We add ``pos`` with the key ``transition`` to the petriNet's attribute
                                        :attr:`posTransitions <petrinet_simulator.PetriNet.posTransitions>`
+
+            .. Note:: ``transition`` receives the next transition's :attr:`index <petrinet_simulator.Node.index>`.
+                      If ``transition`` already exists in the petriNet, only its position is modified
         """
         if not isinstance(transition, Transition):
             self.logger.error('Transition expected, got a %s instead', transition.__class__.__name__)
             raise TypeError('Transition expected, got a %s instead' % transition.__class__.__name__)
 
-        self.transitions.setdefault(get_id(transition), transition)
-        self.posTransitions[get_id(transition)] = pos
+        if self.hasTransition(transition):
+            self.posTransitions[transition.index] = pos
+            return
+
+        transition.index = len(self.transitions)
+        self.__structureChanged()
+        self.transitions.append(transition)
+        self.posTransitions.append(pos)
+        self.upplaces.append({})
+        self.downplaces.append({})
+        self.satisfiedInputs.append(0)
+        self.__updateReadiness(transition.index)
         self.logger.info('Transition "%s" added in petrinet "%s"', transition.name, self.name)
 
     def addToken(self, place, *tokens):
@@ -181,29 +315,58 @@ class PetriNet(Simulator):
         """
         if not isinstance(place, Place):
             raise TypeError('Place expected, got a %s instead' % place.__class__.__name__)
-        if self.places.get(get_id(place)) is None:
+        if not self.hasPlace(place):
             self.logger.warning("Try to add a token to the inexistant place %s", place.name)
 
         else:
             for token in tokens:
                 if isinstance(token, Token):
                     place.addToken(token)
-                    self.token.setdefault(place, 0)
-                    self.token[place] += 1
+                    self.token[place.index] += 1
+                    self.__countToken(place, token, 1)
+                    self.__pushToken(place, token)
                     self.logger.info("Token %s added to Place %s in petrinet %s", token.name, place.name, self.name)
                 else:
                     self.logger.error("Tokens argument contains a non-Token object: %s", str(token))
                     raise TypeError("Tokens argument contains a non-Token object: %s" % str(token))
 
-    def getPlace(self, place_id):
-        """ return the place with place_id
+    def __structureChanged(self):
+        # the caches computed from the structure are outdated
+        self.structuralIndex = None
+        self.invariants = {}
+
+    def hasPlace(self, place):
+        """ :returns: True if ``place`` belongs to the petriNet
+        """
+        return place.index is not None and place.index < len(self.places) and self.places[place.index] is place
+
+    def hasTransition(self, transition):
+        """ :returns: True if ``transition`` belongs to the petriNet
         """
-        return self.places.get(place_id)
+        return (transition.index is not None and transition.index < len(self.transitions) and
+                self.transitions[transition.index] is transition)
 
-    def getTransition(self, transition_id):
-        """ return the transition with rank == ind
+    def getPlace(self, place):
+        """ return the place whose index is ``place`` if it is an integer, whose name is ``place`` otherwise.
+            None if no place is found
+        """
+        if isinstance(place, (int, long)):
+            return self.places[place] if 0 <= place < len(self.places) else None
+        for p in self.places:
+            if p.name == place:
+                return p
+        return None
+
+    def getTransition(self, transition):
+        """ return the transition whose index is ``transition`` if it is an integer, whose name is ``transition``
+            otherwise. None if no transition is found
         """
-        return self.transitions.get(transition_id)
+        if isinstance(transition, (int, long)):
+            return self.transitions[transition] if 0 <= transition < len(self.transitions) else None
+        for t in self.transitions:
+            if t.name == transition:
+                return t
+        return None
 
     @staticmethod
     def getTokens(self, place, name=''):
@@ -217,9 +380,10 @@ class PetriNet(Simulator):
     def getTokenNamesOnPlaces(tokens, *places):
         """ keep only the token whose name is on one of the given places
         """
+        names = [set().union(*[tok.names for tok in place.token]) for place in places]
         for token in tokens:
-            for place in places:
-                if token.containsName(*map(lambda tok: tok.name, place.token)):
+            for place_names in names:
+                if token.names.issubset(place_names):
                     yield token
 
     def removeToken(self, place, *tokens):
@@ -240,18 +404,17 @@ class PetriNet(Simulator):
         if not isinstance(place, Place):
             self.logger.error('Place expected, got a %s instead', place.__class__.__name__)
             raise TypeError('Place expected, got a %s instead' % place.__class__.__name__)
-        if self.places.get(get_id(place)) is None:
+        if not self.hasPlace(place):
             self.logger.warning("Try to remove a token to the inexistant place %s", place.name)
             return
 
         for token in tokens:
             if isinstance(token, Token):
                 if token in place.token:
-                    if self.token.get(place) is not None:
-                        self.token[place] -= 1
-                        if self.token[place] <= 0:
-                            del self.token[place]
+                    self.token[place.index] -= 1
+                    self.__countToken(place, token, -1)
                     place.removeToken(token)
+                    self.__popToken(place, token)
                     self.logger.info("Token %s has been removedfrom Place %s", token.name, place.name)
             else:
                 self.logger.error("Tokens argument contains a non-Token object: %s", str(token))
@@ -282,11 +445,16 @@ class PetriNet(Simulator):
 
             .. Warning:: ``nb_tok`` can only have value higher than -1
         """
-        tkns = set(tokenNames).intersection(
-            sum(map(lambda tok: tok.name, (self.upplaces.get(get_id(transition)) or {}).iterkeys()), [])
-        ) if options.get('place_presence', False) else set(tokenNames)
-
-        transition.insertTokenQueue(tkns[:options.get('nbt', sys.maxint)], i=options.get('i', -1),
+        tkns = list(tokenNames)
+        if options.get('place_presence', False):
+            names = set()
+            for p in self.upplaces[transition.index]:
+                for tok in self.places[p].token:
+                    names.update(tok.names)
+            tkns = [tkn for tkn in tkns if tkn in names]
+        nb_tok = options.get('nb_tok', -1)
+
+        transition.insertTokenQueue(*(tkns if nb_tok < 0 else tkns[:nb_tok]), i=options.get('i', -1),
                                     new_dct_tkn=options.get('new_dct_tkn', False))
 
     def addInput(self, place, transition, tok=1, path=[]):
@@ -318,20 +486,25 @@ class PetriNet(Simulator):
             self.logger.error('negative number of token')
             raise ValueError('negative number of token')
 
-        place_id, transition_id = get_id(place), get_id(transition)
-        if self.places.get(place_id) is None:
+        if not self.hasPlace(place):
             self.addPlace(place)
-        if self.transitions.get(transition_id) is None:
+        if not self.hasTransition(transition):
             self.addTransition(transition)
 
-        if tok != 0:
-            self.inputs.setdefault(place_id, {})
-            self.inputs[place_id].setdefault(transition_id, tok)
+        p, t = place.index, transition.index
+        if tok != 0 and t not in self.inputs[p]:
+            self.__structureChanged()
+            self.inputs[p][t] = tok
+            self.upplaces[t][p] = tok
 
-            self.upplaces.setdefault(transition_id, {})
-            self.upplaces[transition_id].setdefault(place_id, tok)
+            self.paths.setdefault((place, transition), path)
 
-            self.paths.setdefault((place_id, transition_id), path)
+            # count the tokens already on place that are enabled for the new input
+            self.enabledTokens[p][t] = 0
+            self.__countEnabledTokens(p, t, len([tk for tk in place.token if tk.isEnabled(place, transition)]))
+            self.__updateReadiness(t)
+            self.__buildQueue(place, t)
+            self.preferences.pop(t, None)
 
             self.logger.info('Input from Place %s to Transition %s in petrinet %s added',
                              place.name, transition.name, self.name)
@@ -356,18 +529,23 @@ class PetriNet(Simulator):
             self.logger.error('Transition expected, got a %s instead', transition.__class__.__name__)
             raise TypeError('Transition expected, got a %s instead' % transition.__class__.__name__)
 
-        place_id, transition_id = get_id(place), get_id(transition)
-        if (self.inputs.get(place_id) or {}).get(transition_id) is not None:
-            del self.inputs[place_id][transition_id]
-            if len(self.inputs[place_id]) == 0:
-                del self.inputs[place_id]
-        if (self.upplaces.get(transition_id) or {}).get(place_id) is not None:
-            del self.upplaces[transition_id][place_id]
-            if len(self.upplaces[transition_id]) == 0:
-                del self.upplaces[transition_id]
+        if not self.hasPlace(place) or not self.hasTransition(transition):
+            return
 
-        if self.paths.get((place_id, transition_id)) is not None:
-            del self.paths[(place_id, transition_id)]
+        p, t = place.index, transition.index
+        if t in self.inputs[p]:
+            self.__structureChanged()
+            # the input doesn't count anymore as satisfied
+            self.__countEnabledTokens(p, t, -self.enabledTokens[p][t])
+            del self.enabledTokens[p][t]
+            del self.priorityQueues[p][t]
+            self.preferences.pop(t, None)
+            del self.inputs[p][t]
+            del self.upplaces[t][p]
+            self.__updateReadiness(t)
+
+        if (place, transition) in self.paths:
+            del self.paths[(place, transition)]
 
         self.logger.info("Input from Place %s to Transition %s in petrinet %s removed",
                          place.name, transition.name, self.name)
@@ -401,20 +579,19 @@ class PetriNet(Simulator):
             self.logger.error('negative number of token')
             raise ValueError('negative number of token')
 
-        place_id, transition_id = get_id(place), get_id(transition)
-        if self.places.get(place_id) is None:
+        if not self.hasPlace(place):
             self.addPlace(place)
-        if self.transitions.get(transition_id) is None:
+        if not self.hasTransition(transition):
             self.addTransition(transition)
 
+        p, t = place.index, transition.index
         if tok != 0:
-            self.outputs.setdefault(place_id, {})
-            self.outputs[place_id].setdefault(transition_id, tok)
-
-            self.downplaces.setdefault(transition_id, {})
-            self.downplaces[transition_id].setdefault(place_id, tok)
+            if t not in self.outputs[p]:
+                self.__structureChanged()
+            self.outputs[p].setdefault(t, tok)
+            self.downplaces[t].setdefault(p, tok)
 
-            self.paths.setdefault((transition_id, place_id), path)
+            self.paths.setdefault((transition, place), path)
 
             self.logger.info('Output from Transition %s to Place %s in petrinet %s added',
                              transition.name, place.name, self.name)
@@ -444,61 +621,102 @@ class PetriNet(Simulator):
             self.logger.error('Transition expected, got a %s instead', transition.__class__.__name__)
             raise TypeError('Transition expected, got a %s instead' % transition.__class__.__name__)
 
-        place_id, transition_id = get_id(place), get_id(transition)
-        if (self.outputs.get(place_id) or {}).get(transition_id) is not None:
-            del self.outputs[place_id][transition_id]
-            if len(self.outputs[place_id]) == 0:
-                del self.outputs[place_id]
-        if (self.downplaces.get(transition_id) or {}).get(place_id) is not None:
-            del self.downplaces[transition_id][place_id]
-            if len(self.downplaces[transition_id]) == 0:
-                del self.downplaces[transition_id]
+        if not self.hasPlace(place) or not self.hasTransition(transition):
+            return
+
+        p, t = place.index, transition.index
+        if t in self.outputs[p]:
+            self.__structureChanged()
+            del self.outputs[p][t]
+            del self.downplaces[t][p]
 
-        if self.paths.get((transition_id, place_id)) is not None:
-            del self.paths[(transition_id, place_id)]
+        if (transition, place) in self.paths:
+            del self.paths[(transition, place)]
 
         self.logger.info('Output from Transition %s to Place %s in petrinet %s removed',
                          transition.name, place.name, self.name)
 
-    def savePlaces(self):
-        """ Save place's informations into :attr:`initialState <petrinet_simulator.PetriNet.initialState>`
-        """
-        for p, k in self.places.iteritems():
-            copy = [Token.copy(tok) for tok in p.token]
-            self.initialState.setdefault(p, copy)
-
-    def saveTransitions(self):
-        """ Save transition's informations into :attr:`initialState <petrinet_simulator.PetriNet.initialState>`
-        """
-        for t, c in self.transitions.iteritems():
-            if len(t.tokenQueue) != 0:
-                self.initialState.setdefault(t, {})
-                self.initialState[t].setdefault('tokenQueue', [])
-            for tkns in t.tokenQueue:
-                self.initialState[t]['tokenQueue'].append([])
-                for tkn in tkns:
-                    self.initialState[t]['tokenQueue'][-1].append(tkn)
-            if len(t.tokenQueueAfterFire) != 0:
-                self.initialState.setdefault(t, {})
-                self.initialState[t].setdefault('tokenQueueAfterFire', [])
-            for dct in t.tokenQueueAfterFire:
-                self.initialState[t]['tokenQueueAfterFire'].append({})
-                for tkns, dc in dct.iteritems():
-                    self.initialState[t]['tokenQueueAfterFire'][-1].setdefault(tkns, {})
-                    for tr, attr in dc.iteritems():
-                        at = {'tokenQueue': [], 'place_presence': attr['place_presence'], 'nb_tok': attr['nb_tok']}
-                        for tab in attr['tokenQueue']:
-                            at['tokenQueue'].append([])
-                            for tkn in tab:
-                                at['tokenQueue'][-1].append(tkn)
-                        self.initialState[t]['tokenQueueAfterFire'][-1][tkns].setdefault(tr, at)
+    def snapshot(self, name=None):
+        """ Take a snapshot of the state of the petriNet: the tokens on each place, the counters of the enabled tokens
+            and the token queues of the transitions. The structure of the petriNet isn't saved. The tokens are copied
+            with :func:`copy <petrinet_simulator.Token.copy>`, which shares their properties, and nothing is logged.
+
+            :param name: If given, the snapshot is saved in
+                         :attr:`snapshots <petrinet_simulator.PetriNet.snapshots>` under this name
+            :type name: str
+
+            :returns: An object :class:`Snapshot <petrinet_simulator.Snapshot>`
+        """
+        snapshot = Snapshot(
+            tokens=tuple(tuple(tok.copy() for tok in p.token) for p in self.places),
+            counts=tuple(self.token),
+            enabledTokens=tuple(tuple(dct.iteritems()) for dct in self.enabledTokens),
+            satisfiedInputs=tuple(self.satisfiedInputs),
+            readyTransitions=tuple(self.readyTransitions.iteritems()),
+            tokenQueues=tuple(tuple(tuple(tkns) for tkns in t.tokenQueue) for t in self.transitions),
+            tokenQueuesAfterFire=tuple(
+                tuple(
+                    tuple(
+                        (tkns, tuple((tr, tuple(tuple(tab) for tab in attr['tokenQueue']), attr['place_presence'],
+                                      attr['nb_tok']) for tr, attr in dc.iteritems()))
+                        for tkns, dc in dct.iteritems()
+                    ) for dct in t.tokenQueueAfterFire
+                ) for t in self.transitions
+            ),
+            currentClock=None
+        )
+        if name is not None:
+            self.snapshots[name] = snapshot
+        return snapshot
+
+    def restore(self, snapshot):
+        """ Put the petriNet back in the state saved by :func:`snapshot <petrinet_simulator.PetriNet.snapshot>`.
+            The tokens on the places are replaced by copies of the saved ones, without using
+            :func:`addToken <petrinet_simulator.PetriNet.addToken>` and
+            :func:`removeToken <petrinet_simulator.PetriNet.removeToken>`: the counters are restored as well.
+
+            :param snapshot: A snapshot of this petriNet, or the name of a snapshot in
+                             :attr:`snapshots <petrinet_simulator.PetriNet.snapshots>`
+            :type snapshot: :class:`Snapshot <petrinet_simulator.Snapshot>`
+
+            .. Warning:: The structure of the petriNet mustn't have changed since the snapshot: if the number of places
+                         or transitions is different, a ValueError is raised
+        """
+        if not isinstance(snapshot, Snapshot):
+            if snapshot not in self.snapshots:
+                raise ValueError('petriNet %s has no snapshot %s' % (self.name, snapshot))
+            snapshot = self.snapshots[snapshot]
+        if len(snapshot.tokens) != len(self.places) or len(snapshot.tokenQueues) != len(self.transitions):
+            raise ValueError('snapshot of %s place(s) and %s transition(s) expected, got %s and %s instead'
+                             % (len(self.places), len(self.transitions), len(snapshot.tokens),
+                                len(snapshot.tokenQueues)))
+
+        for p, tokens in zip(self.places, snapshot.tokens):
+            p.token = [tok.copy() for tok in tokens]
+        self.token = list(snapshot.counts)
+        self.enabledTokens = [dict(items) for items in snapshot.enabledTokens]
+        self.satisfiedInputs = list(snapshot.satisfiedInputs)
+        self.readyTransitions = dict(snapshot.readyTransitions)
+        for place in self.places:
+            self.__queueTokens(place)
+
+        for t, tokenQueue, tokenQueueAfterFire in zip(self.transitions, snapshot.tokenQueues,
+                                                      snapshot.tokenQueuesAfterFire):
+            t.tokenQueue = [list(tkns) for tkns in tokenQueue]
+            t.tokenQueueAfterFire = [
+                {
+                    tkns: {
+                        tr: {'tokenQueue': [list(tab) for tab in tabs], 'place_presence': place_presence,
+                             'nb_tok': nb_tok}
+                        for tr, tabs, place_presence, nb_tok in dc
+                    } for tkns, dc in dct
+                } for dct in tokenQueueAfterFire
+            ]
 
     def setInitialState(self):
-        """ Instanciate the attribute :attr:`initialState <petrinet_simulator.PetriNet.initialState>`
+        """ Save the current state into :attr:`initialState <petrinet_simulator.PetriNet.initialState>`
         """
-        self.initialState = {}
-        self.savePlaces()
-        self.saveTransitions()
+        self.initialState = self.snapshot()
 
     def buildPetriNet(self, places, transitions, inputs, outputs, tokens={}):
         """ Build a petriNet from the given arguments
@@ -521,13 +739,9 @@ class PetriNet(Simulator):
 
                 * *List* or *tuple*: In this case they are represented by a matrix whose range represents
                                      ``transitions`` and lines ``places``. The range j and the line i give the output or
-                                     input between the transition whose associated number in
-                                     :attr:`self.transitions <petrinet_simulator.PetriNet.transitions>` is j and
-                                     ``place`` whose associated number in
-                                     :attr:`self.places <petrinet_simulator.PetriNet.places>` is i.
-                * *Dict*: In this case they must have the same form as
-                          :attr:`self.transitions <petrinet_simulator.PetriNet.transitions>` and
-                          :attr:`self.places <petrinet_simulator.PetriNet.places>`.
+                                     input between the transition whose :attr:`index <petrinet_simulator.Node.index>`
+                                     is j and the place whose :attr:`index <petrinet_simulator.Node.index>` is i.
+                * *Dict*: In this case they are dictionnaries ``place``: dictionnary ``transition``: number of tokens.
 
             **Example:**
 
@@ -552,19 +766,19 @@ class PetriNet(Simulator):
             >>> print pt #doctest: +NORMALIZE_WHITESPACE
             # pt, 2 place(s), 1 transition(s) #
             >>> print pt.places #doctest: +NORMALIZE_WHITESPACE
-            # {<Place : pl1>: 0, <Place : pl2>: 1} #
+            # [<Place : pl1>, <Place : pl2>] #
             >>> print pt.transitions #doctest: +NORMALIZE_WHITESPACE
-            # {<Transition : tr1>: 0} #
+            # [<Transition : tr1>] #
             >>> print pt.token #doctest: +NORMALIZE_WHITESPACE
-            # {<Place : pl1>: 2} #
+            # [2, 0] #
             >>> print pt.inputs #doctest: +NORMALIZE_WHITESPACE
-            # {<Place : pl1>: {<Transition : tr1>: 1}} #
+            # [{0: 1}, {}] #
             >>> print pt.upplaces #doctest: +NORMALIZE_WHITESPACE
-            # {<Transition : tr1>: {<Place : pl1>: 1}}#
+            # [{0: 1}]#
             >>> print pt.outputs #doctest: +NORMALIZE_WHITESPACE
-            # {<Place : pl2>: {<Transition : tr1>: 2}} #
+            # [{}, {0: 2}] #
             >>> print pt.downplaces #doctest: +NORMALIZE_WHITESPACE
-            # {<Transition : tr1>: {<Place : pl2>: 2}} #
+            # [{1: 2}] #
         """
         if not isinstance(tokens, dict):
             raise TypeError('Dict expected, got a %s instead', tokens.__class__.__name__)
@@ -584,8 +798,10 @@ class PetriNet(Simulator):
         else:
             self.addTransition(transitions)
 
-        for p, k in self.places.iteritems():
-            for t, c in self.transitions.iteritems():
+        for p in self.places:
+            k = p.index
+            for t in self.transitions:
+                c = t.index
                 if isinstance(inputs, list) or isinstance(inputs, tuple):
                     if inputs[k][c] > 0:
                         self.addInput(p, t, inputs[k][c])
@@ -604,62 +820,81 @@ class PetriNet(Simulator):
                 for tok in toks:
                     self.addToken(p, tok)
             else:
-                self.addToken(toks)
+                self.addToken(p, toks)
 
     def reinitialized(self):
         """ Reinitialized the petriNet from the petriNet's attribute
             :attr:`initialState <petrinet_simulator.PetriNet.initialState>`, first instanciated by method
             :func:`setInitialState <petrinet_simulator.PetriNet.setInitialState>`
         """
-        if len(self.initialState) == 0:
+        if self.initialState is None:
             return
-        for p, k in self.places.iteritems():
-            copy = []
-            for tok in p.token:
-                copy.append(tok)
-            for tok in copy:
-                self.removeToken(p, tok)
-            for tok in self.initialState[p]:
-                self.addToken(p, tok)
-        for t, c in self.transitions.iteritems():
-            t.tokenQueue = []
-            t.tokenQueueAfterFire = []
-            if self.initialState.get(t) is not None:
-                if self.initialState[t].get('tokenQueue') is not None:
-                    t.tokenQueue = self.initialState[t]['tokenQueue']
-                if self.initialState[t].get('tokenQueueAfterFire') is not None:
-                    t.tokenQueueAfterFire = self.initialState[t]['tokenQueueAfterFire']
-        self.initialState = {}
+        self.restore(self.initialState)
+        self.initialState = None
 
     # -------------------------------------------------------
     # --------------- other functions -----------------------
     # -------------------------------------------------------
 
-    # TODO to adapte, to document
-    def reachabilityGraph(self, initialToken):
-        graph = {}
-        visited = {}
-        queue = [initialToken]
-        while len(queue) > 0:
-            token = queue[0]
-            visited.setdefault(tuple(token), token)
-            queue.remove(token)
-            ets = self.enabledTransitionsSet(token)
-            neighbours = {}
-            for t, c in ets.iteritems():
-                tk = self.fire(t, token)
-                neighbours.setdefault(t, tk)
-                b = True
-                for c, v in visited.iteritems():
-                    b2 = False
-                    for i in range(len(tk)):
-                        if(tk[i] != v[i]):
-                            b2 = True
-                    b = b and b2
-                if b is True:
-                    queue.append(tk)
-            graph.setdefault(tuple(token), neighbours)
-        return graph
+    def reachabilityGraph(self, marking=None, order='bfs', limit=None, workers=1, visited=None, reduced=False):
+        """ Explore every marking reachable from ``marking`` and build the reachability graph. The markings are tuples,
+            so each new marking is looked up in the visited ones in ``O(1)``, and the states to explore are kept in a
+            deque. Only the numbers of tokens are considered, as in
+            :func:`compile <petrinet_simulator.PetriNet.compile>`.
+
+            * options:
+
+                * ``marking = None``: list of the number of tokens on each place, indexed by the places. If None, the
+                                      current marking :attr:`token <petrinet_simulator.PetriNet.token>`
+                * ``order = 'bfs'``: ``'bfs'`` for a breadth first exploration, ``'dfs'`` for a depth first one
+                * ``limit = None``: maximal number of states. If it is reached, the exploration stops and the graph
+                                    isn't complete
+                * ``workers = 1``: number of processes exploring the markings. If None, the number of cpus. With more
+                                   than one worker, the exploration is breadth first and the markings are partitioned by
+                                   hash between the workers, see
+                                   :func:`exploreParallel <petrinet_simulator.Reachability.exploreParallel>`. The graph
+                                   is the same as the one of the sequential exploration, but the workers keep their
+                                   markings in memory: they can't be combined with a ``visited`` set on the disk
+                * ``visited = None``: :class:`VisitedSet <petrinet_simulator.VisitedSet>` keeping the visited
+                                      markings, empty. If None, they are kept in memory. The
+                                      :class:`MmapVisitedSet <petrinet_simulator.MmapVisitedSet>` and the
+                                      :class:`SortedRunsVisitedSet <petrinet_simulator.SortedRunsVisitedSet>` keep them
+                                      on the disk with the parents and the edges of the graph, for the state spaces which
+                                      don't fit in memory. The exploration is then breadth first, and only one level of
+                                      it, the deadlocks and the bounds are kept in memory
+                * ``reduced = False``: if True, only the enabled transitions of a stubborn set are fired from each
+                                       marking, see :class:`StubbornSets <petrinet_simulator.StubbornSets>`. The graph
+                                       keeps every reachable deadlock with much less states when the petriNet has
+                                       independent branches
+
+            :returns: An object :class:`ReachabilityGraph <petrinet_simulator.ReachabilityGraph>`, which gives the
+                      states, the deadlocks and the boundedness of the petriNet
+        """
+        if workers == 1:
+            return Reachability.explore(self, marking=marking, order=order, limit=limit, visited=visited,
+                                        reduced=reduced)
+        if order != 'bfs':
+            raise ValueError("order 'bfs' expected for a parallel exploration, got %s instead" % order)
+        return Reachability.exploreParallel(self, marking=marking, limit=limit, workers=workers, visited=visited,
+                                            reduced=reduced)
+
+    def coverabilityGraph(self, marking=None, limit=None):
+        """ Build the Karp-Miller coverability graph from ``marking``. Unlike
+            :func:`reachabilityGraph <petrinet_simulator.PetriNet.reachabilityGraph>`, it terminates on unbounded
+            petriNets: when a marking strictly covers a marking on its path, the places with more tokens get
+            :data:`OMEGA <petrinet_simulator.Reachability.OMEGA>`. Only the numbers of tokens are considered.
+
+            * options:
+
+                * ``marking = None``: list of the number of tokens on each place, indexed by the places. If None, the
+                                      current marking :attr:`token <petrinet_simulator.PetriNet.token>`
+                * ``limit = None``: maximal number of states. If it is reached, the exploration stops and the graph
+                                    isn't complete
+
+            :returns: An object :class:`CoverabilityGraph <petrinet_simulator.CoverabilityGraph>`, which gives the bound
+                      of each place, or flags it as unbounded
+        """
+        return Reachability.cover(self, marking=marking, limit=limit)
 
     def changeFireToken(self, place, token, ets):
         """ Change the attribute :attr:`fire <petrinet_simulator.TimeToken.fire>` of ``token`` and adapte the enable
@@ -677,8 +912,103 @@ class PetriNet(Simulator):
             .. Warning:: ``token`` has to be on ``place``, otherwise an error is raised
         """
         assert token in place.token
+        self.__countToken(place, token, -1)
         token.fire = not token.fire
-        self.adapteEnabledTransitionsSet(ets, *(self.inputs.get(place) or {}).iterkeys())
+        self.__countToken(place, token, 1)
+        self.adapteEnabledTransitionsSet(ets, *self.getTransitionsDown(place))
+
+    def adapteEnabledTokens(self, *places):
+        """ Count again the enabled tokens on each place in ``places`` and update
+            :attr:`enabledTokens <petrinet_simulator.PetriNet.enabledTokens>` and
+            :attr:`readyTransitions <petrinet_simulator.PetriNet.readyTransitions>`.
+            It has to be called when the priorities of tokens staying on these places are modified: the
+            :attr:`priorityQueues <petrinet_simulator.PetriNet.priorityQueues>` of the places are rebuilt as well.
+
+            :param places: *
+            :type places: :class:`Place <petrinet_simulator.Place>`
+        """
+        for place in places:
+            p = place.index
+            for t in self.inputs[p]:
+                transition = self.transitions[t]
+                nb = len([tok for tok in place.token if tok.isEnabled(place, transition)])
+                self.__countEnabledTokens(p, t, nb - self.enabledTokens[p][t])
+            self.__queueTokens(place)
+
+    def __queueTokens(self, place):
+        # number the tokens on place in their order and rebuild its priority queues
+        arrivals = self.arrivals[place.index] = {}
+        for token in place.token:
+            arrivals[id(token)] = self.__arrival
+            self.__arrival += 1
+        for t in self.inputs[place.index]:
+            self.__buildQueue(place, t)
+            self.preferences.pop(t, None)
+
+    def __buildQueue(self, place, t):
+        arrivals, transition = self.arrivals[place.index], self.transitions[t]
+        queue = []
+        for token in place.token:
+            arrival = arrivals.setdefault(id(token), self.__arrival)
+            if arrival == self.__arrival:
+                self.__arrival += 1
+            queue.append((self.__priorityKey(place, transition, token), arrival, token))
+        heapq.heapify(queue)
+        self.priorityQueues[place.index][t] = queue
+
+    @staticmethod
+    def __priorityKey(place, transition, token):
+        # the heaps are min-heaps: the most priority token has the lowest key
+        return tuple(-value for value in token.get_priority_value(place, transition))
+
+    def __pushToken(self, place, token):
+        p, arrival = place.index, self.__arrival
+        self.__arrival += 1
+        self.arrivals[p][id(token)] = arrival
+        for t, queue in self.priorityQueues[p].iteritems():
+            heapq.heappush(queue, (self.__priorityKey(place, self.transitions[t], token), arrival, token))
+
+    def __popToken(self, place, token):
+        # the entries of token become invalid, unless it is still on place
+        p = place.index
+        if token in place.token:
+            return
+        self.arrivals[p].pop(id(token), None)
+        for t, queue in self.priorityQueues[p].iteritems():
+            if len(queue) > 2 * len(place.token) + 16:
+                self.__buildQueue(place, t)
+
+    def __countToken(self, place, token, delta):
+        # add delta to the counters of the inputs of place for whose token is enabled
+        p = place.index
+        for t in self.inputs[p]:
+            self.preferences.pop(t, None)
+            if token.isEnabled(place, self.transitions[t]):
+                self.__countEnabledTokens(p, t, delta)
+
+    def __countEnabledTokens(self, p, t, delta):
+        if delta == 0:
+            return
+        nb, counter = self.inputs[p][t], self.enabledTokens[p]
+        was_satisfied = counter[t] >= nb
+        counter[t] += delta
+
+        # the input changes its state: we adapte the transition
+        if was_satisfied != (counter[t] >= nb):
+            self.satisfiedInputs[t] += -1 if was_satisfied else 1
+            self.__updateReadiness(t)
+
+    def __updateReadiness(self, t):
+        transition = self.transitions[t]
+        if self.satisfiedInputs[t] >= len(self.upplaces[t]):
+            self.readyTransitions[transition] = t
+        elif transition in self.readyTransitions:
+            del self.readyTransitions[transition]
+
+    def getTransitionsDown(self, place):
+        """ :returns: A list of the transitions that have ``place`` as input
+        """
+        return [self.transitions[t] for t in self.inputs[place.index]] if self.hasPlace(place) else []
 
     def getEnabledToken(self, place, transition):
         """ Get every enable token on upplaces regarding the given ``transition``
@@ -692,10 +1022,7 @@ class PetriNet(Simulator):
         """
         # are there enough token on each place up
         for tok in place.token:
-            is_firing = place not in tok.priority or transition == tok.priority[place]['priority'][0]
-            if not is_firing:
-                is_firing = tok.priority[place]['pref'] == 'time' and transition in tok.priority[place]['priority']
-            if tok.fire and is_firing:
+            if tok.isEnabled(place, transition):
                 yield tok
 
     def isEnabled(self, transition):
@@ -709,47 +1036,68 @@ class PetriNet(Simulator):
                 :attr:`transition.tokenQueue <petrinet_simulator.Transition.tokenQueue>` belongs at least to one of
                 the enable token above.
 
+            The two first conditions are read from :attr:`readyTransitions
+            <petrinet_simulator.PetriNet.readyTransitions>`, only the last one needs to look at the tokens.
+
             :param transition: *
             :type transition: :class:`Transition <petrinet_simulator.Transition>`
 
             :returns: True if ``transition`` is enable, else False
         """
         # Does it exist in the petrinet
-        if self.transitions.get(transition) is None:
+        if not self.hasTransition(transition):
             self.logger.warning("Transition %s doesn't exist in petriNet %s!" % (str(transition), self.name))
             return False
 
-        tokens = []
-        for place, nb in self.upplaces[transition].iteritems():
-            niter = 0
-            for tok in self.getEnabledToken(place, transition):
-                tokens.append(tok)
-                niter += 1
-            if niter < nb:
-                return False
-        names = sum(map(lambda tok: tok.name.split('_'), tokens), [])  # names of enables tokens
+        # On each upplace, do we have enough token
+        if transition not in self.readyTransitions:
+            return False
+        if not transition.tokenQueue:
+            return True
 
         # Every name to the first list of transition.tokenQueue has to belong at least to one of the token on an upplace
-        res = set(transition.tokenQueue[0]).issubset(names) if transition.tokenQueue else True
+        names = set()
+        for p in self.upplaces[transition.index]:
+            for tok in self.getEnabledToken(self.places[p], transition):
+                names.update(tok.names)
+        return names.issuperset(transition.tokenQueue[0])
 
-        # On each upplace, do we have enough token
-        for p, nb in self.upplaces[transition].iteritems():
-            res = res and len(tokens or []) >= nb
+    def getPrioritySortedToken(self, place, transition):
+        """ Generate the tokens on ``place`` enabled for ``transition``, from the most priority one to the least
+            priority one (see :func:`get_priority_value <petrinet_simulator.Token.get_priority_value>`). The tokens
+            with the same priority value are generated in their order of arrival on ``place``.
 
-        return res
+            The tokens are read from the heap of
+            :attr:`priorityQueues <petrinet_simulator.PetriNet.priorityQueues>`, without modifying it: a second heap
+            holds the entries whose parent has already been generated, so that the ``k`` first tokens are generated
+            in ``O(k log n)``.
 
-    def getPrioritySortedToken(self, place, transition):
-        priority_tokens = []
-        for token in self.getEnabledToken(place, transition):
-            priority_value, i = token.get_priority_value(place, transition), 0
-            # Insert the token in the list. Make sure that the list is sorted
-            while i < len(priority_tokens):
-                if priority_tokens[i][1] <= priority_value:
-                    break
-                i += 1
-            priority_tokens.append((token, priority_value))
-        for token, _ in priority_tokens:
-            yield token
+            :param place: *
+            :type place: :class:`Place <petrinet_simulator.Place>`
+            :param transition: *
+            :type transition: :class:`Transition <petrinet_simulator.Transition>`
+
+            .. Warning:: The tokens on ``place`` mustn't be added or removed while the generator is used.
+                         If there is NO input between ``place`` and ``transition``, the generator is empty
+        """
+        queue = self.priorityQueues[place.index].get(transition.index) if self.hasPlace(place) else None
+        if not queue:
+            return
+        arrivals = self.arrivals[place.index]
+
+        # the removed tokens at the top of the heap are dropped
+        while queue and arrivals.get(id(queue[0][2])) != queue[0][1]:
+            heapq.heappop(queue)
+
+        frontier = [(queue[0][0], queue[0][1], 0)] if queue else []
+        while frontier:
+            _, arrival, i = heapq.heappop(frontier)
+            token = queue[i][2]
+            if arrivals.get(id(token)) == arrival and token.isEnabled(place, transition):
+                yield token
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(queue):
+                    heapq.heappush(frontier, (queue[child][0], queue[child][1], child))
 
     # return a sequence of token with the right priority and the right number of token,
     # sorted considering the tokens clocks
@@ -757,7 +1105,9 @@ class PetriNet(Simulator):
         """ Compute a generator of token's that belong to ``place`` enable for ``transition``
             This generator is sorted regarding the clock's and the minimumStartingTime of each token
             The first criteria to order the tokens is **the appartenance to
-            transition.**:attr:`tokenQueue <petrinet_simulator.Transition.tokenQueue>`, the second is **the time**
+            transition.**:attr:`tokenQueue <petrinet_simulator.Transition.tokenQueue>`, the second is **the priority**
+            given by :func:`getPrioritySortedToken <petrinet_simulator.PetriNet.getPrioritySortedToken>`.
+            Without tokenQueue, only the tokens needed by the input are read from the priority queue.
 
             :param place: *
             :type place: :class:`Place <petrinet_simulator.Place>`
@@ -766,42 +1116,24 @@ class PetriNet(Simulator):
 
             .. Warning:: If there is NO input between ``place`` and ``transition``, the method return an empty generator
         """
-        # introduce two list:
-        #   - list concerning the token that have to contain the name wanted by transition
-        #   - list with the strongest priority
-        name_first_tokens = {}
-        priority_tokens = [tok for tok in self.getPrioritySortedToken(place, transition)]
-
-        # counter to know if enough token up are available (concerning the name)
-        tokens_words = {}
-        nb_priority = self.inputs[place][transition]
+        nb_priority = self.inputs[place.index].get(transition.index, 0)
+        fired = set()
 
         if transition.tokenQueue:
-            # We first sort the token by priority and save it with respect to their names
-            for token in self.getEnabledToken(place, transition):
-                tokens_words.setdefault(token, [])
-                for word in token.name.split('_'):
-                    if word in transition.tokenQueue:
-                        name_first_tokens.setdefault(word, set())
-                        name_first_tokens[word].add(token)
-                        tokens_words[token].append(word)
-
-            # Then we keep the most priority tokens iff it always exist at least a token for each required name
-            N = len(name_first_tokens)
-            n, nb_priority = 0, nb_priority - N
-            while n < nb_priority:
-                token = priority_tokens[n]
-                if set.intersection(*name_first_tokens.itervalues()).difference([token]) >= N:
-                    for word in tokens_words[token]:
-                        name_first_tokens[word].remove(token)
-                        n += 1
-                else:
-                    del priority_tokens[n]
-
-            for word, dct in name_first_tokens.iteritems():
-                yield dct.iterkeys().next()
+            # We first keep, in the priority order, the tokens that contain a name still wanted by transition
+            names = set(transition.tokenQueue[0])
+            for token in self.getPrioritySortedToken(place, transition):
+                if len(fired) >= nb_priority or not names:
+                    break
+                if not names.isdisjoint(token.names):
+                    names.difference_update(token.names)
+                    fired.add(token)
+                    yield token
+            nb_priority -= len(fired)
 
-        for token in priority_tokens[:nb_priority]:
+        # Then the most priority tokens
+        tokens = (tok for tok in self.getPrioritySortedToken(place, transition) if tok not in fired)
+        for token in islice(tokens, nb_priority):
             yield token
 
     def enabledTransitionsSet(self):
@@ -809,26 +1141,186 @@ class PetriNet(Simulator):
 
             :returns: A dictionnary :class:`Transition <petrinet_simulator.Transition>`: int
         """
-        return {t: c for t, c in self.transitions.iteritems() if self.isEnabled(t)}
+        return {t: c for t, c in self.readyTransitions.iteritems() if not t.tokenQueue or self.isEnabled(t)}
 
     def adapteEnabledTransitionsSet(self, ets, *transitions):
+        """ Add to ``ets`` the given transitions that are enabled and remove the ones that are not enabled anymore
+
+            :param ets: set of enabled transitions
+            :type ets: dict
+            :param transitions: *
+            :type transitions: :class:`Transition <petrinet_simulator.Transition>`
+        """
         for t in transitions:
             is_enabled = self.isEnabled(t)
             if t in ets and not is_enabled:
                 del ets[t]
             if t not in ets and is_enabled:
-                ets.setdefault(t, self.transitions[t])
+                ets.setdefault(t, t.index)
 
     def isBlocked(self):
         """ Compute if the there still are enabled transitions or Note
 
             :returns: A boolean
         """
-        for t, c in self.transitions.iteritems():
+        for t in self.readyTransitions.iterkeys():
             if self.isEnabled(t):
                 return False
         return True
 
+    def isPlain(self):
+        """ Check if the petriNet is plain, i.e. if the tokens are only counted during a simulation:
+
+              * no token has a name, a priority, a priorityAfterFire, a fireHeritance or can't be fired
+              * no transition has a tokenQueue or a tokenQueueAfterFire
+              * no place renames its tokens (see :attr:`tokName <petrinet_simulator.Place.tokName>`)
+
+            :returns: A boolean
+        """
+        for t in self.transitions:
+            if t.tokenQueue or t.tokenQueueAfterFire:
+                return False
+        for p in self.places:
+            if p.tokName is not None:
+                return False
+            for tok in p.token:
+                if tok.names or not tok.fire:
+                    return False
+                if tok.priority or tok.priorityAfterFire or tok.fireHeritance:
+                    return False
+        return True
+
+    def compile(self):
+        """ Build the compiled petriNet, where the tokens are counted in a marking vector and the inputs and outputs are
+            represented by incidence matrices.
+
+            :returns: An instance of the class :class:`CompiledPetriNet <petrinet_simulator.CompiledPetriNet>`
+        """
+        return CompiledPetriNet(self)
+
+    def getStructuralIndex(self):
+        """ Compute the :class:`StructuralIndex <petrinet_simulator.StructuralIndex>` of the petriNet, or return the
+            cached one if the structure hasn't changed since. The conflict queries are then bitwise operations.
+
+            :returns: An object :class:`StructuralIndex <petrinet_simulator.StructuralIndex>`
+        """
+        if self.structuralIndex is None:
+            # the indices are distinct: the sum of their bits is their union
+            consumers = [sum(1 << t for t in dct) for dct in self.inputs]
+            producers = [sum(1 << t for t in dct) for dct in self.outputs]
+            conflicts, causes = [], []
+            for t, (upplaces, downplaces) in enumerate(zip(self.upplaces, self.downplaces)):
+                mask = 0
+                for p in upplaces:
+                    mask |= consumers[p]
+                conflicts.append(mask)
+                mask = 0
+                for p in downplaces:
+                    mask |= consumers[p]
+                causes.append(mask)
+            self.structuralIndex = StructuralIndex(
+                upplaces=tuple(sum(1 << p for p in dct) for dct in self.upplaces),
+                downplaces=tuple(sum(1 << p for p in dct) for dct in self.downplaces),
+                consumers=tuple(consumers),
+                producers=tuple(producers),
+                conflicts=tuple(conflicts),
+                causes=tuple(causes)
+            )
+        return self.structuralIndex
+
+    def pInvariants(self):
+        """ Compute the minimal P-semiflows of the petriNet with the Farkas algorithm, see
+            :func:`Invariants.semiflows <petrinet_simulator.Invariants.semiflows>`. For each of them, the weighted sum
+            of the numbers of tokens on its places is the same in every reachable marking. They are cached until the
+            structure changes.
+
+            :returns: A list of dictionnaries :class:`Place <petrinet_simulator.Place>`: positive coefficient
+        """
+        if 'P' not in self.invariants:
+            self.invariants['P'] = [{self.places[p]: nb for p, nb in dct.iteritems()}
+                                    for dct in Invariants.pInvariants(self)]
+        return self.invariants['P']
+
+    def tInvariants(self):
+        """ Compute the minimal T-semiflows of the petriNet with the Farkas algorithm, see
+            :func:`Invariants.semiflows <petrinet_simulator.Invariants.semiflows>`. Firing each of their transitions as
+            many times as its coefficient gives back the marking we start from. They are cached until the structure
+            changes.
+
+            :returns: A list of dictionnaries :class:`Transition <petrinet_simulator.Transition>`: positive coefficient
+        """
+        if 'T' not in self.invariants:
+            self.invariants['T'] = [{self.transitions[t]: nb for t, nb in dct.iteritems()}
+                                    for dct in Invariants.tInvariants(self)]
+        return self.invariants['T']
+
+    def minimalSiphons(self):
+        """ Enumerate the minimal siphons of the petriNet, see
+            :func:`Siphons.minimalSiphons <petrinet_simulator.Siphons.minimalSiphons>`. A siphon is a set of places
+            such that every transition putting tokens on it takes tokens from it: once empty, it stays empty.
+
+            :returns: A list of lists of :class:`places <petrinet_simulator.Place>`
+        """
+        siphons = Siphons.minimalSiphons(self.getStructuralIndex(), len(self.places))
+        return [[self.places[p] for p in bits(siphon)] for siphon in siphons]
+
+    def maximalTrap(self, places=None):
+        """ Compute the maximal trap included in ``places``. A trap is a set of places such that every transition
+            taking tokens from it puts tokens on it: once marked, it stays marked.
+
+            * options:
+
+                * ``places = None``: list of :class:`places <petrinet_simulator.Place>`. If None, every place
+
+            :returns: A list of :class:`places <petrinet_simulator.Place>`, empty if there is no trap in ``places``
+        """
+        mask = (1 << len(self.places)) - 1 if places is None else sum(1 << p.index for p in set(places))
+        return [self.places[p] for p in bits(Siphons.maximalTrap(self.getStructuralIndex(), mask))]
+
+    def isFreeChoice(self):
+        """ :returns: True if two transitions sharing an input place have the same input places, see
+                      :func:`Siphons.isFreeChoice <petrinet_simulator.Siphons.isFreeChoice>`
+        """
+        return Siphons.isFreeChoice(self.getStructuralIndex())
+
+    def isDeadlockFree(self, marking=None):
+        """ Quick structural check of the deadlock freedom: if every input and output carries one token and every
+            minimal siphon contains a trap marked at ``marking``, no siphon can be emptied and a transition is always
+            enabled. Unlike :func:`reachabilityGraph <petrinet_simulator.PetriNet.reachabilityGraph>`, no marking is
+            explored.
+
+            * options:
+
+                * ``marking = None``: list of the number of tokens on each place. If None, the current marking
+                                      :attr:`token <petrinet_simulator.PetriNet.token>`
+
+            :returns: True if the petriNet is proven deadlock free, None if the check can't conclude
+        """
+        marking = self.token if marking is None else marking
+        # without transition, the petriNet is always blocked
+        if not self.transitions or not Siphons.isOrdinary(self):
+            return None
+        if Siphons.unmarkedSiphon(self.getStructuralIndex(), len(self.places), marking) is not None:
+            return None
+        return True
+
+    def isLive(self, marking=None):
+        """ Check the liveness of a free choice petriNet with Commoner's theorem: it is live, i.e. every transition can
+            always be fired again, if and only if every minimal siphon contains a trap marked at ``marking``.
+
+            * options:
+
+                * ``marking = None``: list of the number of tokens on each place. If None, the current marking
+                                      :attr:`token <petrinet_simulator.PetriNet.token>`
+
+            :returns: A boolean, None if the petriNet isn't free choice or if an input or output carries more than one
+                      token
+        """
+        marking = self.token if marking is None else marking
+        if not Siphons.isOrdinary(self) or not self.isFreeChoice():
+            return None
+        return Siphons.unmarkedSiphon(self.getStructuralIndex(), len(self.places), marking) is None
+
     def isInStructuralConflict(self, transition1, transition2):
         """ Check if ``transition1`` and ``transition2`` are in structural conflict,
             i.e. one token or more can be fired by both transitions
@@ -840,11 +1332,7 @@ class PetriNet(Simulator):
 
             :returns: A boolean
         """
-        if self.upplaces.get(transition1) is not None:
-            for p, nb in self.upplaces[transition1].iteritems():
-                if self.upplaces.get(transition2) is not None and p in self.upplaces[transition2]:
-                    return True
-        return False
+        return bool(self.getStructuralIndex().conflicts[transition1.index] >> transition2.index & 1)
 
     def isAllInStructuralConflict(self, transitions):
         """ Check if each transition in ``transitions`` is not in structural conflict with an other one.
@@ -852,10 +1340,12 @@ class PetriNet(Simulator):
             :param transitions: *
             :type transitions: List, dict or tuple
         """
-        for tr1 in transitions:
-            for tr2 in transitions:
-                if tr1 != tr2 and self.isInStructuralConflict(tr1, tr2):
-                    return True
+        conflicts, mask = self.getStructuralIndex().conflicts, 0
+        for tr in transitions:
+            mask |= 1 << tr.index
+        for tr in transitions:
+            if conflicts[tr.index] & mask & ~(1 << tr.index):
+                return True
         return False
 
     def isInBehavioralConflict(self, transition1, transition2):
@@ -870,10 +1360,8 @@ class PetriNet(Simulator):
 
             :returns: A boolean
         """
-        b = True
-        for p, nb in self.token.iteritems():
-            b = b and nb >= (self.inputs[p][transition1] + self.inputs[p][transition2])
-        return (not b and self.isEnabled(transition1) and self.isEnabled(transition2))
+        return (self.__lacksTokens(transition1.index, transition2.index) and self.isEnabled(transition1) and
+                self.isEnabled(transition2))
 
     def isAllInBehavioralConflict(self, transitions):
         """ Check if each transition in ``transitions`` is not in behavioral conflict with an other one.
@@ -881,12 +1369,26 @@ class PetriNet(Simulator):
             :param transitions: *
             :type transitions: List, dict or tuple
         """
-        for tr1 in transitions:
-            for tr2 in transitions:
-                if tr1 != tr2 and self.isInBehavioralConflict(tr1, tr2):
+        # only the enabled transitions in structural conflict can be in behavioral conflict
+        enabled = [tr for tr in transitions if self.isEnabled(tr)]
+        conflicts, mask = self.getStructuralIndex().conflicts, 0
+        for tr in enabled:
+            mask |= 1 << tr.index
+        for tr in enabled:
+            for t in bits(conflicts[tr.index] & mask & ~(1 << tr.index)):
+                if self.__lacksTokens(tr.index, t):
                     return True
         return False
 
+    def __lacksTokens(self, t1, t2):
+        # True if a shared upplace of t1 and t2 hasn't enough tokens for both of them
+        upplaces = self.getStructuralIndex().upplaces
+        for p in bits(upplaces[t1] & upplaces[t2]):
+            inputs = self.inputs[p]
+            if self.token[p] < inputs[t1] + inputs[t2]:
+                return True
+        return False
+
     def conflictPlaces(self, transition1, transition2):
         """ Compute the places that are shared by both ``transition1`` and ``transition2``
 
@@ -897,14 +1399,9 @@ class PetriNet(Simulator):
 
             :returns: Dictionnary :class:`Place <petrinet_simulator.Place>`: int
         """
-        places = {}
-
-        if self.upplaces.get(transition1) is not None:
-            for p1, nb1 in self.upplaces[transition1].iteritems():
-                if self.upplaces.get(transition2) is not None and p1 in self.upplaces[transition2]:
-                    places.setdefault(p1, nb1)
-
-        return places
+        upplaces = self.getStructuralIndex().upplaces
+        nbs = self.upplaces[transition1.index]
+        return {self.places[p]: nbs[p] for p in bits(upplaces[transition1.index] & upplaces[transition2.index])}
 
     def AllConflictPlaces(self, transitions):
         """ Compute all the conflict places between each couple of transitions in ``transitions``
@@ -916,9 +1413,10 @@ class PetriNet(Simulator):
         """
         places = {}
         if isinstance(transitions, list) or isinstance(transitions, dict) or isinstance(transitions, tuple):
-            for t1 in transitions:
-                for t2 in transitions:
-                    places.update(self.conflictPlaces(t1, t2))
+            # each transition is coupled with itself too: every upplace is a conflict place
+            for tr in transitions:
+                for p, nb in self.upplaces[tr.index].iteritems():
+                    places[self.places[p]] = nb
         return places
 
     def pref(self, transition):
@@ -931,13 +1429,22 @@ class PetriNet(Simulator):
                   that compute a value for ``ind``
                 * We sum all the given value and we return the average
 
+            The preference is saved in :attr:`preferences <petrinet_simulator.PetriNet.preferences>` and computed
+            again only when the tokens up to ``transition`` change.
+
             :param transition: *
             :type transition: :class:`Transition <petrinet_simulator.Transition>`
 
             :returns: A float
         """
+        names = tuple(transition.tokenQueue[0]) if transition.tokenQueue else None
+        saved = self.preferences.get(transition.index)
+        if saved is not None and saved[0] == names:
+            return saved[1]
+
         result = []
-        for p, n in (self.upplaces.get(transition) or {}).iteritems():
+        for place_index in self.upplaces[transition.index]:
+            p = self.places[place_index]
             for tok in self.getSortedNextFiredToken(p, transition):
                 if tok.priority.get(p) is not None:
                     result.extend(map(
@@ -945,11 +1452,14 @@ class PetriNet(Simulator):
                         filter(lambda tr: tr == transition, tok.priority[p]['priority'])
                     ))
 
-        return sum(result) / len(result) if result else 0.0
+        preference = sum(result) / len(result) if result else 0.0
+        self.preferences[transition.index] = (names, preference)
+        return preference
 
     def mostPriorityTransition(self, *transitions):
         """ For each transition in ``transitions``, we keep the one that has the biggest preference compute using
-            the method :func:`pref <petrinet_simulator.PetriNet.pref>`
+            the method :func:`pref <petrinet_simulator.PetriNet.pref>`. Among the transitions of same preference, the
+            last one is kept.
 
             :param transitions: *
             :type transitions: List, dict or tuple
@@ -957,33 +1467,41 @@ class PetriNet(Simulator):
             :returns: An object of class :class:`Transition <petrinet_simulator.Transition>`
                       or None if no transition are found
         """
+        best, best_pref = None, None
         try:
-            return sorted(transitions, key=self.pref)[-1]
+            for transition in transitions:
+                preference = self.pref(transition)
+                if best is None or preference >= best_pref:
+                    best, best_pref = transition, preference
         except Exception as e:
             self.logger.warning(str(e))
             return None
 
+        if best is None:
+            self.logger.warning('no transition to choose')
+        return best
+
     # -------------------------------------------------------
     # -------------- representation functions ---------------
     # -------------------------------------------------------
 
-    def __fireToken(self, transition, ets):
+    def _fireToken(self, transition, ets):
         tok_save, transitions_save = [], {}
 
         # save the previous token and remove the token that were fired
-        if self.upplaces.get(transition) is not None:
-            for p in self.upplaces[transition].iterkeys():
-                for tok in self.getSortedNextFiredToken(p, transition):
-                    tok_save.append(tok)
-                    self.removeToken(p, tok)
-                transitions_save.update(self.inputs.get(p) or {})
+        for place_index in self.upplaces[transition.index].keys():
+            p = self.places[place_index]
+            for tok in list(self.getSortedNextFiredToken(p, transition)):
+                tok_save.append(tok)
+                self.removeToken(p, tok)
+            transitions_save.update(self.inputs[place_index])
 
         # If a transition is not enabled anymore then its clock is reinitialized
-        self.adapteEnabledTransitionsSet(ets, *transitions_save.iterkeys())
+        self.adapteEnabledTransitionsSet(ets, *[self.transitions[t] for t in transitions_save])
 
         return tok_save
 
-    def __updateTokenQueue(self, transition, fired_tokens):
+    def _updateTokenQueue(self, transition, fired_tokens):
         # we remove the token of transition.tokenQueue
         if transition.tokenQueue:
             del transition.tokenQueue[0]
@@ -991,27 +1509,22 @@ class PetriNet(Simulator):
         # We adapte the tokenQueue of targeted transitions
         if transition.tokenQueueAfterFire:
             for tkk, dct in transition.tokenQueueAfterFire[0].iteritems():
-                tkk_save = [t for t in tkk]
-
                 # if all tokens in tkk are in the firing token, then we apply the token queue after fire
+                tkk_save = set(tkk)
                 for tok in fired_tokens:
-                    i = 0
-                    while i < len(tkk_save):
-                        tkn = tkk_save[i]
-                        if tkn in tok.name.split('_'):
-                            del tkk_save[i]
-                            continue
-                        i += 1
+                    tkk_save.difference_update(tok.names)
                     if not tkk_save:
                         break
+                if tkk_save:
+                    continue
 
                 for tr, attr in dct.iteritems():
                     for tab in attr['tokenQueue']:
-                        self.insertTokenQueue(tr, [el for el in tab], place_presence=attr['place_presence'],
+                        self.insertTokenQueue(tr, *tab, place_presence=attr['place_presence'],
                                               nb_tok=attr['nb_tok'])
             del transition.tokenQueueAfterFire[0]
 
-    def __updateAdvancedProperties(self, tok, transition, tok_save, ets):
+    def _updateAdvancedProperties(self, tok, transition, tok_save, ets):
         # priority after fire
         for t in tok_save:
             for tr, dic in t.priorityAfterFire.iteritems():
@@ -1022,9 +1535,12 @@ class PetriNet(Simulator):
                                 tok.addPriority(pl, attr['priority'], pref=attr['pref'])
                         else:
                             for token in loc[0].token:
-                                if loc[1] in token.name.split('_'):
+                                if loc[1] in token.names:
                                     for pl, trs in prt.iteritems():
                                         token.addPriority(pl, trs)
+                            # the new priorities may change the enabled tokens on loc[0]
+                            self.adapteEnabledTokens(loc[0])
+                            self.adapteEnabledTransitionsSet(ets, *self.getTransitionsDown(loc[0]))
                 else:
                     for loc, prt in dic.iteritems():
                         for pl, attr in prt.iteritems():
@@ -1032,44 +1548,48 @@ class PetriNet(Simulator):
             if t.fireHeritance.get(transition) is not None:
                 for pl, ts in t.fireHeritance[transition].iteritems():
                     for tt in pl.token:
-                        if tt.name in ts:
+                        if not tt.names.isdisjoint(ts):
                             if not tt.fire:
                                 self.changeFireToken(pl, tt, ets)
 
-    def __getTokenAfterFire(self, transition, ets, tok_save):
+    def _getTokenAfterFire(self, transition, ets, tok_save):
         tok = Token()
 
         # add a name and first priorities to tok
         tok.addFirstProperties(*tok_save)
 
         # update advanced properties
-        self.__updateAdvancedProperties(tok, transition, tok_save, ets)
+        self._updateAdvancedProperties(tok, transition, tok_save, ets)
 
         return tok
 
-    def __updateAfterFiring(self, transition, token, ets):
-        transitions_save = {}
+    def _updateAfterFiring(self, transition, token, ets):
+        transitions_save, produced = {}, []
         # Add token to places after the transition that fired
-        for p, n in (self.downplaces.get(transition) or {}).iteritems():
+        for place_index, n in self.downplaces[transition.index].iteritems():
             for i in range(n):
-                self.addToken(p, token.copy())
-            if self.inputs.get(p):
-                transitions_save.update(self.inputs.get(p) or {})
+                produced.append(token.copy())
+                self.addToken(self.places[place_index], produced[-1])
+            transitions_save.update(self.inputs[place_index])
 
         # If a transition is enabled we add it to ets
-        self.adapteEnabledTransitionsSet(ets, *transitions_save.iterkeys())
+        self.adapteEnabledTransitionsSet(ets, *[self.transitions[t] for t in transitions_save])
+
+        return produced
 
     def __adaptePetriNet(self, transition, ets):
-        fired_tokens = self.__fireToken(transition, ets)
+        fired_tokens = self._fireToken(transition, ets)
 
         # We adapte the tokenQueue of targeted transitions and of transition
-        self.__updateTokenQueue(transition, fired_tokens)
+        self._updateTokenQueue(transition, fired_tokens)
 
         # create the token after the fire
-        token = self.__getTokenAfterFire(transition, ets, fired_tokens)
+        token = self._getTokenAfterFire(transition, ets, fired_tokens)
 
         # Update the places and ets after the firing
-        self.__updateAfterFiring(transition, token, ets)
+        produced = self._updateAfterFiring(transition, token, ets)
+
+        return fired_tokens, produced
 
     def computeFiringTransition(self, ets):
         """ Among the given transitions in ``ets``, this method compute the next transition to fire regarding priority,
@@ -1082,8 +1602,10 @@ class PetriNet(Simulator):
 
             .. Note:: To create ets we can invoque the method
                       :func:`enabledTransitionsSet <petrinet_simulator.PetriNet.enabledTransitionsSet>`
+
+                      Among the transitions of same preference, the one with the highest index is chosen
         """
-        return self.mostPriorityTransition(*ets.iterkeys())
+        return self.mostPriorityTransition(*sorted(ets.iterkeys(), key=lambda t: t.index))
 
     def fire(self, transition, ets):
         """ Execute the firing of ``transition``, adapte ``ets`` and all places and tokens in the PetriNet
@@ -1093,10 +1615,12 @@ class PetriNet(Simulator):
             :param ets: set of enabled transitions
             :type ets: dict
 
+            :returns: The tuple (list of the consumed tokens, list of the produced tokens)
+
             .. Warning:: ``ets`` must contain only enable transitions, otherwise an Error can be raised
         """
         # adapte the places
-        self.__adaptePetriNet(transition, ets)
+        return self.__adaptePetriNet(transition, ets)
 
     def oneFireSimulation(self, ets):
         """ Compute the next firing transition and execute the firing: the two methods called are
@@ -1109,7 +1633,7 @@ class PetriNet(Simulator):
             :returns: an object of class :class:`Transition <petrinet_simulator.Transition>`
         """
         # compute the minimum of time for enabled transitions, and choose the transition
-        transition = self.mostPriorityTransition(*ets.iterkeys())
+        transition = self.mostPriorityTransition(*sorted(ets.iterkeys(), key=lambda t: t.index))
 
         # fire and adapte each clocks
         self.fire(transition, ets)
@@ -1117,26 +1641,128 @@ class PetriNet(Simulator):
         # we return the new token
         return transition
 
-    def simulation(self, show=True, niter=-1):
-        if not isinstance(show, bool):
-            raise TypeError('Boolean expected, got a %s instead' % show.__class__.__name__)
+    def simulate_iter(self, niter=-1):
+        """ Generate the firings of the simulation one by one: a transition fires only when the next
+            :class:`FiringEvent <petrinet_simulator.FiringEvent>` is asked, so the simulation can be filtered or
+            stopped at will. Nothing is saved between two firings, the memory used doesn't depend on the number of
+            firings.
 
-        if show:
-            print 'beginning of the simulation'
-            print ''
+            * options:
+
+                * ``niter = -1``: If positive we do at most ``niter`` firings
 
-        if self.initialState == {}:
+            :returns: A generator of :class:`FiringEvent <petrinet_simulator.FiringEvent>`
+
+            .. Warning:: The tokens mustn't be modified from outside between two firings: the enabled transitions are
+                         only adapted to the firings
+        """
+        if self.initialState is None:
             self.setInitialState()
         ets = self.enabledTransitionsSet()
 
         n = 0
         while len(ets) != 0 and (niter < 0 or n < niter):
-            transition = self.oneFireSimulation(ets)
+            transition = self.mostPriorityTransition(*sorted(ets.iterkeys(), key=lambda t: t.index))
+            consumed, produced = self.fire(transition, ets)
+            yield FiringEvent(n, None, transition.index, tuple(id(tok) for tok in consumed),
+                              tuple(id(tok) for tok in produced))
             n += 1
 
-            if transition.show and show:
-                print transition.name + ' fired'
-                print ''
+    def _replayFiring(self, step, transition, ets, clock):
+        # fire again a transition saved by a Replay
+        consumed, produced = self.fire(transition, ets)
+        return FiringEvent(step, None, transition.index, tuple(id(tok) for tok in consumed),
+                           tuple(id(tok) for tok in produced))
+
+    def __getReplay(self):
+        if self.__replay is None:
+            self.__replay = Replay(self, interval=self.checkpointInterval)
+        return self.__replay
+
+    def next(self):
+        """ Fire the next transition of the simulation started by the first call, see
+            :func:`simulate_iter <petrinet_simulator.PetriNet.simulate_iter>`. The firings are saved by a
+            :class:`Replay <petrinet_simulator.Replay>`, so that the simulation can go back with
+            :func:`previous <petrinet_simulator.PetriNet.previous>` and :func:`seek <petrinet_simulator.PetriNet.seek>`
+
+            :returns: The :class:`FiringEvent <petrinet_simulator.FiringEvent>` of the firing, None if no transition
+                      is enabled anymore
+        """
+        return self.__getReplay().next()
+
+    def previous(self):
+        """ Put the petriNet back in its state before the last firing done by
+            :func:`next <petrinet_simulator.PetriNet.next>`. The last checkpoint is restored and at most
+            :attr:`checkpointInterval <petrinet_simulator.PetriNet.checkpointInterval>` firings are done again
+
+            :returns: False if no transition has been fired yet, otherwise True
+        """
+        return self.__getReplay().previous()
+
+    def seek(self, step):
+        """ Put the petriNet in its state after ``step`` firings of the simulation of
+            :func:`next <petrinet_simulator.PetriNet.next>`, see :func:`Replay.seek <petrinet_simulator.Replay.seek>`
+
+            :param step: *
+            :type step: int
+
+            :returns: The reached step, lower than ``step`` if no transition is enabled anymore before
+        """
+        return self.__getReplay().seek(step)
+
+    def has_next(self):
+        """ :returns: True if a transition can still fire
+        """
+        return not self.isBlocked()
+
+    def reinitialize(self):
+        """ Forget the simulation of :func:`next <petrinet_simulator.PetriNet.next>` and reinitialized the petriNet,
+            see :func:`reinitialized <petrinet_simulator.PetriNet.reinitialized>`
+        """
+        self.__replay = None
+        self.reinitialized()
+
+    def simulation(self, show=True, niter=-1, trace=None):
+        """ Execute the simulation of the PetriNet. Plain petriNets are simulated by their
+            :class:`CompiledPetriNet <petrinet_simulator.CompiledPetriNet>`, the other ones by
+            :func:`simulate_iter <petrinet_simulator.PetriNet.simulate_iter>`
+
+            * options:
+
+                * ``show = True``: if True, the firing transitions are printed
+                * ``niter = -1``: If positive we do at most ``niter`` firings
+                * ``trace = None``: A :class:`TraceRecorder <petrinet_simulator.TraceRecorder>` recording every
+                                    firing. It isn't closed at the end of the simulation
+        """
+        if not isinstance(show, bool):
+            raise TypeError('Boolean expected, got a %s instead' % show.__class__.__name__)
+
+        if show:
+            print 'beginning of the simulation'
+            print ''
+
+        if self.initialState is None:
+            self.setInitialState()
+
+        if self.isPlain():
+            # fast path: the tokens are only counted, and the conflicts are resolved as by computeFiringTransition
+            compiled = self.compile()
+            for n, t in enumerate(compiled.simulation(niter=niter)):
+                if trace is not None:
+                    trace.record(n, None, t)
+                transition = compiled.transitions[t]
+                if transition.show and show:
+                    print transition.name + ' fired'
+                    print ''
+            compiled.writeMarking()
+        else:
+            for event in self.simulate_iter(niter=niter):
+                if trace is not None:
+                    trace.record(event.step, event.clock, event.transition)
+                transition = self.transitions[event.transition]
+                if transition.show and show:
+                    print transition.name + ' fired'
+                    print ''
 
         if show:
             print 'end of the simulation'
@@ -9,6 +9,7 @@ import sys
 sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
 
 from Node import Node
+from Token import Token
 import logging
 
 
@@ -19,6 +20,8 @@ class Place(Node):
 
         A place can contain several tokens, can have transitions as inputs and outputs, but no places
     """
+    __slots__ = ('token', 'withoutPriority', 'tokName', 'exit')
+
     def __init__(self, name='', logger=logging, withoutPriority=False, tokName=None, exit=False):
         Node.__init__(self, name=name, logger=logger)
         self.token = []
@@ -55,7 +58,7 @@ class Place(Node):
         """
         try:
             # Create new place
-            pl = Place(self.name, self.withoutPriority, self.tokName, self.exit)
+            pl = Place(name=self.name, withoutPriority=self.withoutPriority, tokName=self.tokName, exit=self.exit)
 
             # Adapte the list of tokens
             for tok in self.token:
@@ -73,7 +76,7 @@ class Place(Node):
 
         .. Warning:: We can NOT add twice the same token. In this case, to make a copy is necessary !
         """
-        assert token.__class__.__name__ == 'Token'
+        assert isinstance(token, Token)
         if token in self.token:
             self.logger.warning('Token %s already exists on the place %s' % (token.name, self.name))
 
@@ -0,0 +1,811 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 20:12:09 2026
+
+@author: Mickael Grima
+"""
+
+from bisect import bisect_left
+from collections import deque
+from itertools import chain, islice, izip
+import multiprocessing
+import numpy as np
+from VisitedSet import MemoryVisitedSet
+
+
+class ReachabilityGraph(object):
+    """ This class represents the reachability graph of a :class:`PetriNet <petrinet_simulator.PetriNet>`, built by the
+        method :func:`PetriNet.reachabilityGraph <petrinet_simulator.PetriNet.reachabilityGraph>`.
+
+        A state is a marking: the tuple of the number of tokens on each place, indexed by the
+        :attr:`index <petrinet_simulator.Node.index>` of the places. The markings are hashable, so finding out whether a
+        marking has already been visited costs ``O(1)``. The states are numbered in the order of their discovery, the
+        initial marking being the state 0. The visited markings, the parents of the states and the edges are kept by a
+        :class:`VisitedSet <petrinet_simulator.VisitedSet>` (see
+        :func:`graphStores <petrinet_simulator.VisitedSet.graphStores>`), in memory by default. With a visited set on
+        the disk, only the deadlocks, the bounds and one level of the breadth first exploration (its states, their
+        successors and its edges) are kept in memory.
+
+        .. Note:: As in :func:`PetriNet.compile <petrinet_simulator.PetriNet.compile>`, the tokens are only counted:
+                  their names and advanced properties are not considered
+    """
+
+    def __init__(self, places, transitions, visited=None):
+        self.places = list(places)
+        """ List of places, in the order of the markings
+        """
+        self.transitions = list(transitions)
+        """ List of transitions. The edges refer to the transitions by their index in this list
+        """
+        self.visited = MemoryVisitedSet() if visited is None else visited
+        """ :class:`VisitedSet <petrinet_simulator.VisitedSet>` of the markings
+        """
+        self.markings = self.visited
+        """ Sequence of the visited markings: ``markings[state]`` is the marking of ``state``
+        """
+        self.states = self.visited
+        """ Visited markings: ``states.get(marking)`` is the state of ``marking``
+        """
+        self.parents, self.successors = self.visited.graphStores()
+        """ ``parents[state]`` is the state from which ``state`` has been discovered, -1 for the initial state.
+            ``successors[state]`` is the list of the tuples (transition, next state) of the firings from ``state``
+        """
+        self.deadlocks = []
+        """ List of the states where no transition is enabled
+        """
+        self.complete = True
+        """ False if the exploration has been stopped by the state limit: some successors are then missing
+        """
+        self.reduced = False
+        """ True if only the transitions of a stubborn set have been fired from each state, see
+            :class:`StubbornSets <petrinet_simulator.StubbornSets>`: the graph contains every reachable deadlock, but
+            not every reachable marking
+        """
+        self.bounded = None
+        """ True if the petriNet is bounded, i.e. the exploration is complete and not reduced. False if a marking
+            strictly covers one of the markings before it on its path from the initial state: the firings between them
+            can be repeated forever and the petriNet is unbounded. None if the exploration has been stopped before
+            knowing it. It is computed at the end of the exploration by
+            :func:`computeBounded <petrinet_simulator.ReachabilityGraph.computeBounded>`
+        """
+        self.bounds = [0] * len(self.places)
+        """ Maximal number of tokens on each place among the visited markings. For a reduced graph, the bounds are only
+            lower bounds
+        """
+
+    def __len__(self):
+        return len(self.markings)
+
+    def __repr__(self):
+        return '<ReachabilityGraph : %s state(s)>' % len(self)
+
+    def addState(self, marking, parent=-1):
+        """ Add a new state to the graph
+
+            :param marking: *
+            :type marking: tuple
+            :param parent: state from which ``marking`` has been discovered
+            :type parent: int
+
+            :returns: The new state
+        """
+        return self.addStates([marking], [parent])
+
+    def addStates(self, markings, parents):
+        """ Add new states to the graph, the markings being added at once to the
+            :attr:`visited <petrinet_simulator.ReachabilityGraph.visited>` set
+
+            :param markings: *
+            :type markings: list
+            :param parents: states from which the markings have been discovered
+            :type parents: list
+
+            :returns: The first new state
+        """
+        first = self.visited.extend(markings)
+        self.parents.extend(parents)
+        self.successors.addStates(len(markings))
+        bounds = self.bounds
+        for marking in markings:
+            for p, nb in enumerate(marking):
+                if nb > bounds[p]:
+                    bounds[p] = nb
+        return first
+
+    def computeBounded(self):
+        """ Compute :attr:`bounded <petrinet_simulator.ReachabilityGraph.bounded>` once the exploration is over. A
+            complete and not reduced graph is finite, so the petriNet is bounded. Otherwise each marking is compared
+            with the minimal markings of its path only, as in :func:`cover <petrinet_simulator.Reachability.cover>`: a
+            marking strictly covering a marking of its path covers one of them. The minimal markings are sorted by
+            number of tokens, and a marking is only compared with the ones having less tokens.
+
+            Each marking is read once. When the states have been numbered breadth first, the parents of the states
+            increase: the states are read in their order, and only the minimal markings of the states which can still
+            be parents are kept. Otherwise the tree of the parents is walked depth first.
+
+            :returns: :attr:`bounded <petrinet_simulator.ReachabilityGraph.bounded>`
+        """
+        self.bounded = True if self.complete and not self.reduced else None
+        if self.bounded:
+            return self.bounded
+
+        if all(parent <= next_parent for parent, next_parent in izip(self.parents, islice(self.parents, 1, None))):
+            paths, oldest = {-1: ()}, -1
+            for state, (marking, parent) in enumerate(izip(self.markings, self.parents)):
+                # the states before parent have no child anymore
+                while oldest < parent:
+                    del paths[oldest]
+                    oldest += 1
+                paths[state] = _minimalPath(marking, paths[parent])
+                if paths[state] is None:
+                    self.bounded = False
+                    break
+            return self.bounded
+
+        children = [[] for i in range(len(self))]
+        for state, parent in enumerate(self.parents):
+            if parent >= 0:
+                children[parent].append(state)
+        stack = [(0, ())]
+        while stack:
+            state, minimal = stack.pop()
+            minimal = _minimalPath(self.markings[state], minimal)
+            if minimal is None:
+                self.bounded = False
+                break
+            stack.extend((child, minimal) for child in children[state])
+        return self.bounded
+
+    def path(self, state):
+        """ :returns: the list of transitions to fire from the initial state to reach ``state``
+        """
+        path = []
+        while self.parents[state] >= 0:
+            parent = self.parents[state]
+            for t, next_state in self.successors[parent]:
+                if next_state == state:
+                    path.append(self.transitions[t])
+                    break
+            state = parent
+        path.reverse()
+        return path
+
+    def edgeCount(self):
+        """ :returns: the number of edges of the graph
+        """
+        return self.successors.edgeCount()
+
+    def statistics(self):
+        """ :returns: A dictionnary with the keys:
+
+                * ``'states'``: number of states
+                * ``'edges'``: number of edges
+                * ``'deadlocks'``: number of deadlock states
+                * ``'complete'``: see :attr:`complete <petrinet_simulator.ReachabilityGraph.complete>`
+                * ``'bounded'``: see :attr:`bounded <petrinet_simulator.ReachabilityGraph.bounded>`
+                * ``'bounds'``: dictionnary :class:`Place <petrinet_simulator.Place>`: maximal number of tokens
+        """
+        return {
+            'states': len(self),
+            'edges': self.edgeCount(),
+            'deadlocks': len(self.deadlocks),
+            'complete': self.complete,
+            'bounded': self.bounded,
+            'bounds': dict(zip(self.places, self.bounds))
+        }
+
+
+def _minimalPath(marking, minimal):
+    # minimal markings of a path ending with marking, given the ones of the path before it as sorted tuples (number of
+    # tokens, marking). None if marking covers one of them: the markings of a graph are distinct, so marking covers
+    # strictly a marking with less tokens
+    total = sum(marking)
+    lower, upper = bisect_left(minimal, (total,)), bisect_left(minimal, (total + 1,))
+    for _, other in minimal[:lower]:
+        if _covers(marking, other):
+            return None
+    return minimal[:upper] + ((total, marking),) + \
+        tuple(entry for entry in minimal[upper:] if not _covers(entry[1], marking))
+
+
+def firingRules(petriNet):
+    """ Build the sparse firing rules of ``petriNet``
+
+        :returns: Two lists indexed by the transitions: the tuples (place, number of tokens needed) and the tuples
+                  (place, variation of the number of tokens) of each transition
+    """
+    pre = [tuple(sorted(dct.iteritems())) for dct in petriNet.upplaces]
+    delta = []
+    for t, dct in enumerate(petriNet.downplaces):
+        variation = dict(dct)
+        for p, nb in pre[t]:
+            variation[p] = variation.get(p, 0) - nb
+        delta.append(tuple(sorted((p, nb) for p, nb in variation.iteritems() if nb != 0)))
+    return pre, delta
+
+
+class StubbornSets(object):
+    """ Stubborn sets of the markings of a petriNet, for the partial order reduction of the reachability graph.
+
+        A stubborn set of a marking is a set of transitions such that:
+
+            * for each enabled transition of the set, the transitions in structural conflict with it (see
+              :func:`isInStructuralConflict <petrinet_simulator.PetriNet.isInStructuralConflict>`) belong to the set:
+              the transitions outside of the set can't disable it
+            * for each disabled transition of the set, there is a place missing tokens for it whose input transitions,
+              the ones putting tokens on it, belong to the set: the transitions outside of the set can't enable it
+            * at least one transition of the set is enabled
+
+        Firing only the enabled transitions of a stubborn set from each marking preserves every reachable deadlock: the
+        firings of the independent transitions are not interleaved anymore.
+
+        :param petriNet: *
+        :type petriNet: :class:`PetriNet <petrinet_simulator.PetriNet>`
+    """
+
+    def __init__(self, petriNet):
+        self.pre = firingRules(petriNet)[0]
+        """ Tuples (place, number of tokens needed) of each transition, see
+            :func:`firingRules <petrinet_simulator.Reachability.firingRules>`
+        """
+        self.conflicts = [sorted(set(t_ for p in upplaces for t_ in petriNet.inputs[p]))
+                          for upplaces in petriNet.upplaces]
+        """ ``conflicts[t]`` is the sorted list of the transitions in structural conflict with ``t``, i.e. sharing an
+            upplace with it
+        """
+        self.producers = [sorted(t for t, nb in outputs.iteritems() if nb > petriNet.inputs[p].get(t, 0))
+                          for p, outputs in enumerate(petriNet.outputs)]
+        """ ``producers[p]`` is the sorted list of the transitions increasing the number of tokens on ``p``
+        """
+
+    def reduce(self, marking, enabled):
+        """ Compute a stubborn set of ``marking`` from each enabled transition, and keep the one with the least enabled
+            transitions
+
+            :param marking: *
+            :type marking: tuple
+            :param enabled: sorted list of the enabled transitions at ``marking``
+            :type enabled: list
+
+            :returns: the sorted list of the enabled transitions of the stubborn set
+        """
+        enabled_set = set(enabled)
+        best = enabled
+        for seed in enabled:
+            stubborn, stack, count = {seed}, [seed], 0
+            while stack:
+                t = stack.pop()
+                if t in enabled_set:
+                    count += 1
+                    if count >= len(best):
+                        break
+                    transitions = self.conflicts[t]
+                else:
+                    # a place missing tokens: only its producers can enable t
+                    for p, nb in self.pre[t]:
+                        if marking[p] < nb:
+                            transitions = self.producers[p]
+                            break
+                for t_ in transitions:
+                    if t_ not in stubborn:
+                        stubborn.add(t_)
+                        stack.append(t_)
+            else:
+                best = [t for t in enabled if t in stubborn]
+                if len(best) == 1:
+                    break
+        return best
+
+
+def _fired(marking, pre, stubborn, deadlocks, state):
+    # transitions to fire from marking: the enabled ones, or the enabled ones of a stubborn set
+    enabled = []
+    for t, rule in enumerate(pre):
+        for p, nb in rule:
+            if marking[p] < nb:
+                break
+        else:
+            enabled.append(t)
+    if not enabled:
+        deadlocks.append(state)
+    elif stubborn is not None and len(enabled) > 1:
+        return stubborn.reduce(marking, enabled)
+    return enabled
+
+
+def explore(petriNet, marking=None, order='bfs', limit=None, visited=None, reduced=False):
+    """ Build the reachability graph of ``petriNet``, see
+        :func:`PetriNet.reachabilityGraph <petrinet_simulator.PetriNet.reachabilityGraph>`
+
+        :returns: An object :class:`ReachabilityGraph <petrinet_simulator.ReachabilityGraph>`
+    """
+    if order not in ('bfs', 'dfs'):
+        raise ValueError("order 'bfs' or 'dfs' expected, got %s instead" % order)
+    if visited is not None and visited.batched and order != 'bfs':
+        raise ValueError("order 'bfs' expected for a batched visited set, got %s instead" % order)
+    marking = tuple(petriNet.token if marking is None else marking)
+    if len(marking) != len(petriNet.places):
+        raise ValueError('marking of %s place(s) expected, got %s instead' % (len(petriNet.places), len(marking)))
+
+    pre, delta = firingRules(petriNet)
+    stubborn = StubbornSets(petriNet) if reduced else None
+    graph = ReachabilityGraph(petriNet.places, petriNet.transitions, visited=visited)
+    graph.reduced = reduced
+    graph.addState(marking)
+    if graph.visited.batched:
+        _exploreLevels(graph, pre, delta, limit, stubborn)
+    else:
+        _exploreStates(graph, pre, delta, order, limit, stubborn)
+
+    graph.computeBounded()
+    return graph
+
+
+def _exploreStates(graph, pre, delta, order, limit, stubborn):
+    # the successors of each state are looked up one by one
+    states, markings = graph.states, graph.markings
+    queue = deque([0])
+    # breadth first: the oldest state is explored first, depth first: the newest one
+    pop = queue.popleft if order == 'bfs' else queue.pop
+    while queue:
+        state = pop()
+        marking = markings[state]
+        successors = []
+        for t in _fired(marking, pre, stubborn, graph.deadlocks, state):
+            new_marking = list(marking)
+            for p, nb in delta[t]:
+                new_marking[p] += nb
+            new_marking = tuple(new_marking)
+
+            new_state = states.get(new_marking)
+            if new_state is None:
+                if limit is not None and len(markings) >= limit:
+                    graph.complete = False
+                    continue
+                new_state = graph.addState(new_marking, state)
+                queue.append(new_state)
+            successors.append((t, new_state))
+        graph.successors.add(state, successors)
+
+
+def _exploreLevels(graph, pre, delta, limit, stubborn):
+    # breadth first exploration, level by level: the successors of a level are looked up at once
+    visited = graph.visited
+    frontier = [0]
+    while frontier:
+        # the frontier is sorted and the transitions are fired in their order, so the successors are found in the
+        # order of the sequential exploration
+        candidates, indices, parents, edges = [], {}, [], []
+        for state in frontier:
+            marking = visited[state]
+            for t in _fired(marking, pre, stubborn, graph.deadlocks, state):
+                new_marking = list(marking)
+                for p, nb in delta[t]:
+                    new_marking[p] += nb
+                new_marking = tuple(new_marking)
+
+                index = indices.get(new_marking)
+                if index is None:
+                    index = indices[new_marking] = len(candidates)
+                    candidates.append(new_marking)
+                    parents.append(state)
+                edges.append((state, t, index))
+        if not candidates:
+            break
+
+        states = visited.find(candidates).tolist()
+        new = [index for index, state in enumerate(states) if state < 0]
+        if limit is not None and len(graph) + len(new) > limit:
+            graph.complete = False
+            new = new[:max(0, limit - len(graph))]
+        first = graph.addStates([candidates[index] for index in new], [parents[index] for index in new])
+        frontier = range(first, first + len(new))
+        for state, index in zip(frontier, new):
+            states[index] = state
+
+        # the edges are ordered by state: the edges of each state are added at once, the ones to the markings beyond
+        # the limit being left out
+        successors, last = [], edges[0][0]
+        for state, t, index in edges:
+            if state != last:
+                graph.successors.add(last, successors)
+                successors, last = [], state
+            if states[index] >= 0:
+                successors.append((t, states[index]))
+        graph.successors.add(last, successors)
+
+
+def _pack(*arrays):
+    # pack integer sequences into bytes: the number of sequences, the length of each one, then the sequences
+    arrays = [np.fromiter(a, np.int64, len(a)) if isinstance(a, list) else a.ravel() for a in arrays]
+    header = np.array([len(arrays)] + [a.size for a in arrays], dtype=np.int64)
+    return np.concatenate([header] + arrays).astype(np.int64).tobytes()
+
+
+def _unpack(data):
+    values = np.frombuffer(data, dtype=np.int64)
+    n = int(values[0])
+    arrays, start = [], n + 1
+    for size in values[1:n + 1]:
+        arrays.append(values[start:start + size])
+        start += size
+    return arrays
+
+
+def _owner(marking, workers):
+    # the low bits of the hash of a tuple of small integers are badly distributed: they are mixed first
+    return ((hash(marking) * 2654435761) >> 16) % workers
+
+
+def _exploreWorker(conn, pre, delta, workers, nbPlaces, stubborn):
+    """ Worker of :func:`exploreParallel <petrinet_simulator.Reachability.exploreParallel>`: it owns the markings
+        whose hash modulo ``workers`` is its number, and expands the ones of the current frontier
+    """
+    visited, frontier, pending = {}, [], []
+    while True:
+        message = conn.recv()
+        if message[0] == 'expand':
+            # the successors are gathered by owner, each marking once. An edge is given by its state, its transition
+            # and the code ``position * workers + owner`` of its successor, position being its index in the batch of
+            # the owner
+            codes, batches = {}, [[] for i in range(workers)]
+            states, transitions_, successors = [], [], []
+            deadlocks = []
+            for state, marking in frontier:
+                for t in _fired(marking, pre, stubborn, deadlocks, state):
+                    new_marking = list(marking)
+                    for p, nb in delta[t]:
+                        new_marking[p] += nb
+                    new_marking = tuple(new_marking)
+
+                    code = codes.get(new_marking)
+                    if code is None:
+                        owner = _owner(new_marking, workers)
+                        code = codes[new_marking] = len(batches[owner]) * workers + owner
+                        batches[owner].append(new_marking)
+                    states.append(state)
+                    transitions_.append(t)
+                    successors.append(code)
+            frontier = []
+            conn.send((deadlocks, _pack(states, transitions_, successors),
+                       [(len(batch), _pack(list(chain.from_iterable(batch)))) for batch in batches]))
+
+        elif message[0] == 'check':
+            # states of the successors this worker owns, the new markings getting the provisional states -1, -2, ...
+            result, new = [], {}
+            for size, data in message[1]:
+                for marking in map(tuple, _unpack(data)[0].reshape(size, nbPlaces).tolist()):
+                    known = visited.get(marking)
+                    if known is None:
+                        known = new.get(marking)
+                        if known is None:
+                            known = new[marking] = -1 - len(pending)
+                            pending.append(marking)
+                    result.append(known)
+            conn.send_bytes(_pack(result, [len(pending)], list(chain.from_iterable(pending))))
+
+        elif message[0] == 'assign':
+            # states of the new markings, negative for the markings beyond the limit
+            for marking, state in zip(pending, _unpack(message[1])[0].tolist()):
+                if state >= 0:
+                    visited[marking] = state
+                    frontier.append((state, marking))
+            pending = []
+
+        elif message[0] == 'seed':
+            visited[message[1]] = 0
+            frontier.append((0, message[1]))
+
+        else:
+            break
+    conn.close()
+
+
+def exploreParallel(petriNet, marking=None, limit=None, workers=None, visited=None, reduced=False):
+    """ Build the reachability graph of ``petriNet`` on several processes, see
+        :func:`PetriNet.reachabilityGraph <petrinet_simulator.PetriNet.reachabilityGraph>`.
+
+        The markings are partitioned by hash between the workers: each worker keeps the visited markings of its
+        partition and expands them. The exploration is breadth first and goes level by level: the successors of a
+        level are sent in binary batches to the workers owning them, which find out the new markings. The new states
+        are then numbered in the order of their first edge (state, transition), which is the order of the sequential
+        exploration: the graph is exactly the one built by :func:`explore <petrinet_simulator.Reachability.explore>`.
+
+        The edges of the graph are gathered by the calling process, which limits the speed up when the graph has many
+        more edges than states. Each worker keeps the visited markings of its partition in memory, so the memory used
+        by a worker is bounded by the size of its partition, not by ``visited``: only a
+        :class:`MemoryVisitedSet <petrinet_simulator.MemoryVisitedSet>` can keep the markings of the graph, a ValueError
+        is raised for the sets kept on the disk.
+
+        :returns: An object :class:`ReachabilityGraph <petrinet_simulator.ReachabilityGraph>`
+    """
+    marking = tuple(petriNet.token if marking is None else marking)
+    nbPlaces = len(petriNet.places)
+    if len(marking) != nbPlaces:
+        raise ValueError('marking of %s place(s) expected, got %s instead' % (nbPlaces, len(marking)))
+    workers = workers or multiprocessing.cpu_count()
+    if visited is not None and not isinstance(visited, MemoryVisitedSet):
+        raise ValueError('the workers keep their markings in memory: %s expected, got a %s instead'
+                         % (MemoryVisitedSet.__name__, visited.__class__.__name__))
+
+    pre, delta = firingRules(petriNet)
+    stubborn = StubbornSets(petriNet) if reduced else None
+    graph = ReachabilityGraph(petriNet.places, petriNet.transitions, visited=visited)
+    graph.reduced = reduced
+    graph.addState(marking)
+
+    conns, processes = [], []
+    for i in range(workers):
+        conn, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_exploreWorker, args=(child, pre, delta, workers, nbPlaces, stubborn))
+        process.daemon = True
+        process.start()
+        conns.append(conn)
+        processes.append(process)
+
+    try:
+        conns[_owner(marking, workers)].send(('seed', marking))
+        while True:
+            for conn in conns:
+                conn.send(('expand',))
+            edges, batches = [], [[] for i in range(workers)]
+            for conn in conns:
+                deadlocks, data, batch = conn.recv()
+                graph.deadlocks.extend(deadlocks)
+                edges.append(_unpack(data))
+                for owner, successors in enumerate(batch):
+                    batches[owner].append(successors)
+            if not any(states.size for states, _, _ in edges):
+                break
+
+            for conn, batch in zip(conns, batches):
+                conn.send(('check', batch))
+            checks = [_unpack(conn.recv_bytes()) for conn in conns]
+
+            # the successors of all the owners are concatenated, the k-th new marking of an owner getting the
+            # provisional state -1 - k - (number of new markings of the previous owners)
+            values, offsets, new_markings = [], np.zeros((workers, workers), dtype=np.int64), []
+            start, nb_new = 0, 0
+            for owner, (result, size, pending) in enumerate(checks):
+                for worker, (batch_size, _) in enumerate(batches[owner]):
+                    offsets[worker, owner] = start
+                    start += batch_size
+                result = result.copy()
+                result[result < 0] -= nb_new
+                nb_new += size[0]
+                values.append(result)
+                new_markings.append(pending.reshape(size[0], nbPlaces))
+            values = np.concatenate(values)
+            new_markings = np.concatenate(new_markings)
+
+            states = np.concatenate([e[0] for e in edges])
+            transitions = np.concatenate([e[1] for e in edges])
+            dst = values[np.concatenate([offsets[worker][e[2] % workers] + e[2] // workers
+                                         for worker, e in enumerate(edges)])]
+            order = np.lexsort((transitions, states))
+            states, transitions, dst = states[order], transitions[order], dst[order]
+
+            # the new markings are numbered in the order of their first edge
+            new = np.flatnonzero(dst < 0)
+            provisional, first = np.unique(-1 - dst[new], return_index=True)
+            order = np.argsort(first)
+            if limit is not None and len(graph) + len(order) > limit:
+                graph.complete = False
+                order = order[:max(0, limit - len(graph))]
+            new_states = np.full(len(provisional), -1, dtype=np.int64)
+            new_states[provisional[order]] = np.arange(len(graph), len(graph) + len(order))
+            graph.addStates(map(tuple, new_markings[provisional[order]].tolist()), states[new[first[order]]].tolist())
+
+            start = 0
+            for conn, (_, size, _) in zip(conns, checks):
+                conn.send(('assign', _pack(new_states[start:start + size[0]])))
+                start += size[0]
+
+            # edges of the level, sorted by (state, transition), without the ones to the states beyond the limit
+            dst[new] = new_states[-1 - dst[new]]
+            kept = dst >= 0
+            states, transitions, dst = states[kept].tolist(), transitions[kept].tolist(), dst[kept].tolist()
+            bounds = (np.flatnonzero(np.diff(states)) + 1).tolist()
+            for start, end in zip([0] + bounds, bounds + [len(states)]) if states else []:
+                graph.successors.add(states[start], zip(transitions[start:end], dst[start:end]))
+    finally:
+        for conn in conns:
+            conn.send(('stop',))
+        for process in processes:
+            process.join()
+
+    graph.deadlocks.sort()
+    graph.computeBounded()
+    return graph
+
+
+OMEGA = float('inf')
+""" Number of tokens of an unbounded place in the markings of a
+    :class:`CoverabilityGraph <petrinet_simulator.CoverabilityGraph>`: more tokens than any integer, so that
+    ``OMEGA + nb == OMEGA - nb == OMEGA`` and ``OMEGA >= nb`` for every integer ``nb``
+"""
+
+
+class CoverabilityGraph(object):
+    """ This class represents the coverability graph of a :class:`PetriNet <petrinet_simulator.PetriNet>`, built by the
+        method :func:`PetriNet.coverabilityGraph <petrinet_simulator.PetriNet.coverabilityGraph>`.
+
+        It is the Karp-Miller tree whose nodes with the same marking are merged. A state is an ω-marking: the tuple of
+        the number of tokens on each place, :data:`OMEGA <petrinet_simulator.Reachability.OMEGA>` for the places whose
+        number of tokens can grow without limit. Every reachable marking is covered by a state of the graph, and the
+        graph is always finite: unlike :func:`reachabilityGraph <petrinet_simulator.PetriNet.reachabilityGraph>`, the
+        exploration terminates on unbounded petriNets.
+    """
+
+    def __init__(self, places, transitions):
+        self.places = list(places)
+        """ List of places, in the order of the markings
+        """
+        self.transitions = list(transitions)
+        """ List of transitions. The edges refer to the transitions by their index in this list
+        """
+        self.markings = []
+        """ List of the ω-markings: ``markings[state]`` is the ω-marking of ``state``
+        """
+        self.states = {}
+        """ Dictionnary ω-marking: state
+        """
+        self.successors = []
+        """ ``successors[state]`` is the list of the tuples (transition, next state) of the firings from ``state``
+        """
+        self.parents = []
+        """ ``parents[state]`` is the state from which ``state`` has been discovered, -1 for the initial state
+        """
+        self.complete = True
+        """ False if the exploration has been stopped by the state limit: the bounds are then only lower bounds
+        """
+        self.bounds = [0] * len(self.places)
+        """ Maximal number of tokens on each place, :data:`OMEGA <petrinet_simulator.Reachability.OMEGA>` for the
+            unbounded places
+        """
+
+    def __len__(self):
+        return len(self.markings)
+
+    def __repr__(self):
+        return '<CoverabilityGraph : %s state(s)>' % len(self)
+
+    def addState(self, marking, parent=-1):
+        """ Add a new state to the graph
+
+            :param marking: *
+            :type marking: tuple
+            :param parent: state from which ``marking`` has been discovered
+            :type parent: int
+
+            :returns: The new state
+        """
+        state = self.states[marking] = len(self.markings)
+        self.markings.append(marking)
+        self.successors.append([])
+        self.parents.append(parent)
+        for p, nb in enumerate(marking):
+            if nb > self.bounds[p]:
+                self.bounds[p] = nb
+        return state
+
+    def path(self, state):
+        """ :returns: the list of transitions to fire from the initial state to reach ``state``
+        """
+        path = []
+        while self.parents[state] >= 0:
+            parent = self.parents[state]
+            for t, next_state in self.successors[parent]:
+                if next_state == state:
+                    path.append(self.transitions[t])
+                    break
+            state = parent
+        path.reverse()
+        return path
+
+    def edgeCount(self):
+        """ :returns: the number of edges of the graph
+        """
+        return sum(len(successors) for successors in self.successors)
+
+    def isBounded(self):
+        """ :returns: True if no place is unbounded. None if the exploration has been stopped before knowing it
+        """
+        if OMEGA in self.bounds:
+            return False
+        return True if self.complete else None
+
+    def unboundedPlaces(self):
+        """ :returns: the list of the places whose number of tokens can grow without limit
+        """
+        return [place for place, nb in zip(self.places, self.bounds) if nb == OMEGA]
+
+    def statistics(self):
+        """ :returns: A dictionnary with the keys:
+
+                * ``'states'``: number of states
+                * ``'edges'``: number of edges
+                * ``'complete'``: see :attr:`complete <petrinet_simulator.CoverabilityGraph.complete>`
+                * ``'bounded'``: see :func:`isBounded <petrinet_simulator.CoverabilityGraph.isBounded>`
+                * ``'bounds'``: dictionnary :class:`Place <petrinet_simulator.Place>`: maximal number of tokens, None
+                                for the unbounded places
+        """
+        return {
+            'states': len(self),
+            'edges': self.edgeCount(),
+            'complete': self.complete,
+            'bounded': self.isBounded(),
+            'bounds': {place: None if nb == OMEGA else nb for place, nb in zip(self.places, self.bounds)}
+        }
+
+
+def _covers(marking, other):
+    # True if marking >= other on every place
+    for nb, nb_ in zip(marking, other):
+        if nb < nb_:
+            return False
+    return True
+
+
+def _accelerate(marking, minimal):
+    # Karp-Miller acceleration: the places where marking strictly covers a marking of its path get OMEGA. The new
+    # OMEGAs may make marking cover other markings of the path, hence the loop
+    accelerated = True
+    while accelerated:
+        accelerated = False
+        for other in minimal:
+            if marking != other and _covers(marking, other):
+                new_marking = tuple(OMEGA if nb > nb_ else nb for nb, nb_ in zip(marking, other))
+                if new_marking != marking:
+                    marking, accelerated = new_marking, True
+    return marking
+
+
+def cover(petriNet, marking=None, limit=None):
+    """ Build the coverability graph of ``petriNet``, see
+        :func:`PetriNet.coverabilityGraph <petrinet_simulator.PetriNet.coverabilityGraph>`.
+
+        The exploration is depth first. Instead of walking the whole path from the initial state for each new marking,
+        the acceleration only looks at a dominance index of the path: its minimal markings. If a marking covers an
+        other marking of the path, the places it strictly covers are the ones of a minimal marking below it, so the
+        other markings can't add OMEGAs. The index of a state is the one of its parent, without the markings covering
+        the new one, plus the new one if it is minimal: it is an antichain and stays small.
+
+        :returns: An object :class:`CoverabilityGraph <petrinet_simulator.CoverabilityGraph>`
+    """
+    marking = tuple(petriNet.token if marking is None else marking)
+    if len(marking) != len(petriNet.places):
+        raise ValueError('marking of %s place(s) expected, got %s instead' % (len(petriNet.places), len(marking)))
+
+    pre, delta = firingRules(petriNet)
+    graph = CoverabilityGraph(petriNet.places, petriNet.transitions)
+    states, markings = graph.states, graph.markings
+    graph.addState(marking)
+    stack = [(0, (marking,))]
+    while stack:
+        state, minimal = stack.pop()
+        marking = markings[state]
+        successors = graph.successors[state]
+        for t, rule in enumerate(pre):
+            for p, nb in rule:
+                if marking[p] < nb:
+                    break
+            else:
+                new_marking = list(marking)
+                for p, nb in delta[t]:
+                    new_marking[p] += nb
+                new_marking = _accelerate(tuple(new_marking), minimal)
+
+                new_state = states.get(new_marking)
+                if new_state is None:
+                    if limit is not None and len(markings) >= limit:
+                        graph.complete = False
+                        continue
+                    new_state = graph.addState(new_marking, state)
+                    if any(_covers(new_marking, other) for other in minimal):
+                        stack.append((new_state, minimal))
+                    else:
+                        stack.append((new_state, tuple(other for other in minimal if not _covers(other, new_marking))
+                                      + (new_marking,)))
+                successors.append((t, new_state))
+    return graph
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:40:21 2026
+
+@author: Mickael Grima
+"""
+
+from array import array
+from math import isnan
+
+
+class Replay(object):
+    """ This class moves a petriNet forward and backward along its simulation. It saves the history of the simulation:
+        the index and the date of each fired transition, and every ``interval`` firings a full
+        :class:`Snapshot <petrinet_simulator.Snapshot>` of the petriNet, its checkpoint.
+
+        To go back to a past step, the last checkpoint before it is restored and the saved firings are fired again
+        until the step: a seek costs at most ``interval`` firings, whatever the length of the simulation. The
+        simulation is deterministic, so the firings after a seek are the saved ones. New firings are only computed
+        after the last saved one.
+
+        It is used by :func:`next <petrinet_simulator.PetriNet.next>`,
+        :func:`previous <petrinet_simulator.PetriNet.previous>` and :func:`seek <petrinet_simulator.PetriNet.seek>`.
+    """
+
+    def __init__(self, petriNet, interval=100):
+        """ :param petriNet: *
+            :type petriNet: :class:`PetriNet <petrinet_simulator.PetriNet>`
+
+            * options:
+
+                * ``interval = 100``: number of firings between two checkpoints
+        """
+        if interval <= 0:
+            raise ValueError('positive interval expected, got %s instead' % interval)
+
+        self.petriNet = petriNet
+        """ The simulated petriNet
+        """
+        self.interval = interval
+        """ Number of firings between two checkpoints
+        """
+        self.step = 0
+        """ Number of firings done since the creation of the replay
+        """
+        self.transitions = array('l')
+        """ Index of the transition fired at each step
+        """
+        self.clocks = array('d')
+        """ Date of each firing, nan if the petriNet isn't timed
+        """
+        self.checkpoints = [petriNet.snapshot()]
+        """ ``checkpoints[i]`` is the snapshot of the petriNet after ``i * interval`` firings
+        """
+
+        # enabled transitions while the saved firings are fired again, generator of the new firings
+        self.__ets, self.__simulation = None, None
+
+    def __len__(self):
+        return len(self.transitions)
+
+    def next(self):
+        """ Fire the next transition: the saved one if the step has already been simulated, otherwise the one
+            computed by :func:`simulate_iter <petrinet_simulator.PetriNet.simulate_iter>`
+
+            :returns: The :class:`FiringEvent <petrinet_simulator.FiringEvent>` of the firing, None if no transition
+                      is enabled anymore
+        """
+        if self.step < len(self.transitions):
+            if self.__ets is None:
+                self.__ets = self.petriNet.enabledTransitionsSet()
+            clock = self.clocks[self.step]
+            event = self.petriNet._replayFiring(self.step, self.petriNet.transitions[self.transitions[self.step]],
+                                                self.__ets, None if isnan(clock) else clock)
+        else:
+            self.__ets = None
+            if self.__simulation is None:
+                self.__simulation = self.petriNet.simulate_iter()
+            event = next(self.__simulation, None)
+            if event is None:
+                return None
+            # the generator counts its own firings
+            event = event._replace(step=self.step)
+            self.transitions.append(event.transition)
+            self.clocks.append(float('nan') if event.clock is None else event.clock)
+
+        self.step += 1
+        if self.step % self.interval == 0 and self.step // self.interval == len(self.checkpoints):
+            self.checkpoints.append(self.petriNet.snapshot())
+        return event
+
+    def previous(self):
+        """ Go back to the previous step
+
+            :returns: False if no transition has been fired yet, otherwise True
+        """
+        if self.step == 0:
+            return False
+        self.seek(self.step - 1)
+        return True
+
+    def seek(self, step):
+        """ Put the petriNet in its state after ``step`` firings. The steps which haven't been simulated yet are
+            simulated
+
+            :param step: *
+            :type step: int
+
+            :returns: The reached step, lower than ``step`` if no transition is enabled anymore before
+        """
+        if step < 0:
+            raise ValueError('positive step expected, got %s instead' % step)
+
+        # restore the last checkpoint before step, unless the petriNet is already between them
+        checkpoint = min(step // self.interval, len(self.checkpoints) - 1)
+        if step < self.step or self.step < checkpoint * self.interval:
+            self.petriNet.restore(self.checkpoints[checkpoint])
+            self.step = checkpoint * self.interval
+            self.__ets, self.__simulation = None, None
+
+        while self.step < step:
+            if self.next() is None:
+                break
+        return self.step
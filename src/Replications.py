@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:41:05 2026
+
+@author: Mickael Grima
+"""
+
+import sys
+import math
+import random
+import multiprocessing
+from TimePetrinet import TimePetriNet
+from TimePlace import TimePlace
+from TimeTransition import TimeTransition
+from TimeToken import TimeToken
+
+
+class ReplicationStatistics(object):
+    """ This class aggregates the results of independent runs of a
+        :class:`TimePetriNet <petrinet_simulator.TimePetriNet>`: the completion time and the number of firings of each
+        transition. Only running sums are kept, so the memory doesn't grow with the number of runs.
+
+        Two objects can be merged with :func:`merge <petrinet_simulator.ReplicationStatistics.merge>`: the workers
+        of :func:`run_replications <petrinet_simulator.run_replications>` aggregate their own runs and the partial
+        results are merged afterwards.
+    """
+
+    def __init__(self, transitions=()):
+        self.transitions = list(transitions)
+        """ List of transitions. The index of a transition is its index in
+            :attr:`firings <petrinet_simulator.ReplicationStatistics.firings>`
+        """
+        self.runs = 0
+        """ Number of aggregated runs
+        """
+        self.mean = 0.0
+        """ Mean of the completion times
+        """
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.firings = [0] * len(self.transitions)
+        """ Total number of firings of each transition over the runs
+        """
+        # sum of the squared deviations to the mean (Welford)
+        self.m2 = 0.0
+
+    def __repr__(self):
+        return '<ReplicationStatistics : %s run(s)>' % self.runs
+
+    def add(self, completionTime, firings):
+        """ Add the result of one run
+
+            :param completionTime: clock at the end of the run
+            :type completionTime: float
+            :param firings: number of firings of each transition during the run
+            :type firings: list
+        """
+        self.runs += 1
+        delta = completionTime - self.mean
+        self.mean += delta / self.runs
+        self.m2 += delta * (completionTime - self.mean)
+        self.min = min(self.min, completionTime)
+        self.max = max(self.max, completionTime)
+        for i, nb in enumerate(firings):
+            self.firings[i] += nb
+
+    def merge(self, other):
+        """ Add the runs aggregated in ``other``
+
+            :param other: statistics over the same transitions
+            :type other: :class:`ReplicationStatistics <petrinet_simulator.ReplicationStatistics>`
+        """
+        if len(other.firings) != len(self.firings):
+            raise ValueError('statistics over %s transition(s) expected, got %s instead'
+                             % (len(self.firings), len(other.firings)))
+        if other.runs == 0:
+            return
+        runs = self.runs + other.runs
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.runs * other.runs / runs
+        self.mean += delta * other.runs / runs
+        self.runs = runs
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for i, nb in enumerate(other.firings):
+            self.firings[i] += nb
+
+    def variance(self):
+        """ :returns: the variance of the completion times
+        """
+        return self.m2 / self.runs if self.runs else 0.0
+
+    def std(self):
+        """ :returns: the standard deviation of the completion times
+        """
+        return math.sqrt(self.variance())
+
+    def statistics(self):
+        """ :returns: A dictionnary with the keys:
+
+                * ``'runs'``: number of runs
+                * ``'completionTime'``: dictionnary ``'mean'``, ``'std'``, ``'min'`` and ``'max'``
+                  of the completion times
+                * ``'firings'``: dictionnary :class:`Transition <petrinet_simulator.Transition>`: mean number of firings
+        """
+        return {
+            'runs': self.runs,
+            'completionTime': {
+                'mean': self.mean,
+                'std': self.std(),
+                'min': self.min,
+                'max': self.max
+            },
+            'firings': {t: float(nb) / self.runs if self.runs else 0.0 for t, nb in zip(self.transitions, self.firings)}
+        }
+
+
+def describe(petriNet):
+    """ Build a compact description of ``petriNet`` made only of tuples, strings and numbers. It is pickled much faster
+        than the petriNet itself, whose nodes and tokens reference each other, and the petriNet is rebuilt from it by
+        :func:`build <petrinet_simulator.Replications.build>`.
+
+        The places and transitions are identified by their :attr:`index <petrinet_simulator.Node.index>`
+
+        :param petriNet: *
+        :type petriNet: :class:`TimePetriNet <petrinet_simulator.TimePetriNet>`
+
+        :returns: A tuple
+
+        .. Warning:: The tokens must not have priorities, priorities after fire or fire heritances, and the transitions
+                     must not have token queues after fire: a ValueError is raised otherwise
+    """
+    places, transitions = petriNet.places, petriNet.transitions
+
+    for p in places:
+        for tok in p.token:
+            if tok.priority or tok.priorityAfterFire or tok.fireHeritance:
+                raise ValueError('token %s on place %s has advanced properties' % (tok.name, p.name))
+    for t in transitions:
+        if t.tokenQueueAfterFire:
+            raise ValueError('transition %s has a tokenQueueAfterFire' % t.name)
+
+    return (
+        petriNet.name,
+        petriNet.currentClock,
+        tuple((p.name, getattr(p, 'time', 0.0), getattr(p, 'withoutTime', False), p.withoutPriority, p.tokName,
+               p.exit, tuple((tok.name, tok.show, tok.fire) for tok in p.token)) for p in places),
+        tuple((t.name, getattr(t, 'time', 0.0), getattr(t, 'minimumStartingTime', -sys.maxint - 1), t.show,
+               tuple(tuple(tkns) for tkns in t.tokenQueue)) for t in transitions),
+        tuple((p, t, nb) for p, dct in enumerate(petriNet.inputs) for t, nb in dct.iteritems()),
+        tuple((p, t, nb) for p, dct in enumerate(petriNet.outputs) for t, nb in dct.iteritems())
+    )
+
+
+def build(description):
+    """ Build a new :class:`TimePetriNet <petrinet_simulator.TimePetriNet>` without tokens from ``description``
+
+        :param description: A description given by :func:`describe <petrinet_simulator.Replications.describe>`
+        :type description: tuple
+
+        :returns: the petriNet, the list of its places and the list of its transitions
+    """
+    name, currentClock, places, transitions, inputs, outputs = description
+    petriNet = TimePetriNet(name=name, currentClock=currentClock)
+    places = [TimePlace(name=p[0], time=p[1], withoutTime=p[2], withoutPriority=p[3], tokName=p[4], exit=p[5])
+              for p in places]
+    transitions = [TimeTransition(name=t[0], time=t[1], minimumStartingTime=t[2], show=t[3]) for t in transitions]
+    for p in places:
+        petriNet.addPlace(p)
+    for t in transitions:
+        petriNet.addTransition(t)
+    for p, t, nb in inputs:
+        petriNet.addInput(places[p], transitions[t], tok=nb)
+    for p, t, nb in outputs:
+        petriNet.addOutput(places[p], transitions[t], tok=nb)
+    return petriNet, places, transitions
+
+
+class _Replicator(object):
+    """ Simulate runs of a petriNet rebuilt once from its description
+    """
+
+    def __init__(self, description, sampler=None, niter=float('nan')):
+        self.description = description
+        self.petriNet, self.places, self.transitions = build(description)
+        self.sampler = sampler
+        self.niter = niter
+
+    def __reset(self, rand):
+        name, currentClock, places, transitions = self.description[:4]
+        for p in self.places:
+            self.petriNet.removeToken(p, *list(p.token))
+        for t, desc in zip(self.transitions, transitions):
+            t.tokenQueue = [list(tkns) for tkns in desc[4]]
+        self.petriNet.currentClock = currentClock
+
+        # the durations are sampled before the tokens get their clocks
+        if self.sampler is not None:
+            self.sampler(self.petriNet, rand)
+
+        for p, desc in zip(self.places, places):
+            self.petriNet.addToken(p, *[TimeToken(name=tok[0], show=tok[1], fire=tok[2]) for tok in desc[6]])
+
+    def run(self, seed):
+        """ Simulate one run whose random generator is seeded with ``seed``
+
+            :returns: the completion time and the number of firings of each transition
+        """
+        self.__reset(random.Random(seed))
+        firings = [0] * len(self.transitions)
+        ets = self.petriNet.enabledTransitionsSet()
+        n = 0
+        while len(ets) != 0 and not n >= self.niter:
+            duration, transition = self.petriNet.oneFireSimulation(ets)
+            if transition is None:
+                break
+            self.petriNet.currentClock += duration
+            firings[transition.index] += 1
+            n += 1
+        return self.petriNet.currentClock, firings
+
+    def runs(self, start, stop, seed):
+        """ :returns: the :class:`ReplicationStatistics <petrinet_simulator.ReplicationStatistics>` of the runs
+                      ``start`` to ``stop - 1``
+        """
+        statistics = ReplicationStatistics(self.transitions)
+        for i in xrange(start, stop):
+            statistics.add(*self.run(seed + i))
+        # the transitions of the worker are replaced by the ones of the caller
+        statistics.transitions = []
+        return statistics
+
+
+# replicator of the current worker process
+_replicator = None
+
+
+def _initWorker(description, sampler, niter):
+    global _replicator
+    _replicator = _Replicator(description, sampler=sampler, niter=niter)
+
+
+def _runChunk(args):
+    return _replicator.runs(*args)
+
+
+def run_replications(net_factory, n, workers=None, seed=0, sampler=None, niter=float('nan'), chunksize=None):
+    """ Simulate ``n`` independent runs of a :class:`TimePetriNet <petrinet_simulator.TimePetriNet>` on several processes
+        and aggregate their completion time and their firings.
+
+        ``net_factory`` is called once. The petriNet is sent to each worker only once, as the compact description given
+        by :func:`describe <petrinet_simulator.Replications.describe>`; the workers rebuild it and reset its tokens
+        before each run. The tasks are chunks of run indices and each worker sends back only the aggregated statistics
+        of its chunk, so the memory doesn't depend on ``n``.
+
+        :param net_factory: callable without argument returning the petriNet to simulate
+        :type net_factory: function
+        :param n: number of runs
+        :type n: int
+
+        * options:
+
+            * ``workers = None``: number of processes. If None, the number of cpus. If 1, the runs are simulated in
+              the current process
+            * ``seed = 0``: the run ``i`` uses a ``random.Random(seed + i)``, whatever the number of workers is
+            * ``sampler = None``: function ``sampler(petriNet, rand)`` called before each run, where ``rand`` is the
+              random generator of the run. It can change the :attr:`time <petrinet_simulator.TimeNode.time>` of the
+              places and transitions of the rebuilt petriNet. It must be picklable, i.e. defined at the top level of a
+              module
+            * ``niter = nan``: If a value is done, each run fires at most ``niter`` transitions
+            * ``chunksize = None``: number of runs per task. If None, the runs are split in about four tasks per worker
+
+        :returns: An object :class:`ReplicationStatistics <petrinet_simulator.ReplicationStatistics>` whose
+                  transitions are the ones of the petriNet given by ``net_factory``
+    """
+    petriNet = net_factory()
+    if not isinstance(petriNet, TimePetriNet):
+        raise TypeError('TimePetriNet expected, got a %s instead' % petriNet.__class__.__name__)
+    description = describe(petriNet)
+
+    workers = workers or multiprocessing.cpu_count()
+    chunksize = chunksize or max(1, int(math.ceil(float(n) / (4 * workers))))
+    chunks = ((start, min(n, start + chunksize), seed) for start in xrange(0, n, chunksize))
+
+    statistics = ReplicationStatistics(petriNet.transitions)
+    if workers == 1:
+        replicator = _Replicator(description, sampler=sampler, niter=niter)
+        for chunk in chunks:
+            statistics.merge(replicator.runs(*chunk))
+        return statistics
+
+    pool = multiprocessing.Pool(workers, initializer=_initWorker, initargs=(description, sampler, niter))
+    try:
+        # imap keeps the order of the chunks: the result doesn't depend on the scheduling
+        for partial in pool.imap(_runChunk, chunks):
+            statistics.merge(partial)
+    finally:
+        pool.close()
+        pool.join()
+    return statistics
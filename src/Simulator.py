@@ -16,6 +16,9 @@ class Simulator(object):
     def previous(self):
         pass
 
+    def seek(self, step):
+        pass
+
     def has_next(self):
         return False
 
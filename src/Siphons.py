@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:03:52 2026
+
+@author: Mickael Grima
+"""
+
+from utils.tools import bits
+
+
+def _shrinkSiphon(index, places, queue):
+    # remove from places the ones of queue having a producer without input place in places. Removing a place may
+    # break the producers of the outputs of its consumers, which are checked again
+    while queue:
+        p = queue.pop()
+        if not places >> p & 1:
+            continue
+        for t in bits(index.producers[p]):
+            if not index.upplaces[t] & places:
+                places &= ~(1 << p)
+                for t_ in bits(index.consumers[p]):
+                    queue.extend(bits(index.downplaces[t_] & places))
+                break
+    return places
+
+
+def _shrinkTrap(index, places, queue):
+    # remove from places the ones of queue having a consumer without output place in places. Removing a place may
+    # break the consumers of the inputs of its producers, which are checked again
+    while queue:
+        p = queue.pop()
+        if not places >> p & 1:
+            continue
+        for t in bits(index.consumers[p]):
+            if not index.downplaces[t] & places:
+                places &= ~(1 << p)
+                for t_ in bits(index.producers[p]):
+                    queue.extend(bits(index.upplaces[t_] & places))
+                break
+    return places
+
+
+def maximalSiphon(index, places):
+    """ Compute the maximal siphon included in the set of places ``places``: the largest set ``S`` such that every
+        transition putting tokens on ``S`` takes tokens from ``S``. Once empty, a siphon stays empty.
+
+        The places having a producer without input place in the set are removed until there is none. Only the places
+        next to a removed one are checked again.
+
+        :param index: *
+        :type index: :class:`StructuralIndex <petrinet_simulator.StructuralIndex>`
+        :param places: bitset of places
+        :type places: int or long
+
+        :returns: A bitset of places, 0 if there is no siphon in ``places``
+    """
+    return _shrinkSiphon(index, places, list(bits(places)))
+
+
+def maximalTrap(index, places):
+    """ Compute the maximal trap included in the set of places ``places``: the largest set ``S`` such that every
+        transition taking tokens from ``S`` puts tokens on ``S``. Once marked, a trap stays marked.
+
+        The places having a consumer without output place in the set are removed until there is none. Only the places
+        next to a removed one are checked again.
+
+        :param index: *
+        :type index: :class:`StructuralIndex <petrinet_simulator.StructuralIndex>`
+        :param places: bitset of places
+        :type places: int or long
+
+        :returns: A bitset of places, 0 if there is no trap in ``places``
+    """
+    return _shrinkTrap(index, places, list(bits(places)))
+
+
+def _minimalSiphon(index, siphon, required):
+    # a siphon included in the non-empty siphon, containing required and minimal among such siphons. The places from
+    # which the first place of required (or of siphon) gets its tokens form a smaller siphon, whose other places are
+    # then removed one by one while a siphon remains. A place which can't be removed from a siphon can't be removed
+    # from the smaller ones either
+    start = required or siphon & -siphon
+    closure, queue = start, list(bits(start))
+    while queue:
+        for t in bits(index.producers[queue.pop()]):
+            new = index.upplaces[t] & siphon & ~closure
+            closure |= new
+            queue.extend(bits(new))
+    siphon = closure
+    for p in bits(siphon & ~start):
+        if siphon >> p & 1:
+            smaller = _shrinkSiphon(index, siphon & ~(1 << p), [q for t in bits(index.consumers[p])
+                                                               for q in bits(index.downplaces[t] & siphon)])
+            if smaller and not start & ~smaller:
+                siphon = smaller
+    return siphon
+
+
+def _isMinimalSiphon(index, siphon):
+    for p in bits(siphon):
+        if maximalSiphon(index, siphon & ~(1 << p)):
+            return False
+    return True
+
+
+def minimalSiphons(index, nbPlaces):
+    """ Enumerate the minimal siphons, i.e. the non-empty siphons without a smaller non-empty siphon in them.
+
+        The siphons are searched in subproblems: the siphons containing a set of required places, and none of a set of
+        forbidden places. A siphon minimal among the ones of the subproblem is found in the maximal siphon without the
+        forbidden places. Every other minimal siphon of the subproblem misses one of its places ``p1, p2, ...``: the
+        subproblem is split into the ones forbidding ``p1``, requiring ``p1`` and forbidding ``p2``, and so on, which
+        don't overlap. The maximal siphon of a subproblem is computed from the one of its parent.
+
+        :param index: *
+        :type index: :class:`StructuralIndex <petrinet_simulator.StructuralIndex>`
+        :param nbPlaces: *
+        :type nbPlaces: int
+
+        :returns: The list of the minimal siphons, as bitsets of places, in the order they are found
+    """
+    siphons = []
+    # subproblems (maximal siphon of the parent, forbidden place, required places)
+    stack = [((1 << nbPlaces) - 1, None, 0)]
+    while stack:
+        siphon, forbidden, required = stack.pop()
+        if forbidden is None:
+            siphon = maximalSiphon(index, siphon)
+        else:
+            siphon = _shrinkSiphon(index, siphon & ~(1 << forbidden),
+                                   [q for t in bits(index.consumers[forbidden])
+                                    for q in bits(index.downplaces[t] & siphon)])
+        if not siphon or required & ~siphon:
+            continue
+        minimal = _minimalSiphon(index, siphon, required)
+        # the siphon is only minimal among the ones containing its first place, or the required places
+        if _isMinimalSiphon(index, minimal):
+            siphons.append(minimal)
+        for p in bits(minimal & ~required):
+            stack.append((siphon, p, required))
+            required |= 1 << p
+    return siphons
+
+
+def isOrdinary(petriNet):
+    """ :returns: True if every input and output of ``petriNet`` carries one token
+    """
+    for dct in petriNet.inputs + petriNet.outputs:
+        for nb in dct.itervalues():
+            if nb != 1:
+                return False
+    return True
+
+
+def isFreeChoice(index):
+    """ Check if the petriNet is (extended) free choice: two transitions sharing an input place have the same input
+        places, so that a choice between them never depends on the marking of other places
+
+        :param index: *
+        :type index: :class:`StructuralIndex <petrinet_simulator.StructuralIndex>`
+
+        :returns: A boolean
+    """
+    for consumers in index.consumers:
+        upplaces = None
+        for t in bits(consumers):
+            if upplaces is None:
+                upplaces = index.upplaces[t]
+            elif index.upplaces[t] != upplaces:
+                return False
+    return True
+
+
+def unmarkedSiphon(index, nbPlaces, marking):
+    """ Look for a minimal siphon without trap marked by ``marking``. If there is none, every siphon contains a marked
+        trap, and can't be emptied: this is the siphon-trap property.
+
+        :param index: *
+        :type index: :class:`StructuralIndex <petrinet_simulator.StructuralIndex>`
+        :param nbPlaces: *
+        :type nbPlaces: int
+        :param marking: number of tokens on each place
+        :type marking: list
+
+        :returns: The first minimal siphon found without marked trap, as a bitset of places. None if there is none
+    """
+    marked = sum(1 << p for p, nb in enumerate(marking) if nb > 0)
+    for siphon in minimalSiphons(index, nbPlaces):
+        if not maximalTrap(index, siphon) & marked:
+            return siphon
+    return None
@@ -14,7 +14,13 @@ class TimeNode(Node):
         It is the class parent of both classes :class:`TimePlace <petrinet_simulator.TimePlace>`
         and :class:`TimeTransition <petrinet_simulator.TimeTransition>`
         It herits from the parent class :class:`Node <petrinet_simulator.Node>`
+
+        .. Note:: TimeNode is combined with :class:`Place <petrinet_simulator.Place>` or
+                  :class:`Transition <petrinet_simulator.Transition>`, which have their own slots: to keep the layouts
+                  compatible, the slot ``time`` is declared by the subclasses
     """
+    __slots__ = ()
+
     def __init__(self, name='', logger=logging, time=0.0):
         super(TimeNode, self).__init__(name=name, logger=logger)
         if(time >= 0.0):
@@ -8,9 +8,9 @@ Created on Wed Apr 01 21:38:37 2015
 import sys
 sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
 
-from Petrinet import PetriNet
-from Place import Place
+from Petrinet import PetriNet, Snapshot, FiringEvent
 from TimeToken import TimeToken
+import heapq
 import logging
 
 
@@ -21,8 +21,10 @@ class TimePetriNet(PetriNet):
     """
     # fields used in this class
     #
-    # tclock -> dictionnary that repertory each clock whom the key is the associated transition
-    # currentClock -> The current time
+    # pclock -> date at which a token has stayed long enough on its place
+    # tclock -> dictionnary of the dates from which each transition counts its time for a token
+    # currentClock -> The current time. The clocks of the tokens are absolute dates: advancing the time modifies
+    #                 no token
     #
     # for places: each token have to stay time on each place. A fire doesn't reinitialize the clock of a place
     # for transitions: if a transition fire, it reinitializes its own clock, but not the others.
@@ -36,19 +38,31 @@ class TimePetriNet(PetriNet):
         self.currentClock = currentClock
         self.startDate = startDate
 
+        # event queue: heap of (firing date, version, transition's index) for the enabled transitions.
+        # An entry is valid only if its version is the current version of the transition: the version is increased
+        # each time the tokens that the transition could fire change, and the transition is scheduled again lazily
+        self.__events = []
+        self.__versions = {}
+        # indices of the transitions with a valid entry in __events
+        self.__scheduled = set()
+        # indices of the transitions to schedule again
+        self.__dirty = set()
+        # date of the firing in progress, None between two firings
+        self.__firingDate = None
+
     def copy(self):
         pn = TimePetriNet(self.name)
         copy = {}
-        for p in self.places.iterkeys():
+        for p in self.places:
             copy.setdefault(p, p.copy())
-            pn.addPlace(copy[p])
+            pn.addPlace(copy[p], self.posPlaces[p.index])
 
-        for t in self.transitions.iterkeys():
+        for t in self.transitions:
             copy.setdefault(t, t.copy())
-            pn.addTransition(copy[t])
+            pn.addTransition(copy[t], self.posTransitions[t.index])
 
         # Make a copy of tokens
-        for p in pn.places.iterkeys():
+        for p in pn.places:
             for tok in p.token:
                 tok.placeClocks = {copy[pl]: cl for pl, cl in tok.placeClocks.iteritems()}
                 tok.transitionClocks = {copy[tr]: cl for tr, cl in tok.transitionClocks.iteritems()}
@@ -77,7 +91,7 @@ class TimePetriNet(PetriNet):
                 }
 
         # Make a copy of transitions
-        for t, c in pn.transitions.iteritems():
+        for t in pn.transitions:
             t.tokenQueueAfterFire = [
                 {
                     tkns: {
@@ -90,14 +104,16 @@ class TimePetriNet(PetriNet):
                 } for dct in t.tokenQueueAfterFire
             ]
 
-        for p, dct in self.inputs.iteritems():
+        for p, dct in enumerate(self.inputs):
             for t, n in dct.iteritems():
-                pn.addInput(copy[p], copy[t], n)
-        for p, dct in self.outputs.iteritems():
+                pn.addInput(pn.places[p], pn.transitions[t], n)
+        for p, dct in enumerate(self.outputs):
             for t, n in dct.iteritems():
-                pn.addOutput(copy[p], copy[t], n)
-        for p, n in self.token.iteritems():
-            pn.token.setdefault(copy[p], n)
+                pn.addOutput(pn.places[p], pn.transitions[t], n)
+
+        # the copied tokens are already on the places
+        pn.token = list(self.token)
+        pn.adapteEnabledTokens(*pn.places)
 
         pn.currentClock = self.currentClock
         pn.startDate = self.startDate
@@ -109,74 +125,137 @@ class TimePetriNet(PetriNet):
     # ---------------------------------------------------------------
 
     def addToken(self, place, *tokens):
-        if not isinstance(place, Place):
-            raise TypeError('Place expected, got a %s instead' % place.__class__.__name__)
-        if self.places.get(place) is None:
-            self.logger.warning("Try to add a token to the inexistant place %s" % place.name)
-
-        else:
-            for token in tokens:
-                try:
-                    place.addToken(token)
-                except:
-                    continue
-
-                if self.inputs.get(place) is not None:
-                    for t in self.inputs[place].iterkeys():
-                        token.addTransitionClock(t, t.getTransitionTime())
-                        token.tclock[t] = token.transitionClocks[t]
-                        token.addMinimumStartingTime(t, t.minimumStartingTime)
-                if self.token.get(place) is None:
-                    self.token.setdefault(place, 1)
-                else:
-                    self.token[place] += 1
-
-    def savePlaces(self):
-        for p in self.places.iterkeys():
-            self.initialState.setdefault(p, [tok.copy() for tok in p.token])
-
-    def setInitialState(self):
-        self.savePlaces()
-        self.saveTransitions()
-        self.initialState.setdefault('initialClock', self.currentClock)
-
-    def reinitialized(self):
-        if len(self.initialState) != 0:
-            for p in self.places.iterkeys():
-                while p.token:
-                    self.removeToken(p, p.token[0])
-                for tok in self.initialState[p]:
-                    self.addToken(p, tok)
-            for t in self.transitions.iterkeys():
-                t.tokenQueue = []
-                t.tokenQueueAfterFire = []
-                if self.initialState.get(t) is not None:
-                    if self.initialState[t].get('tokenQueue'):
-                        t.tokenQueue = self.initialState[t]['tokenQueue']
-                    if self.initialState[t].get('tokenQueueAfterFire'):
-                        t.tokenQueueAfterFire = self.initialState[t]['tokenQueueAfterFire']
-            self.currentClock = self.initialState['initialClock']
-            self.initialState = {}
+        PetriNet.addToken(self, place, *tokens)
+        if not self.hasPlace(place):
+            return
+
+        # the tokens produced by a firing arrive at the date of the firing
+        date = self.currentClock if self.__firingDate is None else self.__firingDate
+        for token in tokens:
+            token.pclock += date
+            for t in self.getTransitionsDown(place):
+                token.addTransitionClock(t, t.getTransitionTime())
+                token.tclock[t] = date
+                token.addMinimumStartingTime(t, t.minimumStartingTime)
+        self.__invalidatePlace(place)
+
+    def removeToken(self, place, *tokens):
+        PetriNet.removeToken(self, place, *tokens)
+        self.__invalidatePlace(place)
+
+    def insertTokenQueue(self, transition, *tokenNames, **options):
+        PetriNet.insertTokenQueue(self, transition, *tokenNames, **options)
+        self.invalidateSchedule(transition)
+
+    def changeFireToken(self, place, token, ets):
+        PetriNet.changeFireToken(self, place, token, ets)
+        self.__invalidatePlace(place)
+
+    def adapteEnabledTokens(self, *places):
+        PetriNet.adapteEnabledTokens(self, *places)
+        for place in places:
+            self.__invalidatePlace(place)
+
+    def snapshot(self, name=None):
+        snapshot = PetriNet.snapshot(self)._replace(currentClock=self.currentClock)
+        if name is not None:
+            self.snapshots[name] = snapshot
+        return snapshot
+
+    def restore(self, snapshot):
+        PetriNet.restore(self, snapshot)
+        if not isinstance(snapshot, Snapshot):
+            snapshot = self.snapshots[snapshot]
+        self.currentClock = snapshot.currentClock
+        self.invalidateSchedule()
 
     # ---------------------------------------------------------------
     # ----------------------  OTHER FUNCTIONS -----------------------
     # ---------------------------------------------------------------
 
-    def __getMinimumFiringTime(self, transition):
-        mx = 0.0
-
-        # for each t we compute the maximum time of the places before
-        if self.upplaces.get(transition) is not None:
-            for p, nb in self.upplaces[transition].iteritems():
-                toks = self.getSortedNextFiredToken(p, transition)
-                delta = toks[-1].minimumStartingTime.get(transition, - sys.maxint - 1) - self.currentClock
-                mx = max(mx, delta, toks[-1].pclock) + toks[-1].tclock[transition]
-
-        return mx
+    def isPlain(self):
+        """ A TimePetriNet is never plain: the tokens carry their clocks
+        """
+        return False
+
+    def __getFiringDate(self, transition):
+        date = - sys.maxint - 1
+
+        # for each t we compute the maximum date of the tokens before
+        for p in self.upplaces[transition.index]:
+            for tok in self.getSortedNextFiredToken(self.places[p], transition):
+                start = max(tok.pclock, tok.tclock[transition],
+                            tok.minimumStartingTime.get(transition, - sys.maxint - 1))
+                date = max(date, start + tok.transitionClocks[transition])
+
+        return date
+
+    def __invalidatePlace(self, place):
+        # without transition down, invalidateSchedule would invalidate every transition
+        transitions = self.getTransitionsDown(place)
+        if transitions:
+            self.invalidateSchedule(*transitions)
+
+    def invalidateSchedule(self, *transitions):
+        """ Compute again the firing dates of the given transitions before the next firing. The dates are computed
+            once and saved in an event queue: it is invalidated automatically when the tokens on the places up change,
+            but it has to be invalidated when the :attr:`time <petrinet_simulator.TimeNode.time>` of a node is
+            modified during a simulation.
+
+            :param transitions: If no transition is given, every transition is invalidated
+            :type transitions: :class:`Transition <petrinet_simulator.Transition>`
+        """
+        for t in transitions or self.transitions:
+            self.__versions[t.index] = self.__versions.get(t.index, 0) + 1
+            self.__scheduled.discard(t.index)
+            self.__dirty.add(t.index)
+
+    def enabledTransitionsSet(self):
+        ets = PetriNet.enabledTransitionsSet(self)
+        self.__scheduleLater(ets, ets)
+        return ets
+
+    def adapteEnabledTransitionsSet(self, ets, *transitions):
+        PetriNet.adapteEnabledTransitionsSet(self, ets, *transitions)
+        self.__scheduleLater(ets, transitions)
+
+    def __scheduleLater(self, ets, transitions):
+        # the enabled transitions without valid entry in the event queue are scheduled before the next firing
+        for t in transitions:
+            if t in ets and t.index not in self.__scheduled:
+                self.__dirty.add(t.index)
+
+    def __schedule(self, ets):
+        # push the firing dates of the enabled transitions to schedule
+        for i in self.__dirty:
+            t = self.transitions[i]
+            if t in ets:
+                heapq.heappush(self.__events, (self.__getFiringDate(t), self.__versions.get(i, 0), i))
+                self.__scheduled.add(i)
+        self.__dirty.clear()
+
+        # rebuild the heap when the invalid entries are the most numerous
+        if len(self.__events) > 2 * len(self.__scheduled) + 16:
+            self.__events = [entry for entry in self.__events if self.__isValid(entry, ets)]
+            heapq.heapify(self.__events)
+
+    def __isValid(self, entry, ets):
+        return entry[1] == self.__versions.get(entry[2], 0) and self.transitions[entry[2]] in ets
+
+    def __popInvalid(self, ets):
+        # remove the invalid entries at the top of the event queue
+        while self.__events and not self.__isValid(self.__events[0], ets):
+            _, version, i = heapq.heappop(self.__events)
+            if version == self.__versions.get(i, 0):
+                # the transition isn't enabled anymore: it is scheduled again if it becomes enabled
+                self.__scheduled.discard(i)
 
     def optimalTimeEts(self, ets, duration=sys.maxint):
         """ Among the transitions in ``est``, compute the transition whose firing time is the minimal one.
 
+            The firing dates of the transitions are kept in a binary heap: only the transitions whose places up
+            changed since the last firing are computed again, and the first transitions are found in ``O(log n)``
+
             :param ets: set of enabled transitions
             :type ets: dict
 
@@ -186,42 +265,39 @@ class TimePetriNet(PetriNet):
 
             :returns: A list of objects :class:`Transition <petrinet_simulator.Transition>`
         """
-        # compute the minimum of time for enabled transitions, and choose the transitions
-        duration_, transitions, maxDuration = sys.maxint, [], {}
+        self.__schedule(ets)
+        self.__popInvalid(ets)
+        if not self.__events:
+            return [], sys.maxint
 
-        for t, c in ets.iteritems():
-            mx = self.__getMinimumFiringTime(t)
-
-            # we save the duration before the firing of transition t
-            maxDuration.setdefault(t, mx)
-
-            # duration before the first firing
-            if duration_ >= mx:
-                duration_ = mx
+        # the dates in the past are fired now
+        date = max(self.__events[0][0], self.currentClock)
+        duration_ = date - self.currentClock
+        if duration_ > duration:
+            return [], duration_
 
         # we collect the transitions that can fire at the same minimal time duration
-        for t, d in maxDuration.iteritems():
-            if d <= duration and d == duration_:
-                transitions.append(t)
-
-        return transitions, duration_
-
-    def __adapteClocks(self, transition, duration):
-        for p in self.places.iterkeys():
-            for tok in p.token:
-                dur = max(0.0, duration - tok.pclock)
-                tok.pclock = max(0.0, tok.pclock - duration)
-
-                for t in (self.inputs.get(p) or {}).iterkeys():
-                    delta = tok.minimumStartingTime.get(t, - sys.maxint - 1) - (self.currentClock + duration)
-                    tok.tclock[t] = max(0.0, tok.tclock[t] - max(0.0, dur - max(0.0, delta)))
-
-        for p in self.upplaces.get(transition, {}).iterkeys():
-            for tok in p.token:
+        entries = []
+        while self.__events and self.__events[0][0] <= date:
+            entry = heapq.heappop(self.__events)
+            if self.__isValid(entry, ets):
+                entries.append(entry)
+            elif entry[1] == self.__versions.get(entry[2], 0):
+                self.__scheduled.discard(entry[2])
+        for entry in entries:
+            heapq.heappush(self.__events, entry)
+
+        return [self.transitions[i] for i in sorted(i for _, _, i in entries)], duration_
+
+    def __adapteClocks(self, transition):
+        # the tokens still waiting for transition are fired after a new period of time: the clocks of the other
+        # tokens are absolute dates, they aren't modified
+        for p in self.upplaces[transition.index]:
+            for tok in self.places[p].token:
                 tok.addTransitionClock(transition, transition.getTransitionTime())
-                tok.tclock[transition] = tok.transitionClocks[transition]
+                tok.tclock[transition] = self.__firingDate
 
-    def __getTokenAfterFire(self, transition, ets, tok_save):
+    def _getTokenAfterFire(self, transition, ets, tok_save):
         tok = TimeToken()
 
         # add a name and first priorities to tok
@@ -231,24 +307,30 @@ class TimePetriNet(PetriNet):
         tok.addClocksProperties(tok_save)
 
         # update advanced properties
-        self.__updateAdvancedProperties(tok, transition, tok_save, ets)
+        self._updateAdvancedProperties(tok, transition, tok_save, ets)
 
         return tok
 
     def __adaptePetriNet(self, transition, duration, ets):
-        fired_tokens = self.__fireToken(transition, ets)
+        self.__firingDate = self.currentClock + duration
+        try:
+            fired_tokens = self._fireToken(transition, ets)
+
+            # We adapte the tokenQueue of targeted transitions and of transition
+            self._updateTokenQueue(transition, fired_tokens)
 
-        # We adapte the tokenQueue of targeted transitions and of transition
-        self.__updateTokenQueue(transition, fired_tokens)
+            # Restart the clock of transition for the tokens still waiting
+            self.__adapteClocks(transition)
 
-        # Adapte every place clocks
-        self.__updateClocks(transition, duration)
+            # create the token after the fire
+            token = self._getTokenAfterFire(transition, ets, fired_tokens)
 
-        # create the token after the fire
-        token = self.__getTokenAfterFire(transition, ets, fired_tokens)
+            # Update the places and ets after the firing
+            produced = self._updateAfterFiring(transition, token, ets)
+        finally:
+            self.__firingDate = None
 
-        # Update the places and ets after the firing
-        self.__updateAfterFiring(transition, token, ets)
+        return fired_tokens, produced
 
     # ---------------------------------------------------------------
     # ----------------------  DYNAMIC FUNCTIONS ---------------------
@@ -271,10 +353,12 @@ class TimePetriNet(PetriNet):
             :param ets: set of enabled transitions
             :type ets: dict
 
+            :returns: The tuple (list of the consumed tokens, list of the produced tokens)
+
             .. Warning:: ``ets`` must contain only enable transitions, otherwise an Error can be raised
         """
         # adapte the places
-        self.__adaptePetriNet(transition, duration, ets)
+        return self.__adaptePetriNet(transition, duration, ets)
 
     def oneFireSimulation(self, ets, duration=sys.maxint):
         """ Compute the next firing transition and execute the firing: the two methods called are
@@ -298,74 +382,103 @@ class TimePetriNet(PetriNet):
         # we return the new token and the duration
         return duration_, transition
 
-    def simulation(self, show=True, step=None, niter=float('nan')):
-        """ Execute the simulation of the PetriNet. It invoques in a loop the method
-            :func:`oneFireSimulation <petrinet_simulator.PetriNet.oneFireSimulation>`
+    def _replayFiring(self, step, transition, ets, clock):
+        consumed, produced = self.fire(transition, ets, clock - self.currentClock)
+        self.currentClock = clock
+        return FiringEvent(step, clock, transition.index, tuple(id(tok) for tok in consumed),
+                           tuple(id(tok) for tok in produced))
+
+    def simulate_iter(self, step=None, niter=float('nan')):
+        """ Generate the firings of the simulation one by one, see
+            :func:`PetriNet.simulate_iter <petrinet_simulator.PetriNet.simulate_iter>`. The
+            :attr:`currentClock <petrinet_simulator.TimePetriNet.currentClock>` is the date of the last firing.
 
             * options:
 
-                * ``show = True``: if True, informations about firing transitions and currentclock are printed
                 * ``step = None``: If a value is given, at each step we increase the currentclock of step,
-                                   and we try to fire a transition. If it's None, we compute the next firing transition
-                                   and then we increase the currentclock of the necessary amont of time
+                                   and we try to fire a transition. The clock of the events is then the end of the step
+                                   of their firing, and the currentClock is set to the end of the last step when no
+                                   transition can fire anymore. ``step`` must be positive
                 * ``niter = nan``: If a value is done, we do only ``niter`` iterations, if nan we iterate until
                                    there are no enabled transitions anymore
+
+            :returns: A generator of :class:`FiringEvent <petrinet_simulator.FiringEvent>`
         """
-        if not isinstance(show, bool):
-            raise TypeError('Boolean expected, got a %s instead' % show.__class__.__name__)
-        if not step and not isinstance(step, int) and not isinstance(step, long) and not isinstance(step, float):
+        if step is not None and not isinstance(step, int) and not isinstance(step, long) \
+                and not isinstance(step, float):
             raise TypeError('Numaric value expected, got a %s instead' % step.__class__.__name__)
+        if step is not None and step <= 0:
+            raise ValueError('step must be positive, got %s instead' % step)
 
-        if show:
-            print 'beginning of the simulation'
-            print 'currentTime : %s' % self.currentClock
-            print ''
-
-        if self.initialState == {}:
+        if self.initialState is None:
             self.setInitialState()
-            ets = self.enabledTransitionsSet()
+        ets = self.enabledTransitionsSet()
 
         n = 0
         if step is None:
             while(len(ets) != 0 and not n >= niter):
-                duration, transition = self.oneFireSimulation(ets)
-
-                n += 1
+                transition, duration = self.computeFiringTransition(ets)
+                consumed, produced = self.fire(transition, ets, duration)
 
                 self.currentClock += duration
                 if self.currentClock < transition.minimumStartingTime:
                     raise ValueError('transition %s fired before his minimum starting time' % transition.name)
 
-                if transition.show and show:
-                    print transition.name + ' fired'
-                    print 'currentTime : %s' % self.currentClock
-                    print ''
+                yield FiringEvent(n, self.currentClock, transition.index, tuple(id(tok) for tok in consumed),
+                                  tuple(id(tok) for tok in produced))
+                n += 1
 
         else:
-            duration = 0.0
+            # the transitions fire at their exact dates, and the time is shown at the end of each step
+            end = self.currentClock
             while(len(ets) != 0 and not n >= niter):
-                b = True
-                while(b):
-                    duration_, transition = self.oneFireSimulation(ets, duration)
-                    n += 1
-
-                    if transition is None:
-                        b = False
-                    else:
-                        duration -= duration_
-                    if transition.show and show:
-                        print transition.name + ' fired'
-                        print 'currentTime : %s' % self.currentClock
-                        print ''
-                    if not ets or n >= niter:
+                transition, duration_ = self.computeFiringTransition(ets, end - self.currentClock)
+                if transition is None:
+                    if duration_ >= sys.maxint:
+                        # no transition has a finite firing date
                         break
+                    end += step
+                    continue
+
+                consumed, produced = self.fire(transition, ets, duration_)
+                self.currentClock += duration_
+                yield FiringEvent(n, end, transition.index, tuple(id(tok) for tok in consumed),
+                                  tuple(id(tok) for tok in produced))
+                n += 1
+            self.currentClock = end
+
+    def simulation(self, show=True, step=None, niter=float('nan'), trace=None):
+        """ Execute the simulation of the PetriNet. It consumes the firings generated by
+            :func:`simulate_iter <petrinet_simulator.TimePetriNet.simulate_iter>`
+
+            * options:
 
-                if not ets or n >= niter:
-                    break
+                * ``show = True``: if True, informations about firing transitions and currentclock are printed
+                * ``step = None``: If a value is given, at each step we increase the currentclock of step,
+                                   and we try to fire a transition. If it's None, we compute the next firing transition
+                                   and then we increase the currentclock of the necessary amont of time
+                * ``niter = nan``: If a value is done, we do only ``niter`` iterations, if nan we iterate until
+                                   there are no enabled transitions anymore
+                * ``trace = None``: A :class:`TraceRecorder <petrinet_simulator.TraceRecorder>` recording every
+                                    firing. It isn't closed at the end of the simulation
+        """
+        if not isinstance(show, bool):
+            raise TypeError('Boolean expected, got a %s instead' % show.__class__.__name__)
+
+        if show:
+            print 'beginning of the simulation'
+            print 'currentTime : %s' % self.currentClock
+            print ''
 
-            self.currentClock += step
-            duration += step
+        for event in self.simulate_iter(step=step, niter=niter):
+            if trace is not None:
+                trace.record(event.step, event.clock, event.transition)
+            transition = self.transitions[event.transition]
+            if transition.show and show:
+                print transition.name + ' fired'
+                print 'currentTime : %s' % event.clock
+                print ''
 
         if show:
             print self.currentClock
-        print 'end of the simulation'
+            print 'end of the simulation'
@@ -18,9 +18,11 @@ class TimePlace(TimeNode, Place):
         It herits from both class :class:`TimeNode <petrinet_simulator.TimeNode>`
         and :class:`Place <petrinet_simulator.Place>`
     """
+    __slots__ = ('time', 'withoutTime')
+
     def __init__(self, name='no name', logger=logging, time=0.0, withoutTime=False, withoutPriority=False, tokName=None,
                  exit=False):
-        TimeNode.__init__(name=name, logger=logger, time=time)
+        TimeNode.__init__(self, name=name, logger=logger, time=time)
         Place.__init__(self, name=name, logger=logger, withoutPriority=withoutPriority, tokName=tokName, exit=exit)
         self.withoutTime = withoutTime
         """ If True, the token arriving on this place have to reinitialize
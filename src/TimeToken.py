@@ -5,81 +5,105 @@ Created on Sat Jul 16 14:54:37 2016
 @author: Mickael Grima
 """
 
-from Token import Token
+from Token import Token, EMPTY
+from Place import Place
+from Transition import Transition
 from utils.tools import pref_func
 import logging
 
 
 class TimeToken(Token):
     """This class represent a token with time. It herits from the parent class :class:`Token <petrinet_simulator.Token>`
+
+    .. Note:: As for :class:`Token <petrinet_simulator.Token>`, the attributes are stored in ``__slots__``.
+              :attr:`placeClocks <petrinet_simulator.TimeToken.placeClocks>`,
+              :attr:`transitionClocks <petrinet_simulator.TimeToken.transitionClocks>` and
+              :attr:`minimumStartingTime <petrinet_simulator.TimeToken.minimumStartingTime>` read as an empty
+              :class:`FrozenDict <petrinet_simulator.Token.FrozenDict>` until a clock is added through an ``add*``
+              method, and are shared copy-on-write between the copies of a token.
+              :attr:`tclock <petrinet_simulator.TimeToken.tclock>` is allocated the first time it is read.
+              A TimeToken without clocks takes 160 bytes on CPython 2.7 (64 bits), instead of about 3.3 kB with
+              an instance dictionnary and seven empty dictionnaries.
     """
+    __slots__ = ('_placeClocks', '_transitionClocks', 'pclock', '_tclock', 'currentClock', '_minimumStartingTime')
+
+    _SHARABLE = dict(Token._SHARABLE, _placeClocks=(8, dict), _transitionClocks=(16, dict),
+                     _minimumStartingTime=(32, dict))
+
     def __init__(self, name='no name', logger=logging, show=True, fire=True):
         Token.__init__(self, name=name, logger=logger, show=show, fire=fire)
-        self.placeClocks = {}
-        """ We save inside a place as key and associated to this place the time that the token will live on this place.
-            We can add a place's clock using the method addPlaceClock()
-        """
-        self.transitionClocks = {}
-        """ We save inside a transition as key and associated to this transition the time that the token will live
-            on this transition. We can add a transition's clock using the method addTransitionClock()
-        """
+        self._placeClocks = None
+        self._transitionClocks = None
         self.pclock = 0.0
-        """ It represents the time that the tokens lived on the current place on the TimedPetriNet during a simulation.
-            It is reinitialized to 0.0 when the token change its current place
-        """
-        self.tclock = {}
-        """ It represents the time that the tokens lived on the current transitions on the TimedPetriNet
-            during a simulation. Only the transition that can fire this token are save inside
+        """ Date at which the token has stayed long enough on its current place. When the token is added to a place,
+            it is the :attr:`placeClocks <petrinet_simulator.TimeToken.placeClocks>` of this place, to whose the
+            :class:`TimePetriNet <petrinet_simulator.TimePetriNet>` adds the date of arrival. The dates are absolute:
+            they don't change when the time goes on
         """
+        self._tclock = None
         self.currentClock = 0.0
         """It represents how much time lived the token in the TimedPetriNet during a simulation
         """
-        self.minimumStartingTime = {}
-        """The token can't be fired by the given transition before the associated time
-        """
-
-    def copy(self):
-        try:
-            # The new token
-            tok = TimeToken(self.name, self.show, self.fire)
+        self._minimumStartingTime = None
 
-            # adapte pclock
-            tok.pclock = self.pclock
-
-            # Adapte currentClock
-            tok.currentClock = self.currentClock
-
-            # Adapte placeClocks
-            for place, clock in self.placeClocks.iteritems():
-                tok.addPlaceClock(place, clock)
+    @property
+    def placeClocks(self):
+        """ We save inside a place as key and associated to this place the time that the token will live on this place.
+            We can add a place's clock using the method addPlaceClock()
+        """
+        return EMPTY if self._placeClocks is None else self._placeClocks
 
-            # Adapte transitionClocks
-            for transition, clock in self.transitionClocks.iteritems():
-                tok.addTransitionClock(transition, clock)
+    @placeClocks.setter
+    def placeClocks(self, placeClocks):
+        self._placeClocks = placeClocks or None
+        self._shared &= ~self._SHARABLE['_placeClocks'][0]
 
-            # adapte tclock
-            for transition, clock in self.tclock.iteritems():
-                tok.tclock.setdefault(transition, clock)
+    @property
+    def transitionClocks(self):
+        """ We save inside a transition as key and associated to this transition the time that the token will live
+            on this transition. We can add a transition's clock using the method addTransitionClock()
+        """
+        return EMPTY if self._transitionClocks is None else self._transitionClocks
+
+    @transitionClocks.setter
+    def transitionClocks(self, transitionClocks):
+        self._transitionClocks = transitionClocks or None
+        self._shared &= ~self._SHARABLE['_transitionClocks'][0]
+
+    @property
+    def tclock(self):
+        """ For each transition that can fire this token, the date from which the transition counts its time
+            for the token: the date of arrival on the current place, or the last date at which the transition fired
+            while the token was waiting on the place. The token can be fired by ``transition`` at the date
+            ``max(pclock, tclock[transition], minimumStartingTime[transition]) + transitionClocks[transition]``
+        """
+        if self._tclock is None:
+            self._tclock = {}
+        return self._tclock
 
-            # Adapte priority
-            for place, attr in self.priority.iteritems():
-                tok.addPriority(place, attr['priority'], attr['pref'])
+    @tclock.setter
+    def tclock(self, tclock):
+        self._tclock = tclock or None
 
-            # adapte priorityAfterFire
-            for transition, dct in self.priorityAfterFire.iteritems():
-                for loc, prt in dct.iteritems():
-                    for pl, attr in prt.iteritems():
-                        tok.addPriorityAfterFire(transition, {pl: attr['priority']}, location=loc, pref=attr['pref'])
+    @property
+    def minimumStartingTime(self):
+        """The token can't be fired by the given transition before the associated time
+        """
+        return EMPTY if self._minimumStartingTime is None else self._minimumStartingTime
 
-            # adapte fireHeritance
-            for transition, attr in self.fireHeritance.iteritems():
-                for place, toks in attr.iteritems():
-                    for tk in toks:
-                        tok.addFireHeritance(tk, place, transition)
+    @minimumStartingTime.setter
+    def minimumStartingTime(self, minimumStartingTime):
+        self._minimumStartingTime = minimumStartingTime or None
+        self._shared &= ~self._SHARABLE['_minimumStartingTime'][0]
 
-            return tok
-        except:
-            return None
+    def copy(self):
+        tok = TimeToken.__new__(TimeToken)
+        self._copyInto(tok)
+        tok.pclock = self.pclock
+        tok.currentClock = self.currentClock
+        # the tclock is modified at each firing: it is never shared
+        tok._tclock = dict(self._tclock) if self._tclock else None
+        return tok
 
     def addPlaceClock(self, place, clock=None):
         """ Add a place Clock to ``place``.
@@ -94,21 +118,15 @@ class TimeToken(Token):
 
         .. Note:: If a place's clock already exists for ``place``, we add ``clock`` only if its value is higher
         """
-        assert place.__class__.__name__ == 'Place'
-
-        if self.placeClocks.get(place) is None:
-            if clock is None:
-                self.placeClocks.setdefault(place, place.getPlaceTime())
-            else:
-                self.placeClocks.setdefault(place, clock)
-        else:
-            if clock is None:
-                t = place.getPlaceTime()
-            if t > self.placeClocks[place]:
-                self.placeClocks[place] = t
-            else:
-                if(clock > self.placeClocks[place]):
-                    self.placeClocks[place] = clock
+        assert isinstance(place, Place)
+
+        if clock is None:
+            clock = place.getPlaceTime()
+        if self.placeClocks.get(place) is None or clock > self.placeClocks[place]:
+            if self._placeClocks is None:
+                self._placeClocks = {}
+            self._unshare('_placeClocks')
+            self._placeClocks[place] = clock
 
     def addTransitionClock(self, transition, clock=None):
         """Add a transition Clock to :attr:`transitionClocks <petrinet_simulator.TimeToken.transitionClocks>`.
@@ -124,21 +142,15 @@ class TimeToken(Token):
         .. Note:: If a transition's clock already exists for ``transition``,
                   we add ``clock`` only if its value is higher
         """
-        assert transition.__class__.__name__ == 'Transition'
-
-        if self.transitionClocks.get(transition) is None:
-            if clock is None:
-                self.transitionClocks.setdefault(transition, transition.getTransitionTime())
-            else:
-                self.transitionClocks.setdefault(transition, clock)
-        else:
-            if clock is None:
-                t = transition.getTransitionTime()
-            if t > self.transitionClocks[transition]:
-                self.transitionClocks[transition] = t
-            else:
-                if clock > self.transitionClocks[transition]:
-                    self.transitionClocks[transition] = clock
+        assert isinstance(transition, Transition)
+
+        if clock is None:
+            clock = transition.getTransitionTime()
+        if self.transitionClocks.get(transition) is None or clock > self.transitionClocks[transition]:
+            if self._transitionClocks is None:
+                self._transitionClocks = {}
+            self._unshare('_transitionClocks')
+            self._transitionClocks[transition] = clock
 
     def addMinimumStartingTime(self, transition, time):
         """ If a time already exists for ``transition`` we replace it by the given time
@@ -151,20 +163,15 @@ class TimeToken(Token):
         .. Note:: If a transition's minimumStartingTime already exists for ``transition``,
                   we add ``time`` only if its value is higher
         """
-        assert transition.__class__.__name__ == 'Transition'
-        if self.minimumStartingTime.get(transition) is None:
-            if time is not None:
-                self.minimumStartingTime.setdefault(transition, time)
-            else:
-                self.minimumStartingTime.setdefault(transition, transition.minimumStartingTime)
-        else:
-            mt = self.minimumStartingTime[transition]
-            if time is not None:
-                if time > mt:
-                    self.minimumStartingTime[transition] = time
-            else:
-                if transition.minimumStartingTime > mt:
-                    self.minimumStartingTime[transition] = transition.minimumStartingTime
+        assert isinstance(transition, Transition)
+        if time is None:
+            time = transition.minimumStartingTime
+        mt = self.minimumStartingTime.get(transition)
+        if mt is None or time > mt:
+            if self._minimumStartingTime is None:
+                self._minimumStartingTime = {}
+            self._unshare('_minimumStartingTime')
+            self._minimumStartingTime[transition] = time
 
     def get_priority_value(self, place, transition, time=0):
         """ Compute a priority value for ``token``. Given two tokens, the one with the biggest priority_value is fired first
@@ -182,8 +189,8 @@ class TimeToken(Token):
     def addClocksProperties(self, tok_save):
         for t in tok_save:
             # for each place we save the longest clock
-            for p, c in t.placeClocks.iteritems():
+            for p, c in (t._placeClocks or {}).iteritems():
                 self.addPlaceClock(p, c)
             # for each place we save the longest clock
-            for tr, c in t.transitionClocks.iteritems():
+            for tr, c in (t._transitionClocks or {}).iteritems():
                 self.addTransitionClock(tr, c)
@@ -20,6 +20,8 @@ class TimeTransition(Transition, TimeNode):
 
         This kind of transition has time's attribute
     """
+    __slots__ = ('time', 'minimumStartingTime')
+
     def __init__(self, name='', logger=logging, time=0.0, minimumStartingTime=-sys.maxint - 1, show=True):
         Transition.__init__(self, name=name, logger=logging, show=show)
         TimeNode.__init__(self, name=name, logger=logging, time=time)
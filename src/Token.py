@@ -9,7 +9,69 @@ from utils.tools import pref_func
 import logging
 
 
-class Token:
+class FrozenDict(dict):
+    """ A dictionnary that can't be modified. :data:`EMPTY <petrinet_simulator.Token.EMPTY>` is returned as the value
+        of an advanced property that has never been set, so that reading it doesn't allocate anything
+    """
+    __slots__ = ()
+
+    def __readOnly(self, *args, **kwargs):
+        raise TypeError('%s object does not support item assignment' % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __readOnly
+
+
+EMPTY = FrozenDict()
+
+
+NO_NAME = frozenset()
+""" The names of a token without name
+"""
+
+# registry of the interned names: a token's name or a frozenset of words --> the unique equal frozenset
+_NAMES = {'no name': NO_NAME, '': NO_NAME, NO_NAME: NO_NAME}
+
+
+def internNames(names):
+    """ Return the unique frozenset of words equal to ``names``. Two tokens with the same names share the same
+        frozenset, and a name is split only the first time it is seen.
+
+        :param names: A token's name, whose words are separated by '_', or an iterable of words
+        :type names: str
+
+        :returns: A frozenset
+    """
+    if isinstance(names, basestring):
+        interned = _NAMES.get(names)
+        if interned is None:
+            words = frozenset(word for word in names.split('_') if word)
+            interned = _NAMES.setdefault(words, words)
+            _NAMES[names] = interned
+        return interned
+    words = frozenset(names)
+    return _NAMES.setdefault(words, words)
+
+
+def copyPriority(priority):
+    """ :returns: a copy of a dictionnary ``place: {'priority': list of transitions, 'pref': pref}``, whose lists
+                  are copied too
+    """
+    return {pl: {'priority': list(attr['priority']), 'pref': attr['pref']} for pl, attr in priority.iteritems()}
+
+
+def copyPriorityAfterFire(priorityAfterFire):
+    """ :returns: a copy of :attr:`priorityAfterFire <petrinet_simulator.Token.priorityAfterFire>`
+    """
+    return {tr: {loc: copyPriority(prt) for loc, prt in dct.iteritems()} for tr, dct in priorityAfterFire.iteritems()}
+
+
+def copyFireHeritance(fireHeritance):
+    """ :returns: a copy of :attr:`fireHeritance <petrinet_simulator.Token.fireHeritance>`
+    """
+    return {tr: {pl: list(tkns) for pl, tkns in dct.iteritems()} for tr, dct in fireHeritance.iteritems()}
+
+
+class Token(object):
     """This class represent a token.
 
     A token is an object that moves in the Petrinet. It stays on :class:`places <petrinet_simulator.Place>`
@@ -17,38 +79,107 @@ class Token:
 
     The token object contains the necessary informations to know how to fire this token in the petrinet.
     It can have priority transitions or fire heritance to impose an order for the firing token.
+
+    .. Note:: The attributes are stored in ``__slots__``. The dictionnaries of the advanced properties
+              (:attr:`priority <petrinet_simulator.Token.priority>`,
+              :attr:`priorityAfterFire <petrinet_simulator.Token.priorityAfterFire>` and
+              :attr:`fireHeritance <petrinet_simulator.Token.fireHeritance>`) are only allocated when a property is
+              added: until then they read as an empty :class:`FrozenDict <petrinet_simulator.Token.FrozenDict>`
+              and must be modified through the ``add*`` methods. The token doesn't keep a reference to a logger.
+
+              On CPython 2.7 (64 bits) a token without advanced properties takes 112 bytes, instead of about
+              2 kB with an instance dictionnary and three empty dictionnaries.
+
+    .. Note:: :func:`copy <petrinet_simulator.Token.copy>` is copy-on-write: the copy shares the dictionnaries of the
+              advanced properties with the original token, and each token makes its own copy of a dictionnary only
+              when an ``add*`` method modifies it. A firing that puts the same token on many places doesn't copy
+              any property.
+
+    .. Note:: The words of the name are stored in :attr:`names <petrinet_simulator.Token.names>` as an interned
+              frozenset: the firing only does set operations on it, the string is kept for the display.
+    """
+    __slots__ = ('_name', 'names', 'show', 'fire', '_priority', '_priorityAfterFire', '_fireHeritance', '_shared')
+
+    _SHARABLE = {
+        '_priority': (1, copyPriority),
+        '_priorityAfterFire': (2, copyPriorityAfterFire),
+        '_fireHeritance': (4, copyFireHeritance)
+    }
+    """ slot of each structure that can be shared between copies: (bit in ``_shared``, function copying it)
     """
 
     def __init__(self, name='no name', logger=logging, show=True, fire=True):
+        """ ``logger`` is ignored: it is kept for compatibility
+        """
         self.name = name
+        self.show = show
+        self.fire = fire
+        """ If ``True`` the token can be fired, else not
+        """
+        self._priority = None
+        self._priorityAfterFire = None
+        self._fireHeritance = None
+        # bits of the structures shared with other tokens, see _SHARABLE
+        self._shared = 0
+
+    @property
+    def name(self):
         """ If several tokens are firing by the same transition,
             the result is then a new token whose name is an union
             of the previous token's names, separate by a '_'
 
             .. Warning:: A token's name must not have an '_' in its name
         """
-        self.show = show
-        self.fire = fire
-        """ If ``True`` the token can be fired, else not
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+        self.names = internNames(name)
+        """ interned frozenset of the words of :attr:`name <petrinet_simulator.Token.name>`. It is empty for
+            ``'no name'``
         """
-        self.priority = {}
+
+    @property
+    def priority(self):
         """ list of priority transitions on a given place:
             if our token is on this place he can be fired only by one of these transitions,
             with a preference with the first transitions. We can add a priority on a given place
             using the method :func:`addPriority() <petrinet_simulator.Token.addPriority>`
         """
-        self.priorityAfterFire = {}
+        return EMPTY if self._priority is None else self._priority
+
+    @priority.setter
+    def priority(self, priority):
+        self._priority = priority or None
+        self._shared &= ~self._SHARABLE['_priority'][0]
+
+    @property
+    def priorityAfterFire(self):
         """ If our token is fired by the transition, then we add to the given token the given priority.
             This parameter is usefull to add priorities dynamically. We can add a priorityAfterFire on a given place
             using the method :func:`addPriorityAfterFire() <petrinet_simulator.Token.addPriorityAfterFire>`
         """
-        self.fireHeritance = {}
+        return EMPTY if self._priorityAfterFire is None else self._priorityAfterFire
+
+    @priorityAfterFire.setter
+    def priorityAfterFire(self, priorityAfterFire):
+        self._priorityAfterFire = priorityAfterFire or None
+        self._shared &= ~self._SHARABLE['_priorityAfterFire'][0]
+
+    @property
+    def fireHeritance(self):
         """ If our token is fired by a transition, then we search on each place the token whose name contains one
             of the strings in the associated list, i.e one of these strings is in ``token.name.split('_')``.
             Then we change the fire parameter of these tokens in True. We can add a fireHeritance for a given transition
             using the method :func:`addFireHeritance() <petrinet_simulator.Token.addFireHeritance>`
         """
-        self.logger = logger
+        return EMPTY if self._fireHeritance is None else self._fireHeritance
+
+    @fireHeritance.setter
+    def fireHeritance(self, fireHeritance):
+        self._fireHeritance = fireHeritance or None
+        self._shared &= ~self._SHARABLE['_fireHeritance'][0]
 
     def __str__(self):
         return ', '.join(self.name.split('_'))
@@ -59,34 +190,68 @@ class Token:
     def copy(self):
         """Make a copy of a token
 
-        :param token: token to copy
-        :type token: :class:`Token <petrinet_simulator.Token>`
-
         :returns: An instance of the class :class:`Token <petrinet_simulator.Token>`
 
-        .. Warning:: Transition and place are shared !
-                 If the variable is not a token, the method
-                 raise an exception
+        .. Warning:: Transition and place are shared ! The dictionnaries of the advanced properties are shared too
+                     until one of the tokens modifies them through an ``add*`` method
         """
-        try:
-            tok = Token(self.name, self.show, self.fire)
-            for place, attr in self.priority.iteritems():
-                tok.addPriority(place, attr['priority'], attr['pref'])
-            for transition, dictionnary in self.priorityAfterFire.iteritems():
-                for loc, prt in dictionnary.iteritems():
-                    tok.addPriorityAfterFire(transition, prt, loc)
-            for transition, attr in self.fireHeritance.iteritems():
-                for place, toks in attr.iteritems():
-                    for tk in toks:
-                        tok.addFireHeritance(tk, place, transition)
-            return tok
-        except:
-            return None
+        tok = Token.__new__(Token)
+        self._copyInto(tok)
+        return tok
+
+    def _copyInto(self, tok):
+        # copy the attributes to tok and share the structures with it
+        tok._name, tok.names, tok.show, tok.fire = self._name, self.names, self.show, self.fire
+        shared = 0
+        for slot, (bit, _) in self._SHARABLE.iteritems():
+            value = getattr(self, slot)
+            setattr(tok, slot, value)
+            if value is not None:
+                shared |= bit
+        self._shared |= shared
+        tok._shared = shared
+
+    def _unshare(self, slot):
+        """ Give to the token its own copy of the structure stored in ``slot`` if it is shared with other tokens.
+            It has to be called before modifying this structure
+        """
+        bit, copier = self._SHARABLE[slot]
+        if self._shared & bit:
+            setattr(self, slot, copier(getattr(self, slot)))
+            self._shared &= ~bit
 
     def containsNames(self, *names):
-        """ return True if token.name contains every word in name.split('_')
+        """ return True if every word of the token's name is in ``names``
+        """
+        return self.names.issubset(names)
+
+    def containsName(self, name):
+        """ return True if ``name`` is one of the words of the token's name
+        """
+        return name in self.names
+
+    def isEnabled(self, place, transition):
+        """ Check if the token can be fired by ``transition`` when it stays on ``place``, i.e.:
+
+              * :attr:`fire <petrinet_simulator.Token.fire>` is ``True``
+              * the token has no priority on ``place``, or ``transition`` is the first priority transition on ``place``,
+                or the priority's pref is ``'time'`` and ``transition`` is one of the priority transitions
+
+            :param place: *
+            :type place: :class:`Place <petrinet_simulator.Place>`
+            :param transition: *
+            :type transition: :class:`Transition <petrinet_simulator.Transition>`
+
+            :returns: A boolean
         """
-        return set(self.name.split('_')).issubset(names)
+        if not self.fire:
+            return False
+        if self._priority is None or place not in self._priority:
+            return True
+        transitions = self._priority[place]['priority']
+        if transitions and transitions[0] == transition:
+            return True
+        return self._priority[place]['pref'] == 'time' and transition in transitions
 
     def addPriority(self, place, *transitions, **options):
         """ Add priority for ``place``
@@ -123,11 +288,14 @@ class Token:
         # <Place : place1> --> [<Transition : tr1>](pref=time) #
 
         """
-        if self.priority.get(place) is None:
-            self.priority.setdefault(place, {'priority': [], 'pref': options.get('pref', 'time')})
+        if self._priority is None:
+            self._priority = {}
+        self._unshare('_priority')
+        if self._priority.get(place) is None:
+            self._priority.setdefault(place, {'priority': [], 'pref': options.get('pref', 'time')})
         for t in transitions:
-            self.priority[place]['priority'].append(t)
-            self.priority[place]['pref'] = options.get('pref', 'time')
+            self._priority[place]['priority'].append(t)
+            self._priority[place]['pref'] = options.get('pref', 'time')
 
     def addPriorityAfterFire(self, transition, priority, location='self', pref='time'):
         """ If ``transition`` fires we add the given priorities to the given places for the given location.
@@ -173,14 +341,17 @@ class Token:
             # <Transition : tr2>: #
             #   (<Place : place2>, 'token1') --> {<Place : place2>: [<Transition : tr2>, <Transition : tr1>](pref=pref), <Place : place1>: [<Transition : tr1>](pref=pref)} #
         """
-        if self.priorityAfterFire.get(transition) is None:
-            self.priorityAfterFire.setdefault(transition, {location: {}})
+        if self._priorityAfterFire is None:
+            self._priorityAfterFire = {}
+        self._unshare('_priorityAfterFire')
+        if self._priorityAfterFire.get(transition) is None:
+            self._priorityAfterFire.setdefault(transition, {location: {}})
         else:
-            self.priorityAfterFire[transition].setdefault(location, {})
+            self._priorityAfterFire[transition].setdefault(location, {})
         for pl, transitions in priority.iteritems():
-            self.priorityAfterFire[transition][location].setdefault(pl, {'priority': [], 'pref': pref})
+            self._priorityAfterFire[transition][location].setdefault(pl, {'priority': [], 'pref': pref})
             for t in transitions:
-                self.priorityAfterFire[transition][location][pl]['priority'].append(t)
+                self._priorityAfterFire[transition][location][pl]['priority'].append(t)
 
     def addFireHeritance(self, tokenName, place, transition):
         """ If ``transition`` fires, the tokens on ``place``, such that ``tokenName in token.name.split('_')``,
@@ -209,11 +380,14 @@ class Token:
             >>> token1.print_fire_heritance() #doctest: +NORMALIZE_WHITESPACE
             # <Transition : tr1> --> {<Place : place1>:[token2]} #
         """
-        if self.fireHeritance.get(transition) is None:
-            self.fireHeritance.setdefault(transition, {})
-        if self.fireHeritance[transition].get(place) is None:
-            self.fireHeritance[transition].setdefault(place, [])
-        self.fireHeritance[transition][place].append(str(tokenName))
+        if self._fireHeritance is None:
+            self._fireHeritance = {}
+        self._unshare('_fireHeritance')
+        if self._fireHeritance.get(transition) is None:
+            self._fireHeritance.setdefault(transition, {})
+        if self._fireHeritance[transition].get(place) is None:
+            self._fireHeritance[transition].setdefault(place, [])
+        self._fireHeritance[transition][place].append(str(tokenName))
 
     def get_priority_value(self, place, transition):
         """ Compute a priority value for ``token``. Given two tokens, the one with the biggest priority_value is fired first
@@ -227,7 +401,7 @@ class Token:
             :returns: A float bigger or equal to 0
         """
         try:
-            return (pref_func(0.0), pref_func(self.priority[place]['priority'].index(transition)))
+            return (pref_func(0.0), pref_func(self._priority[place]['priority'].index(transition)))
         except:
             return (0.0, 0.0)
 
@@ -264,13 +438,21 @@ class Token:
             # we keep the intersection of each priority
             for p, attr in t.priority.iteritems():
                 if attr['pref'] == 'priority':
-                    del attr['priority'][0]
-                    self.addPriority(p, attr['priority'], attr['pref'])
+                    # the first transition has fired: the priority may be shared with other tokens, it isn't modified
+                    self.addPriority(p, *attr['priority'][1:], pref=attr['pref'])
             # save the name of tokens
-            names.update(t.name.split('_') if t.name != 'no name' and t.name != '' else [])
-        self.name = '_'.join(names) or 'no name'
+            names.update(t.names)
+        self.names = internNames(names)
+        # the name of a fired token whose words are the merged ones is kept, else the words are sorted
+        for t in tok_save:
+            if t.names is self.names:
+                self._name = t.name
+                break
+        else:
+            self._name = '_'.join(sorted(self.names)) or 'no name'
 
-        if self.name == 'no name':
-            for p, attr in self.priority.iteritems():
+        if not self.names:
+            for p, attr in self.priority.items():
                 if not attr['priority']:
-                    del self.priority[p]
+                    del self._priority[p]
+            self.priority = self._priority
@@ -5,12 +5,18 @@ Created on Thu Jul 21 21:38:37 2016
 @author: Mickael Grima
 """
 
-from PetriNet import PetriNet
+from xml.etree.cElementTree import iterparse
+from Petrinet import PetriNet
 from TimePetrinet import TimePetriNet
+from TimePlace import TimePlace
+from TimeTransition import TimeTransition
+from TimeToken import TimeToken
 
 
 def concatenate(petriNet1, petriNet2, name='no name', input_connections=None, output_connections=None):
-    """ Build a global petriNet from the two given petrinets.
+    """ Build a global petriNet from the two given petrinets. The places and transitions of the result are copies
+        (see :func:`Place.copy <petrinet_simulator.Place.copy>` and
+        :func:`Transition.copy <petrinet_simulator.Transition.copy>`): the given petriNets aren't modified.
 
         :param petriNet1: *
         :type petriNet1: :class:`PetriNet <petrinet_simulator.PetriNet>`
@@ -21,9 +27,11 @@ def concatenate(petriNet1, petriNet2, name='no name', input_connections=None, ou
 
             * ``name = 'no name'``: the name of the return petriNet
             * ``input_connections = None``: the input's connections added to the return petriNet.
-                                            It's a list of tuple of place, transition
+                                            It's a list of tuple of place, transition. The nodes of the given
+                                            petriNets are replaced by their copies
             * ``output_connections = None``: the output's connections added to the return petriNet.
-                                             It's a list of tuple of place, transition
+                                             It's a list of tuple of place, transition. The nodes of the given
+                                             petriNets are replaced by their copies
 
         :returns: an object of class :class:`PetriNet <petrinet_simulator.PetriNet>`
     """
@@ -32,288 +40,165 @@ def concatenate(petriNet1, petriNet2, name='no name', input_connections=None, ou
     if not isinstance(petriNet2, PetriNet):
         raise TypeError('PetriNet expected, got a %s instead' % petriNet2.__class__.__name__)
 
+    # only the TimePetriNets have a start date
+    startDate1, startDate2 = getattr(petriNet1, 'startDate', None), getattr(petriNet2, 'startDate', None)
     minimumDate = None
-    if petriNet1.startDate is not None:
-        if petriNet2.startDate is not None:
-            dur = (petriNet1.startDate - petriNet2.startDate).total_seconds() / 60.
+    if startDate1 is not None:
+        if startDate2 is not None:
+            dur = (startDate1 - startDate2).total_seconds() / 60.
             if(dur > 0):
-                minimumDate = petriNet2.startDate
+                minimumDate = startDate2
             else:
-                minimumDate = petriNet1.startDate
+                minimumDate = startDate1
         else:
-            minimumDate = petriNet1.startDate
+            minimumDate = startDate1
     else:
-        if petriNet2.startDate is not None:
-            minimumDate = petriNet2.startDate
+        if startDate2 is not None:
+            minimumDate = startDate2
 
     if isinstance(petriNet1, TimePetriNet) or isinstance(petriNet2, TimePetriNet):
         result = TimePetriNet(str(name), startDate=minimumDate)
     else:
         result = PetriNet(str(name))
 
-    # add the places and tokens
-    for p1 in petriNet1.places.iterkeys():
-        result.addPlace(p1)
-    for p2 in petriNet2.places.iterkeys():
-        result.addPlace(p2)
-
-    # add tokens
-    result.token.update(petriNet1.token)
-    result.token.update(petriNet2.token)
-
-    # add the transitions
-    for t1 in petriNet1.transitions.iterkeys():
-        result.addTransition(t1)
-    for t2 in petriNet2.transitions.iterkeys():
-        result.addTransition(t2)
-
-    # create the inputs
-    result.inputs.update(petriNet1.inputs)
-    result.inputs.update(petriNet2.inputs)
-    result.outputs.update(petriNet1.outputs)
-    result.outputs.update(petriNet2.outputs)
-    result.upplaces.update(petriNet1.upplaces)
-    result.upplaces.update(petriNet2.upplaces)
-    result.downplaces.update(petriNet1.downplaces)
-    result.downplaces.update(petriNet2.downplaces)
+    # add copies of the places and transitions, with their positions, and the inputs and outputs between the copies
+    copies = {}
+    for petriNet in (petriNet1, petriNet2):
+        places, transitions = [], []
+        for p in petriNet.places:
+            places.append(p.copy())
+            result.addPlace(places[-1], petriNet.posPlaces[p.index])
+        for t in petriNet.transitions:
+            transitions.append(t.copy())
+            result.addTransition(transitions[-1], petriNet.posTransitions[t.index])
+        for p, dct in enumerate(petriNet.inputs):
+            for t, n in dct.iteritems():
+                result.addInput(places[p], transitions[t], n)
+        for p, dct in enumerate(petriNet.outputs):
+            for t, n in dct.iteritems():
+                result.addOutput(places[p], transitions[t], n)
+        copies.update(zip(petriNet.places, places))
+        copies.update(zip(petriNet.transitions, transitions))
+
+    # the copied tokens are already on the places
+    result.token = [len(p.token) for p in result.places]
+    result.adapteEnabledTokens(*result.places)
 
     # add the input_connections and output_connections
     if input_connections is not None:
         for t in input_connections:
-            result.addInput(t[0], t[1])
+            result.addInput(copies.get(t[0], t[0]), copies.get(t[1], t[1]))
     if output_connections is not None:
         for t in output_connections:
-            result.addOutput(t[0], t[1])
+            result.addOutput(copies.get(t[0], t[0]), copies.get(t[1], t[1]))
 
     return result
 
 
-def read_graph(src):
-    """ For a given ``src``, make a petriNet. ``src`` has to come from a document whose extension is graphml.
-        The places in ``src`` have to be nodes with ellipse form, and the transitions nodes with rectangle form.
+_localNames = {}
 
-        :param src:
-        :type src: docfile
 
-        :returns: An object of class :class:`TimedPetriNet <petrinet_simulator.TimedPetriNet>`
-    """
-    lines = src.readlines()
+def _localName(tag):
+    # tag without its namespace. The tags of a document are few: they are saved
+    name = _localNames.get(tag)
+    if name is None:
+        name = _localNames[tag] = tag.rsplit('}', 1)[-1]
+    return name
 
-    while True:
-        line = lines[0]
-        data = line.split()
-        if(data[2] == "<graph"):
-            break
-        else:
-            del lines[0]
-
-    pt = TimedPetriNet()
-    nodes, edges = [], []
-
-    i = 0
-    while i < len(lines):
-        line = lines[i][:-2] if lines[i].endswith('\n') else lines[i]
-        data = line.split()
-
-        if "<node" in data and 'yfiles.foldertype="group">' not in data:
-            end_node = ""
-            j = 0
-            word = data[j]
-            while(word == ''):
-                end_node += ' '
-                j += 1
-                word = data[j]
-            end_node += "</node>\n"
-
-        # --- if the node a simple node is ---
-        lines_node = []
-        while lines[i] != end_node:
-            lines_node.append(lines[i].rstrip('\n'))
-            i += 1
-        lines_node.append(lines[i].rstrip('\n'))
-
-        nodes.append(lines_node)
-
-        if "<edge" in data:
-            end_edge = ''
-            j = 0
-            word = data[j]
-            while(word == ''):
-                end_edge += ' '
-                j += 1
-                word = data[j]
-            end_edge += "</edge>\n"
-
-        # --- if the edge a simple edge is ---
-        lines_edge = []
-        while lines[i] != end_edge:
-            lines_edge.append(lines[i].rstrip('\n'))
-            i += 1
-        lines_edge.append(lines[i].rstrip('\n'))
-
-        edges.append(lines_edge)
-
-        i += 1
-
-    for lines in nodes:
-        node, typ, pos = __create_node(lines)
-        if typ == "transition":
-            pt.addTransition(node, pos=pos)
-        if typ == "place":
-            pt.addPlace(node, pos=pos)
-
-    for lines in edges:
-        idd1, idd2, path = __create_edge(lines)
-        for p,k in pt.places.iteritems():
-        if(p.idd == idd1):
-            place = p
-            typ = 'input'
-        if(p.idd == idd2):
-            place = p
-            typ = 'output'
-        for t,c in pt.transitions.iteritems():
-        if(t.idd == idd1 or t.idd == idd2):
-            transition = t
-        
-        if(typ == 'input'):
-        pt.addInput(place,transition, path = path)
-        if(typ == 'output'):
-        pt.addOutput(place, transition, path = path)
-    
-    return pt
 
-    
-    @staticmethod
-    def __create_node(lines):
-    
-    name = None
-    nb_tok = 0
-    
-    typ = None
-    node = None
-    
-    line = lines[0].rstrip('\n')
-    data = line.split(' ')
-    i = 0
-    while(data[i] != "<node"):
-        i += 1
-    word = data[i+1].split('=')[1].rstrip('>')
-    idd = word.split('"')[1]
-    
-    i = 0
-    while(i < len(lines)):
-        
-        line = lines[i].rstrip('\n')
-        data = line.split(' ')
-        
-        if('<data' in data):
-        
-        #find the end of data
-        end_data = ''
-        j = 0
-        word = data[j]
-        while(word == ''):
-            end_data += ' '
-            j += 1
-            word = data[j]
-        end_data += "</data>"
-        
-        #explore data
-        while(lines[i] != end_data):
-            i += 1
-            line = lines[i].rstrip('\n')
-            dt = line.split('y:')
-            
-            #if it is a label
-            if(len(dt) > 1 and dt[1].split(' ')[0] == "NodeLabel"):
-            label = dt[1].rstrip("</").split('>')[1]
-            if(label != ''):
-                if(len(label) >= 3):
+def _readNode(element):
+    # kind of node, name, number of tokens and position of a yEd node
+    kind, name, nb_tok, pos = None, None, 0, (0.0, 0.0)
+    for child in element.iter():
+        tag = _localName(child.tag)
+        if tag == 'Shape':
+            kind = {'ellipse': 'place', 'rectangle': 'transition'}.get(child.get('type'))
+        elif tag == 'Geometry':
+            pos = (float(child.get('x', 0.0)), float(child.get('y', 0.0)))
+        elif tag == 'NodeLabel':
+            label = (child.text or '').strip()
+            # the short numeric labels are the numbers of tokens
+            if len(label) < 3 and label.isdigit():
+                nb_tok = int(label)
+            elif label:
                 name = label
+    return kind, name, nb_tok, pos
+
+
+def _addEdge(pt, source, target, path):
+    # an edge from a place is an input, an edge to a place an output
+    if isinstance(source, TimePlace) and isinstance(target, TimeTransition):
+        pt.addInput(source, target, path=path)
+    elif isinstance(source, TimeTransition) and isinstance(target, TimePlace):
+        pt.addOutput(target, source, path=path)
+    else:
+        raise ValueError('an edge has to join a place and a transition: %s, %s' % (source.idd, target.idd))
+
+
+def read_graph(src):
+    """ For a given ``src``, make a petriNet. ``src`` has to come from a document whose extension is graphml, as the
+        ones exported by yEd. The places in ``src`` have to be nodes with ellipse form, and the transitions nodes with
+        rectangle form. A label of at most two digits is the number of tokens on a place, another label the name of
+        the node. The group nodes are ignored, not the nodes they contain.
+
+        The document is read in one pass with ``iterparse``: each node and edge is built as soon as its element is
+        parsed, then the element is cleared, so that the memory used doesn't depend on the size of the document.
+        The edges whose nodes come later in the document are added at the end, then the tokens, so that their clocks
+        are set for the transitions down their places.
+
+        :param src: name or file object of the document
+        :type src: str or docfile
+
+        :returns: An object of class :class:`TimePetriNet <petrinet_simulator.TimePetriNet>`
+    """
+    pt = TimePetriNet()
+    nodes, pending, graphs, tokens = {}, [], [], []
+
+    for event, element in iterparse(src, events=('start', 'end')):
+        tag = _localName(element.tag)
+        if event == 'start':
+            if tag == 'graph':
+                graphs.append(element)
+            continue
+
+        if tag == 'graph':
+            graphs.pop()
+        elif tag == 'node':
+            if element.get('yfiles.foldertype') != 'group':
+                kind, name, nb_tok, pos = _readNode(element)
+                if kind is None:
+                    raise ValueError('node %s is neither an ellipse nor a rectangle' % element.get('id'))
+                if kind == 'place':
+                    node = TimePlace(name=name)
+                    pt.addPlace(node, pos=pos)
+                    tokens.append((node, nb_tok))
                 else:
-                nb_tok = int(label)
-            
-            #transition or Place?
-            if(len(dt) > 1 and dt[1].split(' ')[0] == "Shape"):
-            shape = dt[1].split(' ')[1].rstrip('/>').split('=')[1]
-            if(shape == '"ellipse"'):
-                node = TimePlace()
-                typ = 'place'
-            if(shape == '"rectangle"'):
-                node = TimeTransition()
-                typ = 'transition'
-            
-            #transition or Place?
-            if(len(dt) > 1 and dt[1].split(' ')[0] == "Geometry"):
-            words = dt[1].split(' ')
-            j = 0
-            while(j < len(words)):
-                w = words[j].rstrip('/>').split('=')
-                if('x' in w):
-                x = float(w[1].split('"')[1])
-                if('y' in w):
-                y = float(w[1].split('"')[1])
-                j += 1
-        
-        i += 1
-                
-    if(typ == 'place'):
-        node.name = name
-        for i in range(nb_tok):
-        tok = TimeToken()
-        node.addToken(tok)
-    if(typ == 'transition'):
-        node.name = name
-    if(typ is None):
-        raise ValueError('this node is not a real node')
-    
-    node.idd = idd
-    pos = (x,y)
-    
-    return node, typ, pos
-    
-    
-    @staticmethod
-    def __create_edge(lines):
-    path = []
-
-    line = lines[0].rstrip('\n')
-    data = line.split(' ')
-    i = 0
-    while(data[i] == ''):
-        i += 1
-    
-    idd1 = data[i+2].split('=')[1].split('"')[1]
-    idd2 = data[i+3].split('=')[1].split('"')[1]
-    
-    i = 0
-    while(i < len(lines)):
-        line = lines[i].rstrip('\n')
-        data = line.split('y:')
-        dt = line.split(' ')
-        
-        if(len(data) > 1 and data[1].split(' ')[0] == 'Path'):
-        
-        #find the end of data
-        end_path = ''
-        j = 0
-        word = dt[j]
-        while(word == ''):
-            end_path += ' '
-            j += 1
-            word = dt[j]
-        end_path += "</y:Path>"
-        i += 1
-        
-        while(lines[i] != end_path and lines[i].split(' ')[j] == ''):
-            words = lines[i].rstrip('\n').split('y:')
-            if(words[1].split(' ')[0] == 'Point'):
-            w = words[1].rstrip('/>').split(' ')
-            x = float(w[1].split('=')[1].split('"')[1])
-            y = float(w[2].split('=')[1].split('"')[1])
-            path.append((x,y))
-            i += 1
-        
-        i += 1
-    
-    return idd1, idd2, path
+                    node = TimeTransition(name=name)
+                    pt.addTransition(node, pos=pos)
+                node.idd = element.get('id')
+                nodes[node.idd] = node
+        elif tag == 'edge':
+            path = [(float(point.get('x')), float(point.get('y')))
+                    for point in element.iter() if _localName(point.tag) == 'Point']
+            source, target = element.get('source'), element.get('target')
+            if source in nodes and target in nodes:
+                _addEdge(pt, nodes[source], nodes[target], path)
+            else:
+                pending.append((source, target, path))
+        else:
+            continue
+
+        # the parsed nodes and edges aren't needed anymore
+        if graphs:
+            graphs[-1].clear()
+
+    for source, target, path in pending:
+        if source not in nodes or target not in nodes:
+            raise ValueError('edge between unknown nodes %s and %s' % (source, target))
+        _addEdge(pt, nodes[source], nodes[target], path)
+
+    for place, nb_tok in tokens:
+        if nb_tok:
+            pt.addToken(place, *[TimeToken() for i in range(nb_tok)])
+
+    return pt
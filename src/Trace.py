@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:40 2026
+
+@author: Mickael Grima
+"""
+
+import os
+import numpy as np
+
+
+# name and type of the columns, each one saved in the file <name>.bin of the trace's directory
+COLUMNS = [('step', np.int64), ('clock', np.float64), ('transition', np.int32), ('offset', np.int64),
+           ('place', np.int32), ('delta', np.int32)]
+
+
+class TraceRecorder(object):
+    """ This class records the firings of a simulation in a columnar binary trace: a directory containing one file
+        per column of fixed-width values, readable by :class:`Trace <petrinet_simulator.Trace>`.
+
+        Each firing is a record (step, clock, transition index). Its marking delta, the column of the transition in
+        the incidence matrix, is written in CSR form: the columns ``place`` and ``delta`` hold the non-null values of
+        the deltas one after the other, and ``offset`` the end of the values of each record.
+
+        The records are written in preallocated arrays of ``chunkSize`` lines, which are appended to the files when
+        they are full: only the index of the fired transition is saved for each firing, the deltas of a chunk are
+        computed at once.
+
+        **Example:**
+
+        >>> with TraceRecorder(petriNet, 'run') as recorder:
+        >>>     petriNet.simulation(show=False, trace=recorder)
+        >>> Trace('run').marking(100)
+    """
+
+    def __init__(self, petriNet, path, chunkSize=65536):
+        """ :param petriNet: the simulated petriNet. Its structure mustn't change during the recording
+            :type petriNet: :class:`PetriNet <petrinet_simulator.PetriNet>`
+            :param path: directory of the trace, created if it doesn't exist. The files of a previous trace are
+                         replaced
+            :type path: str
+
+            * options:
+
+                * ``chunkSize = 65536``: number of records kept in memory before being written
+        """
+        if chunkSize <= 0:
+            raise ValueError('positive chunkSize expected, got %s instead' % chunkSize)
+
+        self.path = path
+        """ Directory of the trace
+        """
+        self.places = [p.name for p in petriNet.places]
+        """ Names of the places, in the order of the markings
+        """
+        self.transitions = [t.name for t in petriNet.transitions]
+        """ Names of the transitions, in the order of their indices
+        """
+        self.initialMarking = np.array(petriNet.token, dtype=np.int64)
+        """ Marking at the creation of the recorder
+        """
+        self.length = 0
+        """ Number of recorded firings
+        """
+
+        # incidence matrix in CSR form: the delta of the transition t is in the lines indptr[t]:indptr[t + 1]
+        columns = [{} for t in petriNet.transitions]
+        for p, dct in enumerate(petriNet.inputs):
+            for t, nb in dct.iteritems():
+                columns[t][p] = columns[t].get(p, 0) - nb
+        for p, dct in enumerate(petriNet.outputs):
+            for t, nb in dct.iteritems():
+                columns[t][p] = columns[t].get(p, 0) + nb
+        columns = [sorted((p, nb) for p, nb in column.iteritems() if nb != 0) for column in columns]
+        self.__indptr = np.cumsum([0] + [len(column) for column in columns]).astype(np.int64)
+        self.__places = np.array([p for column in columns for p, _ in column], dtype=np.int32)
+        self.__deltas = np.array([nb for column in columns for _, nb in column], dtype=np.int32)
+        self.__offset = 0
+
+        self.__chunkSize, self.__size = chunkSize, 0
+        self.__steps = np.empty(chunkSize, dtype=np.int64)
+        self.__clocks = np.empty(chunkSize, dtype=np.float64)
+        self.__transitions = np.empty(chunkSize, dtype=np.int32)
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.__files = {name: open(os.path.join(path, '%s.bin' % name), 'wb') for name, _ in COLUMNS}
+        self.__writeMeta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def record(self, step, clock, transition):
+        """ Record a firing
+
+            :param step: number of firings before this one
+            :type step: int
+            :param clock: date of the firing, None if the petriNet isn't timed
+            :type clock: float
+            :param transition: index of the fired transition
+            :type transition: int
+        """
+        i = self.__size
+        self.__steps[i] = step
+        self.__clocks[i] = np.nan if clock is None else clock
+        self.__transitions[i] = transition
+        self.__size = i + 1
+        if self.__size == self.__chunkSize:
+            self.flush()
+
+    def flush(self):
+        """ Write the records kept in memory into the files
+        """
+        if self.__size == 0:
+            return
+        size, transitions = self.__size, self.__transitions[:self.__size]
+
+        # the deltas of the chunk are gathered from the CSR incidence matrix
+        starts = self.__indptr[transitions]
+        lengths = self.__indptr[transitions + 1] - starts
+        ends = np.cumsum(lengths)
+        lines = np.repeat(starts - (ends - lengths), lengths) + np.arange(ends[-1], dtype=np.int64)
+
+        columns = {'step': self.__steps[:size], 'clock': self.__clocks[:size], 'transition': transitions,
+                   'offset': ends + self.__offset, 'place': self.__places[lines], 'delta': self.__deltas[lines]}
+        for name, dtype in COLUMNS:
+            columns[name].astype(dtype, copy=False).tofile(self.__files[name])
+            self.__files[name].flush()
+
+        self.__offset += int(ends[-1])
+        self.length += size
+        self.__size = 0
+        self.__writeMeta()
+
+    def close(self):
+        """ Write the last records and close the files
+        """
+        if self.__files is None:
+            return
+        self.flush()
+        for f in self.__files.itervalues():
+            f.close()
+        self.__files = None
+
+    def __writeMeta(self):
+        # the meta data are written again after each flush: the trace can be read while it is recorded
+        np.savez(os.path.join(self.path, 'meta.npz'), length=self.length, initialMarking=self.initialMarking,
+                 places=np.array(self.places), transitions=np.array(self.transitions))
+
+
+class Trace(object):
+    """ This class reads a trace written by :class:`TraceRecorder <petrinet_simulator.TraceRecorder>`. The columns are
+        memory-mapped: they are read from the files only when they are used.
+    """
+
+    def __init__(self, path):
+        """ :param path: directory of the trace
+            :type path: str
+        """
+        meta = np.load(os.path.join(path, 'meta.npz'))
+
+        self.path = path
+        """ Directory of the trace
+        """
+        self.length = int(meta['length'])
+        """ Number of recorded firings
+        """
+        self.places = [str(name) for name in meta['places']]
+        """ Names of the places, in the order of the markings
+        """
+        self.transitions = [str(name) for name in meta['transitions']]
+        """ Names of the transitions, in the order of their indices
+        """
+        self.initialMarking = meta['initialMarking']
+        """ Marking before the first recorded firing
+        """
+
+        columns = {}
+        for name, dtype in COLUMNS:
+            filename = os.path.join(path, '%s.bin' % name)
+            size = os.path.getsize(filename) // np.dtype(dtype).itemsize
+            columns[name] = np.memmap(filename, dtype=dtype, mode='r', shape=(size,)) if size else \
+                np.zeros(0, dtype=dtype)
+        self.steps, self.clocks, self.transitionIndices = columns['step'], columns['clock'], columns['transition']
+        """ Columns of the records: step, clock (nan if the petriNet isn't timed) and index of the fired transition
+        """
+        self.offsets, self.deltaPlaces, self.deltas = columns['offset'], columns['place'], columns['delta']
+        """ Marking deltas in CSR form: the delta of the record ``i`` is on the places
+            ``deltaPlaces[offsets[i - 1]:offsets[i]]``
+        """
+
+    def __len__(self):
+        return self.length
+
+    def marking(self, step):
+        """ Rebuild the marking after the ``step`` first recorded firings, by summing their deltas
+
+            :param step: between 0 and :attr:`length <petrinet_simulator.Trace.length>`
+            :type step: int
+
+            :returns: A vector of the number of tokens on each place
+        """
+        if not 0 <= step <= self.length:
+            raise IndexError('step between 0 and %s expected, got %s instead' % (self.length, step))
+        end = int(self.offsets[step - 1]) if step > 0 else 0
+        delta = np.bincount(self.deltaPlaces[:end], weights=self.deltas[:end], minlength=len(self.places))
+        return self.initialMarking + delta.astype(np.int64)
@@ -18,6 +18,8 @@ class Transition(Node):
 
         A transition can fire and have :class:`Token <petrinet_simulator.Token>`'s preferences
     """
+    __slots__ = ('show', 'tokenQueue', 'tokenQueueAfterFire')
+
     def __init__(self, name='no name', logger=logging, show=True):
         Node.__init__(self, name=name, logger=logger)
         self.show = show
@@ -66,7 +68,7 @@ class Transition(Node):
         """
         try:
             # Create the new transition
-            tr = Transition(self.name, self.show)
+            tr = Transition(name=self.name, show=self.show)
 
             # Adapte tokenQueue
             for tkns in self.tokenQueue:
@@ -134,9 +136,9 @@ class Transition(Node):
                     self.tokenQueue[-1].append(str(tokenName))
                 except:
                     self.logger.warning("TokeNames argument contains elements that can't be convert into a string")
-            else:
-                if new_dct_tkn:
-                    self.tokenQueue.insert(i, [])
+        else:
+            if new_dct_tkn:
+                self.tokenQueue.insert(i, [])
             for tokenName in tokenNames:
                 try:
                     self.tokenQueue[i].append(str(tokenName))
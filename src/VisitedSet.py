@@ -0,0 +1,592 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:41:53 2026
+
+@author: Mickael Grima
+"""
+
+import os
+import shutil
+import tempfile
+import numpy as np
+
+
+class VisitedSet(object):
+    """ Set of the markings visited by the exploration of the reachability graph, see
+        :func:`PetriNet.reachabilityGraph <petrinet_simulator.PetriNet.reachabilityGraph>`. The markings are tuples of
+        integers, numbered 0, 1, 2, ... in the order of their insertion: their number is their state in the
+        :class:`ReachabilityGraph <petrinet_simulator.ReachabilityGraph>`.
+
+        The set behaves like the sequence of the markings, ordered by state, and like a mapping marking: state through
+        the method :func:`get <petrinet_simulator.VisitedSet.get>`.
+    """
+    batched = False
+    """ True if the set is made for looking up the markings by batches with
+        :func:`find <petrinet_simulator.VisitedSet.find>`: the exploration is then breadth first and looks up all the
+        successors of a level at once
+    """
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def __getitem__(self, state):
+        """ :returns: the marking of ``state``
+        """
+        raise NotImplementedError
+
+    def __iter__(self):
+        for state in xrange(len(self)):
+            yield self[state]
+
+    def __contains__(self, marking):
+        return self.get(marking) is not None
+
+    def get(self, marking, default=None):
+        """ :returns: the state of ``marking``, ``default`` if it hasn't been visited
+        """
+        raise NotImplementedError
+
+    def find(self, markings):
+        """ Look up several markings at once
+
+            :param markings: *
+            :type markings: list
+
+            :returns: numpy array of the states of ``markings``, -1 for the markings which haven't been visited
+        """
+        return np.array([self.get(marking, -1) for marking in markings], dtype=np.int64)
+
+    def add(self, marking):
+        """ Add a new marking to the set
+
+            :returns: the state of ``marking``
+        """
+        raise NotImplementedError
+
+    def extend(self, markings):
+        """ Add new markings to the set, in this order
+
+            :returns: the state of the first marking
+        """
+        state = len(self)
+        for marking in markings:
+            self.add(marking)
+        return state
+
+    def graphStores(self):
+        """ :returns: the tuple (parents, successors) of the sequences indexed by state where the
+                      :class:`ReachabilityGraph <petrinet_simulator.ReachabilityGraph>` keeps the parents of the states
+                      and its edges. They are kept in memory by default: a list and a
+                      :class:`SuccessorList <petrinet_simulator.SuccessorList>`
+        """
+        return [], SuccessorList()
+
+    def close(self):
+        """ Release the resources of the set. It can't be used anymore
+        """
+        pass
+
+
+class SuccessorList(list):
+    """ Edges of a :class:`ReachabilityGraph <petrinet_simulator.ReachabilityGraph>` kept in memory: the element
+        ``state`` is the list of the tuples (transition, next state) of the firings from ``state``
+    """
+
+    def addStates(self, nb):
+        """ Add ``nb`` new states without successors
+        """
+        self.extend([] for i in xrange(nb))
+
+    def add(self, state, successors):
+        """ Add the tuples (transition, next state) ``successors`` to the successors of ``state``
+        """
+        self[state].extend(successors)
+
+    def edgeCount(self):
+        """ :returns: the number of edges
+        """
+        return sum(len(successors) for successors in self)
+
+
+class MemoryVisitedSet(VisitedSet):
+    """ Visited set kept in memory: a dictionnary marking: state and the list of the markings. This is the fastest one,
+        and the default one of the reachability graphs
+    """
+
+    def __init__(self):
+        self.markings = []
+        """ List of the markings, ordered by state
+        """
+        self.states = {}
+        """ Dictionnary marking: state
+        """
+        # the look ups of the exploration are the ones of the dictionnary
+        self.get = self.states.get
+
+    def __len__(self):
+        return len(self.markings)
+
+    def __getitem__(self, state):
+        return self.markings[state]
+
+    def __iter__(self):
+        return iter(self.markings)
+
+    def add(self, marking):
+        state = len(self.markings)
+        self.states[marking] = state
+        self.markings.append(marking)
+        return state
+
+
+class _GrowableArray(object):
+    """ Array of rows of integers in a memory mapped file. Its capacity doubles when it is full
+    """
+
+    def __init__(self, path, width, dtype=np.int64, capacity=1024):
+        self.path = path
+        self.width = width
+        self.dtype = dtype
+        self.size = 0
+        # a memory map can't be empty: the rows have at least one column
+        self.array = np.memmap(path, dtype=dtype, mode='w+', shape=(max(capacity, 1), max(width, 1)))
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        return self.array[index, :self.width]
+
+    def extend(self, rows):
+        rows = np.asarray(rows, dtype=self.dtype).reshape(-1, self.width)
+        if self.size + len(rows) > len(self.array):
+            capacity = len(self.array)
+            while self.size + len(rows) > capacity:
+                capacity *= 2
+            self.array.flush()
+            # the file is extended by the memory map itself
+            self.array = np.memmap(self.path, dtype=self.dtype, mode='r+', shape=(capacity, self.array.shape[1]))
+        self.array[self.size:self.size + len(rows), :self.width] = rows
+        self.size += len(rows)
+
+    def close(self):
+        del self.array
+
+
+class _DiskSequence(object):
+    """ Sequence of integers in a memory mapped file
+    """
+
+    def __init__(self, path):
+        self.values = _GrowableArray(path, 1)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self.values):
+            raise IndexError('index %s out of range' % index)
+        return int(self.values.array[index, 0])
+
+    def __iter__(self):
+        for start in xrange(0, len(self), 1 << 16):
+            for value in self.values.array[start:min(start + (1 << 16), len(self)), 0].tolist():
+                yield value
+
+    def append(self, value):
+        self.values.extend([value])
+
+    def extend(self, values):
+        self.values.extend(list(values))
+
+    def close(self):
+        self.values.close()
+
+
+class _DiskSuccessors(object):
+    """ Edges of a :class:`ReachabilityGraph <petrinet_simulator.ReachabilityGraph>` kept in memory mapped files, in
+        compressed rows: the rows (transition, next state) of the edges ordered by state, and for each state the
+        position of its first edge. The successors of the states are added in the order of the states, as done by the
+        breadth first exploration.
+    """
+
+    def __init__(self, directory):
+        self.edges = _GrowableArray(os.path.join(directory, 'edges'), 2)
+        self.offsets = _GrowableArray(os.path.join(directory, 'offsets'), 1)
+        self.offsets.extend([0])
+        self.nbStates = 0
+
+    def __len__(self):
+        return self.nbStates
+
+    def __getitem__(self, state):
+        if not 0 <= state < self.nbStates:
+            raise IndexError('state %s out of range' % state)
+        if state + 1 >= len(self.offsets):
+            return []
+        start, end = self.offsets.array[state:state + 2, 0]
+        return map(tuple, self.edges.array[start:end, :2].tolist())
+
+    def __iter__(self):
+        for state in xrange(self.nbStates):
+            yield self[state]
+
+    def addStates(self, nb):
+        self.nbStates += nb
+
+    def add(self, state, successors):
+        if state + 1 < len(self.offsets) - 1:
+            raise ValueError('the successors of state %s have already been added' % state)
+        end = len(self.edges)
+        if state + 1 == len(self.offsets) - 1:
+            # new successors of the last state
+            self.offsets.size -= 1
+        elif state + 1 > len(self.offsets):
+            # the states in between have no successor
+            self.offsets.extend([end] * (state + 1 - len(self.offsets)))
+        self.edges.extend(list(successors))
+        self.offsets.extend([len(self.edges)])
+
+    def edgeCount(self):
+        return len(self.edges)
+
+    def close(self):
+        self.edges.close()
+        self.offsets.close()
+
+
+def _hash(rows):
+    # FNV-1a on the columns of the rows, computed on every row at once
+    hashes = np.full(len(rows), 14695981039346656037, dtype=np.uint64)
+    for column in rows.T:
+        hashes ^= column.astype(np.uint64)
+        hashes *= np.uint64(1099511628211)
+    return hashes
+
+
+class _DiskVisitedSet(VisitedSet):
+    """ Visited set whose markings are kept, ordered by state, in a memory mapped file of fixed-width rows. The parents
+        and the edges of the graph are kept in memory mapped files as well
+    """
+
+    def __init__(self, nbPlaces, directory=None):
+        self.nbPlaces = nbPlaces
+        """ Number of places of the markings
+        """
+        self.temporary = directory is None
+        """ True if the directory is temporary: it is removed by :func:`close <petrinet_simulator.VisitedSet.close>`
+        """
+        self.directory = tempfile.mkdtemp(prefix='visited') if directory is None else directory
+        """ Directory of the files of the set, created if it doesn't exist
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        self.markings = _GrowableArray(os.path.join(self.directory, 'markings'), nbPlaces)
+        self.parents = _DiskSequence(os.path.join(self.directory, 'parents'))
+        self.successors = _DiskSuccessors(self.directory)
+
+    def __len__(self):
+        return len(self.markings)
+
+    def __getitem__(self, state):
+        if not 0 <= state < len(self.markings):
+            raise IndexError('state %s out of range' % state)
+        return tuple(self.markings[state].tolist())
+
+    def __iter__(self):
+        for start in xrange(0, len(self), 1 << 16):
+            for marking in self.markings[start:min(start + (1 << 16), len(self))].tolist():
+                yield tuple(marking)
+
+    def rows(self, markings):
+        return np.array(markings, dtype=np.int64).reshape(len(markings), self.nbPlaces)
+
+    def get(self, marking, default=None):
+        state = int(self.find([marking])[0])
+        return default if state < 0 else state
+
+    def add(self, marking):
+        return self.extend([marking])
+
+    def graphStores(self):
+        return self.parents, self.successors
+
+    def close(self):
+        self.markings.close()
+        self.parents.close()
+        self.successors.close()
+        if self.temporary:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class MmapVisitedSet(_DiskVisitedSet):
+    """ Visited set kept in memory mapped files: the markings are rows of fixed width, ordered by state, and an open
+        addressing hash table with linear probing gives the state of a marking. The table doubles when it is half full.
+        The look ups and insertions are done on numpy arrays, for all the markings of a batch at once.
+
+        :param nbPlaces: number of places of the markings
+        :type nbPlaces: int
+
+        * options:
+
+            * ``directory = None``: directory of the files, created if it doesn't exist. If None, a
+                                    temporary directory, removed by :func:`close <petrinet_simulator.VisitedSet.close>`
+            * ``capacity = 1024``: initial number of markings
+    """
+
+    batched = True
+
+    def __init__(self, nbPlaces, directory=None, capacity=1024):
+        super(MmapVisitedSet, self).__init__(nbPlaces, directory=directory)
+        self.hashes = _GrowableArray(os.path.join(self.directory, 'hashes'), 1, dtype=np.uint64, capacity=capacity)
+        self.table = None
+        self.resize(max(2 * capacity, 2))
+
+    def resize(self, size):
+        """ Build a hash table of ``size`` slots, rounded up to a power of two, and insert all the markings in it
+        """
+        size = 1 << (size - 1).bit_length()
+        if self.table is not None:
+            del self.table
+        path = os.path.join(self.directory, 'table')
+        if os.path.exists(path):
+            os.remove(path)
+        # a slot contains the state + 1, 0 for an empty slot
+        self.table = np.memmap(path, dtype=np.int64, mode='w+', shape=(size,))
+        self.mask = np.uint64(size - 1)
+        self.insert(np.arange(len(self), dtype=np.int64))
+
+    def insert(self, states):
+        """ Insert ``states`` in the hash table
+        """
+        hashes = self.hashes.array[:len(self), 0]
+        slots = (hashes[states] & self.mask).astype(np.int64)
+        while states.size:
+            free = np.flatnonzero(self.table[slots] == 0)
+            # the first state of each free slot takes it, the other ones go on probing
+            taken, first = np.unique(slots[free], return_index=True)
+            self.table[taken] = states[free[first]] + 1
+            waiting = np.ones(len(states), dtype=bool)
+            waiting[free[first]] = False
+            states = states[waiting]
+            slots = (slots[waiting] + 1) & int(self.mask)
+
+    def find(self, markings):
+        rows = self.rows(markings)
+        hashes = _hash(rows)
+        states = np.full(len(rows), -1, dtype=np.int64)
+        slots = (hashes & self.mask).astype(np.int64)
+        pending = np.arange(len(rows))
+        while pending.size:
+            candidates = self.table[slots[pending]] - 1
+            occupied = candidates >= 0
+            match = np.zeros(len(pending), dtype=bool)
+            match[occupied] = self.hashes.array[candidates[occupied], 0] == hashes[pending[occupied]]
+            match[match] = (self.markings[candidates[match]] == rows[pending[match]]).all(axis=1)
+            states[pending[match]] = candidates[match]
+            # the markings go on probing until they meet an empty slot or themselves
+            pending = pending[occupied & ~match]
+            slots[pending] = (slots[pending] + 1) & int(self.mask)
+        return states
+
+    def extend(self, markings):
+        state = len(self)
+        rows = self.rows(markings)
+        self.markings.extend(rows)
+        self.hashes.extend(_hash(rows))
+        if 2 * len(self) > len(self.table):
+            self.resize(4 * len(self))
+        else:
+            self.insert(np.arange(state, len(self), dtype=np.int64))
+        return state
+
+    def close(self):
+        self.hashes.close()
+        del self.table
+        super(MmapVisitedSet, self).close()
+
+
+class SortedRunsVisitedSet(_DiskVisitedSet):
+    """ Visited set with delayed duplicate detection: the markings are never looked up one by one. The breadth first
+        exploration gives all the successors of a level to :func:`find <petrinet_simulator.VisitedSet.find>`, and the
+        batch is sorted once and merged with each sorted run of visited markings: a run is read in the order of its
+        keys, chunk by chunk, and only the chunks whose keys range holds markings of the batch are read. The new
+        markings of a level are added at once as a sorted batch. The batches are kept in memory until they hold
+        ``bufferSize`` markings, then they are written as a run in a file. The runs are merged, chunk by chunk, so that
+        each run is at least twice as big as the next one: there are at most ``log2(n)`` runs of ``n`` markings.
+
+        The memory used holds the sorted batches not written yet, the first key of each chunk of the runs and the
+        batch being looked up.
+
+        :param nbPlaces: number of places of the markings
+        :type nbPlaces: int
+
+        * options:
+
+            * ``directory = None``: directory of the files, created if it doesn't exist. If None, a
+                                    temporary directory, removed by :func:`close <petrinet_simulator.VisitedSet.close>`
+            * ``bufferSize = 1 << 20``: maximal number of markings kept in memory before being written in a run
+            * ``chunkSize = 1 << 16``: number of markings of each run read at once when looking up a batch or merging
+                                       two runs
+    """
+    batched = True
+
+    def __init__(self, nbPlaces, directory=None, bufferSize=1 << 20, chunkSize=1 << 16):
+        super(SortedRunsVisitedSet, self).__init__(nbPlaces, directory=directory)
+        self.bufferSize = bufferSize
+        self.chunkSize = chunkSize
+        self.buffer = []
+        """ List of the sorted batches (keys, states) of the markings which haven't been written in a run yet, from the
+            biggest to the smallest
+        """
+        self.runs = []
+        """ List of the runs (path, keys, states, fences), from the biggest to the smallest. The keys are the sorted
+            markings, each marking being seen as a string of big endian integers, so that the order of the keys is the
+            lexicographic one of the markings. The fences are the first key of each chunk, kept in memory
+        """
+        self.count = 0
+
+    def keys(self, rows):
+        return rows.astype('>i8').view(np.dtype((np.void, 8 * max(self.nbPlaces, 1)))).ravel() if self.nbPlaces \
+            else np.zeros(len(rows), dtype=np.dtype((np.void, 8)))
+
+    def search(self, keys, run_keys, run_states):
+        """ :returns: the states of the sorted ``keys`` in the sorted ``run_keys``, -1 for the missing ones
+        """
+        positions = np.minimum(np.searchsorted(run_keys, keys), len(run_keys) - 1)
+        return np.where(run_keys[positions] == keys, run_states[positions], -1)
+
+    def searchRun(self, keys, run):
+        """ :returns: the states of the sorted ``keys`` in ``run``, -1 for the missing ones. Only the chunks of the run
+                      holding keys are read, in their order
+        """
+        _, run_keys, run_states, fences = run
+        states = np.full(len(keys), -1, dtype=np.int64)
+        chunks = np.searchsorted(fences, keys, side='right') - 1
+        bounds = np.flatnonzero(np.diff(chunks)) + 1
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(keys)]):
+            if chunks[start] < 0:
+                # before the first key of the run
+                continue
+            first = chunks[start] * self.chunkSize
+            last = min(first + self.chunkSize, len(run_keys))
+            states[start:end] = self.search(keys[start:end], np.asarray(run_keys[first:last]),
+                                            np.asarray(run_states[first:last]))
+        return states
+
+    def find(self, markings):
+        keys = self.keys(self.rows(markings))
+        order = np.argsort(keys, kind='mergesort')
+        keys = keys[order]
+        found = np.full(len(keys), -1, dtype=np.int64)
+        pending = np.arange(len(keys))
+        for run in self.runs + [(None,) + batch + (None,) for batch in self.buffer]:
+            if not pending.size:
+                break
+            if run[0] is None:
+                states = self.search(keys[pending], run[1], run[2])
+            else:
+                states = self.searchRun(keys[pending], run)
+            found[pending] = states
+            pending = pending[states < 0]
+
+        states = np.empty(len(keys), dtype=np.int64)
+        states[order] = found
+        return states
+
+    def extend(self, markings):
+        state = len(self)
+        if not len(markings):
+            return state
+        rows = self.rows(markings)
+        self.markings.extend(rows)
+        keys = self.keys(rows)
+        order = np.argsort(keys, kind='mergesort')
+        self.buffer.append((keys[order], np.arange(state, state + len(rows), dtype=np.int64)[order]))
+        while len(self.buffer) > 1 and len(self.buffer[-1][0]) * 2 > len(self.buffer[-2][0]):
+            self.buffer[-2:] = [self.mergeBatches(*self.buffer[-2:])]
+        if sum(len(keys) for keys, _ in self.buffer) >= self.bufferSize:
+            self.flush()
+        return state
+
+    def mergeBatches(self, batch, other):
+        """ :returns: the sorted batch (keys, states) of the markings of two sorted batches
+        """
+        keys, states = np.concatenate([batch[0], other[0]]), np.concatenate([batch[1], other[1]])
+        order = np.argsort(keys, kind='mergesort')
+        return keys[order], states[order]
+
+    def flush(self):
+        """ Write the sorted batches in a new run, and merge the last runs
+        """
+        if not self.buffer:
+            return
+        keys, states = reduce(self.mergeBatches, self.buffer)
+        self.runs.append(self.writeRun(keys, states))
+        self.buffer = []
+        while len(self.runs) > 1 and len(self.runs[-1][1]) * 2 > len(self.runs[-2][1]):
+            self.runs[-2:] = [self.mergeRuns(*self.runs[-2:])]
+
+    def newRun(self):
+        self.count += 1
+        return os.path.join(self.directory, 'run%s' % self.count)
+
+    def writeRun(self, keys, states):
+        # the keys and states are written in two files, read through memory maps
+        path = self.newRun()
+        np.save(path + '.keys.npy', keys.view('>i8').reshape(len(keys), -1))
+        np.save(path + '.states.npy', states)
+        return self.loadRun(path)
+
+    def loadRun(self, path):
+        keys = np.load(path + '.keys.npy', mmap_mode='r')
+        keys = keys.view(np.dtype((np.void, keys.shape[1] * 8))).ravel()
+        return path, keys, np.load(path + '.states.npy', mmap_mode='r'), np.array(keys[::self.chunkSize])
+
+    def removeRun(self, run):
+        for extension in ('.keys.npy', '.states.npy'):
+            os.remove(run[0] + extension)
+
+    def mergeRuns(self, run, other):
+        """ Merge two runs chunk by chunk, without loading them in memory
+
+            :returns: the merged run
+        """
+        path = self.newRun()
+        _, run_keys, run_states, _ = run
+        _, other_keys, other_states, _ = other
+        size = len(run_keys) + len(other_keys)
+        width = run_keys.dtype.itemsize // 8
+        keys = np.lib.format.open_memmap(path + '.keys.npy', mode='w+', dtype='>i8', shape=(size, width))
+        states = np.lib.format.open_memmap(path + '.states.npy', mode='w+', dtype=np.int64, shape=(size,))
+        keys_ = keys.view(np.dtype((np.void, width * 8))).ravel()
+
+        i, j, k = 0, 0, 0
+        while i < len(run_keys) or j < len(other_keys):
+            chunk, other_chunk = run_keys[i:i + self.chunkSize], other_keys[j:j + self.chunkSize]
+            # only the keys up to the smallest last key of the chunks can be written: the next keys of the run whose
+            # chunk ends with the biggest key may be smaller than its last key
+            end, other_end = len(chunk), len(other_chunk)
+            if i + end < len(run_keys) and (j + other_end == len(other_keys) or
+                                            chunk[-1].tobytes() < other_chunk[-1].tobytes()):
+                other_end = np.searchsorted(other_chunk, chunk[-1:])[0]
+            elif j + other_end < len(other_keys):
+                end = np.searchsorted(chunk, other_chunk[-1:])[0]
+            merged = np.concatenate([chunk[:end], other_chunk[:other_end]])
+            order = np.argsort(merged, kind='mergesort')
+            n = len(merged)
+            keys_[k:k + n] = merged[order]
+            states[k:k + n] = np.concatenate([run_states[i:i + end], other_states[j:j + other_end]])[order]
+            i, j, k = i + end, j + other_end, k + n
+        keys.flush()
+        states.flush()
+        del keys, keys_, states
+
+        self.removeRun(run)
+        self.removeRun(other)
+        return self.loadRun(path)
+
+    def close(self):
+        self.runs = []
+        self.buffer = []
+        super(SortedRunsVisitedSet, self).close()
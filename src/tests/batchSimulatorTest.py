@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:03:18 2026
+
+@author: Mickael Grima
+"""
+
+import sys
+sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
+
+import unittest
+import numpy as np
+from TimePlace import TimePlace
+from TimeTransition import TimeTransition
+from TimePetrinet import TimePetriNet
+from TimeToken import TimeToken
+from BatchSimulator import BatchSimulator
+
+
+class BatchSimulatorTest(unittest.TestCase):
+    """ test the batch simulation on a two steps chain sharing a resource
+    """
+    def setUp(self):
+        self.a, self.b = TimePlace(name='a', time=1.0), TimePlace(name='b', time=2.0)
+        self.c, self.r = TimePlace(name='c'), TimePlace(name='r')
+        self.t0, self.t1 = TimeTransition(name='t0', time=3.0), TimeTransition(name='t1', time=1.0)
+
+        self.pn = TimePetriNet(name='pn')
+        self.pn.addInput(self.a, self.t0)
+        self.pn.addInput(self.r, self.t0)
+        self.pn.addOutput(self.b, self.t0)
+        self.pn.addInput(self.b, self.t1)
+        self.pn.addOutput(self.c, self.t1)
+        self.pn.addOutput(self.r, self.t1)
+
+    def markings(self, *tokens):
+        markings = np.zeros((len(tokens), 4), dtype=int)
+        simulator = BatchSimulator(self.pn, runs=len(tokens))
+        markings[:, simulator.places.index(self.a)] = tokens
+        markings[:, simulator.places.index(self.r)] = 1
+        return markings
+
+    def testSimulation(self):
+        simulator = BatchSimulator(self.pn, runs=3, markings=self.markings(1, 2, 3))
+        statistics = simulator.simulation()
+
+        self.assertEqual(list(simulator.clock), [7.0, 13.0, 19.0])
+        self.assertEqual(statistics['blocked'], 3)
+        self.assertEqual(statistics['completionTime']['mean'], 13.0)
+        self.assertEqual(statistics['firings'][self.t0], 2.0)
+        self.assertEqual(list(simulator.marking[:, simulator.places.index(self.c)]), [1, 2, 3])
+        self.assertEqual(simulator.trace(1), [(self.t0, 4.0), (self.t1, 7.0), (self.t0, 10.0), (self.t1, 13.0)])
+
+    def testDurations(self):
+        transitionTimes = [[3.0, 1.0], [6.0, 1.0]]
+        if BatchSimulator(self.pn).transitions[0] is not self.t0:
+            transitionTimes = [times[::-1] for times in transitionTimes]
+        simulator = BatchSimulator(self.pn, runs=2, markings=self.markings(1, 1), transitionTimes=transitionTimes)
+        simulator.simulation()
+        self.assertEqual(list(simulator.clock), [7.0, 10.0])
+
+        simulator.reinitialized()
+        simulator.simulation(niter=1)
+        self.assertEqual(list(simulator.steps), [1, 1])
+        self.assertTrue(simulator.has_next())
+
+    def testResourceUnits(self):
+        """ a resource with two units: the tokens of a place keep their own availability
+        """
+        self.pn.addToken(self.a, *[TimeToken() for i in range(3)])
+        self.pn.addToken(self.r, TimeToken(), TimeToken())
+        simulator = BatchSimulator(self.pn, capacity=1)
+        simulator.simulation()
+
+        firings = sorted((e.clock, self.pn.transitions[e.transition].name) for e in self.pn.simulate_iter())
+        self.assertEqual(sorted((time, t.name) for t, time in simulator.trace(0)), firings)
+        self.assertEqual(simulator.clock[0], 13.0)
+        self.assertEqual(list(simulator.marking[0]), [len(p.token) for p in simulator.places])
+
+    def testWrongShape(self):
+        self.assertRaises(ValueError, BatchSimulator, self.pn, runs=2, markings=np.zeros((3, 4)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:12:41 2026
+
+@author: Mickael Grima
+"""
+
+import sys
+sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
+
+import random
+import unittest
+from Token import Token
+from Place import Place
+from Transition import Transition
+from Petrinet import PetriNet
+
+
+class CompiledPetriNetTest(unittest.TestCase):
+    """ test the compiled petriNet on a chain petriNet
+    """
+    def setUp(self):
+        self.places = [Place(name='p%s' % i) for i in range(4)]
+        self.transitions = [Transition(name='t%s' % i) for i in range(3)]
+        self.pn = PetriNet(name='chain')
+        for i, t in enumerate(self.transitions):
+            self.pn.addInput(self.places[i], t)
+            self.pn.addOutput(self.places[i + 1], t, tok=2)
+        self.pn.addToken(self.places[0], Token(), Token())
+
+    def index(self, compiled, place):
+        return compiled.places.index(place)
+
+    def testStructure(self):
+        compiled = self.pn.compile()
+        self.assertEqual(compiled.pre.shape, (4, 3))
+        for i, t in enumerate(self.transitions):
+            c = compiled.transitions.index(t)
+            self.assertEqual(compiled.pre[self.index(compiled, self.places[i]), c], 1)
+            self.assertEqual(compiled.post[self.index(compiled, self.places[i + 1]), c], 2)
+            self.assertEqual(compiled.pre[:, c].sum(), 1)
+        self.assertEqual(compiled.marking[self.index(compiled, self.places[0])], 2)
+
+    def testFire(self):
+        compiled = self.pn.compile()
+        enabled = compiled.enabledTransitionsSet()
+        self.assertEqual([compiled.transitions[t] for t in enabled.nonzero()[0]], [self.transitions[0]])
+
+        t0 = compiled.transitions.index(self.transitions[0])
+        marking = compiled.fire(t0, compiled.marking)
+        self.assertEqual(compiled.marking[self.index(compiled, self.places[0])], 2)
+        self.assertEqual(marking[self.index(compiled, self.places[1])], 2)
+        self.assertRaises(ValueError, compiled.fire, compiled.transitions.index(self.transitions[1]))
+
+    def testSimulation(self):
+        compiled = self.pn.compile()
+        fired = list(compiled.simulation())
+        self.assertEqual(len(fired), 2 + 4 + 8)
+        self.assertTrue(compiled.isBlocked())
+        self.assertEqual(compiled.marking[self.index(compiled, self.places[3])], 16)
+
+        compiled.reinitialized()
+        self.assertEqual(len(list(compiled.simulation(niter=3))), 3)
+
+    def testPetriNetSimulation(self):
+        """ a plain petriNet is simulated on the compiled form and the marking is written back
+        """
+        self.assertTrue(self.pn.isPlain())
+        self.pn.simulation(show=False)
+        self.assertEqual([len(p.token) for p in self.places], [0, 0, 0, 16])
+        self.assertTrue(self.pn.isBlocked())
+
+        tok = Token()
+        tok.addPriority(self.places[3], self.transitions[0])
+        self.pn.addToken(self.places[3], tok)
+        self.assertFalse(self.pn.isPlain())
+
+    def testEmptyPetriNet(self):
+        """ a petriNet without transition is plain and its simulation does nothing
+        """
+        pn = PetriNet(name='empty')
+        pn.addPlace(Place(name='p'))
+        self.assertEqual(list(pn.compile().simulation()), [])
+        pn.simulation(show=False)
+
+    def testConflict(self):
+        """ the compiled simulation resolves the conflicts as the not plain version of the petriNet
+        """
+        places = [Place(name='p%s' % i) for i in range(4)]
+        transitions = [Transition(name='t%s' % i) for i in range(3)]
+        pn = PetriNet(name='conflict')
+        pn.addInput(places[0], transitions[0])
+        pn.addOutput(places[1], transitions[0])
+        for i in (1, 2):
+            pn.addInput(places[1], transitions[i])
+            pn.addOutput(places[i + 1], transitions[i])
+        pn.addToken(places[0], Token(), Token(), Token())
+        snapshot = pn.snapshot()
+
+        # t0 fires alone, then t0, t1 and t2 are enabled
+        self.assertEqual(list(pn.compile().simulation(untilChoice=True)), [transitions[0].index])
+
+        # the transition with the highest index fires first
+        compiled = pn.compile()
+        self.assertEqual(list(compiled.simulation()), [0, 2, 0, 2, 0, 2])
+        self.assertEqual(list(compiled.marking), [0, 0, 0, 3])
+
+        fired = []
+        for event in pn.simulate_iter():
+            fired.append(event.transition)
+        pn.restore(snapshot)
+        recorder = Recorder()
+        pn.simulation(show=False, trace=recorder)
+        self.assertEqual(recorder.steps, range(len(fired)))
+        self.assertEqual(recorder.transitions, fired)
+        self.assertEqual([len(p.token) for p in places], [0, 0, 0, 3])
+
+    def testRandomConflicts(self):
+        """ the compiled simulation and the not plain version fire the same transitions on random petriNets
+        """
+        rand = random.Random(0)
+        for k in range(20):
+            places = [Place(name='p%s' % i) for i in range(4)]
+            transitions = [Transition(name='t%s' % i) for i in range(5)]
+            pn = PetriNet(name='random%s' % k)
+            for t in transitions:
+                pn.addInput(rand.choice(places), t, tok=rand.randint(1, 2))
+                pn.addOutput(rand.choice(places), t, tok=rand.randint(1, 2))
+            for p in places:
+                pn.addToken(p, *[Token() for i in range(rand.randint(0, 3))])
+            snapshot = pn.snapshot()
+
+            fired = [event.transition for event in pn.simulate_iter(niter=30)]
+            marking = [len(p.token) for p in pn.places]
+            pn.restore(snapshot)
+            recorder = Recorder()
+            pn.simulation(show=False, niter=30, trace=recorder)
+            self.assertEqual(recorder.transitions, fired)
+            self.assertEqual([len(p.token) for p in pn.places], marking)
+
+class Recorder(object):
+    """ record the firings of a simulation as a :class:`TraceRecorder <petrinet_simulator.TraceRecorder>`
+    """
+    def __init__(self):
+        self.steps, self.transitions = [], []
+
+    def record(self, step, clock, transition):
+        self.steps.append(step)
+        self.transitions.append(transition)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:27:14 2026
+
+@author: Mickael Grima
+"""
+
+import sys
+sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
+
+import unittest
+from Place import Place
+from Transition import Transition
+from Invariants import incidence, semiflows
+from utils.builder import build_small_petrinet
+from reachabilityTest import mutex
+
+
+class InvariantsTest(unittest.TestCase):
+    def testIncidence(self):
+        pn = build_small_petrinet()
+        # t0 gives back the token it takes on p0
+        self.assertEqual(incidence(pn), [{1: -1}, {1: 2, 2: -1, 3: -1}, {2: 1, 4: -1}, {3: 1, 4: -1}])
+
+    def testSemiflows(self):
+        self.assertEqual(semiflows([{0: 1}, {0: -1}, {0: 2, 1: 1}, {1: -1}]), [{0: 1, 1: 1}, {1: 2, 2: 1, 3: 1}])
+        self.assertEqual(semiflows([{0: 1}, {0: 1}]), [])
+        self.assertEqual(semiflows([{}, {0: 1}]), [{0: 1}])
+
+    def testMutex(self):
+        pn = mutex(3)
+        lock = pn.getPlace('lock')
+        invariants = pn.pInvariants()
+        self.assertEqual(len(invariants), 4)
+        # each process is idle or critical, and the lock is taken by at most one of them
+        for i in range(3):
+            self.assertIn({pn.getPlace('idle%s' % i): 1, pn.getPlace('critical%s' % i): 1}, invariants)
+        mutual = {lock: 1}
+        mutual.update({pn.getPlace('critical%s' % i): 1 for i in range(3)})
+        self.assertIn(mutual, invariants)
+        for marking in pn.reachabilityGraph().markings:
+            for invariant in invariants:
+                self.assertEqual(sum(nb * marking[place.index] for place, nb in invariant.iteritems()), 1)
+
+        self.assertEqual(sorted(sorted(t.name for t in invariant) for invariant in pn.tInvariants()),
+                         [['enter%s' % i, 'leave%s' % i] for i in range(3)])
+
+    def testCache(self):
+        pn = mutex(2)
+        invariants = pn.pInvariants()
+        self.assertIs(pn.pInvariants(), invariants)
+
+        # a third process without the lock
+        idle, critical, enter = Place(name='idle2'), Place(name='critical2'), Transition(name='enter2')
+        pn.addInput(idle, enter)
+        pn.addOutput(critical, enter)
+        self.assertEqual(pn.invariants, {})
+        self.assertEqual(len(pn.pInvariants()), 4)
+        self.assertEqual(len(pn.tInvariants()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
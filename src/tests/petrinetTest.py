@@ -10,6 +10,11 @@ sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
 
 import unittest
 from Token import Token
+from Place import Place
+from TimePlace import TimePlace
+from TimeTransition import TimeTransition
+from TimeToken import TimeToken
+from TimePetrinet import TimePetriNet
 from utils.builder import (
     build_small_petrinet,
     build_chain_petrinet,
@@ -26,26 +31,31 @@ class Test(unittest.TestCase):
         self.pn.addToken(self.pn.getPlace('p2'), Token(name='token2'))
 
         self.chain_pn = build_chain_petrinet()
-        self.places = sorted(self.pn.places.iterkeys(), key=lambda p: p.name)
-        self.transitions = sorted(self.pn.transitions.iterkeys(), key=lambda t: t.name)
+        self.places = sorted(self.pn.places, key=lambda p: p.name)
+        self.transitions = sorted(self.pn.transitions, key=lambda t: t.name)
 
     def testStructure(self):
         self.assertEqual(self.pn.name, 'pn1', msg='False name')
         self.assertEqual(len(self.pn.places), 4, msg='Wrong number of places')
         self.assertEqual(len(self.pn.transitions), 5, msg='Wrong number of transitions')
 
-        for place, rank in self.pn.places.iteritems():
+        for rank, place in enumerate(self.pn.places):
             self.assertEqual(place.name, 'p%s' % rank)
-        for transition, rank in self.pn.transitions.iteritems():
+            self.assertEqual(place.index, rank)
+        for rank, transition in enumerate(self.pn.transitions):
             self.assertEqual(transition.name, 't%s' % rank)
+            self.assertEqual(transition.index, rank)
 
         for place in self.pn.places:
-            self.assertIn(place, self.pn.inputs)
-            self.assertIn(place, self.pn.outputs)
+            self.assertTrue(self.pn.inputs[place.index])
+            self.assertTrue(self.pn.outputs[place.index])
         for transition in self.pn.transitions:
             if transition.name != 't4':
-                self.assertIn(transition, self.pn.downplaces)
-            self.assertIn(transition, self.pn.upplaces)
+                self.assertTrue(self.pn.downplaces[transition.index])
+            self.assertTrue(self.pn.upplaces[transition.index])
+        self.assertEqual(self.pn.upplaces[1], {0: 1})
+        self.assertEqual(self.pn.downplaces[1], {1: 2})
+        self.assertEqual(self.pn.token, [2, 0, 1, 0])
 
     def testGetEnabledToken(self):
         tokens = [tok for tok in self.pn.getEnabledToken(self.places[0], self.transitions[0])]
@@ -60,7 +70,7 @@ class Test(unittest.TestCase):
 
         ets = pn.enabledTransitionsSet()
         for i in range(len(pn.places)):
-            for place, rank in pn.places.iteritems():
+            for rank, place in enumerate(pn.places):
                 if rank == i:
                     self.assertIn('tok0', map(lambda tok: tok.name, place.token))
                 else:
@@ -68,6 +78,191 @@ class Test(unittest.TestCase):
             self.assertIn('t%s' % i, map(lambda tr: tr.name, ets.iterkeys()))
             pn.oneFireSimulation(ets)
 
+    def testTokenQueue(self):
+        """ Does a transition fire first the tokens whose names are in its tokenQueue?
+        """
+        pn = build_chain_petrinet(size=2)
+        p0, p1, t0 = pn.getPlace('p0'), pn.getPlace('p1'), pn.getTransition('t0')
+        pn.addToken(p0, Token(name='tok0'), Token(name='tok1_tok2'))
+
+        pn.insertTokenQueue(t0, 'tok3')
+        self.assertFalse(pn.isEnabled(t0))
+
+        t0.tokenQueue = []
+        pn.insertTokenQueue(t0, 'tok2')
+        self.assertTrue(pn.isEnabled(t0))
+        pn.fire(t0, pn.enabledTransitionsSet())
+        self.assertEqual(map(lambda tok: tok.name, p1.token), ['tok1_tok2'])
+        self.assertEqual(map(lambda tok: tok.name, p0.token), ['tok0'])
+        self.assertFalse(t0.tokenQueue)
+
+    def testSnapshot(self):
+        """ Does restore bring back the tokens, the counters and the token queues of a snapshot?
+        """
+        pn = build_chain_petrinet(size=3)
+        p0, p2, t0 = pn.getPlace('p0'), pn.getPlace('p2'), pn.getTransition('t0')
+        pn.addToken(p0, Token(name='tok0'))
+        pn.insertTokenQueue(t0, 'tok0')
+        pn.snapshot(name='start')
+
+        pn.simulation(show=False)
+        self.assertFalse(p0.token)
+        self.assertFalse(t0.tokenQueue)
+
+        pn.restore('start')
+        self.assertEqual(map(lambda tok: tok.name, p0.token), ['tok0'])
+        self.assertEqual(t0.tokenQueue, [['tok0']])
+        self.assertEqual(pn.enabledTransitionsSet(), {t0: t0.index})
+
+        pn.fire(t0, pn.enabledTransitionsSet())
+        snapshot = pn.snapshot()
+        pn.restore('start')
+        pn.restore(snapshot)
+        self.assertFalse(p0.token)
+        self.assertEqual(pn.token[pn.getPlace('p1').index], 1)
+
+        # the initial state was taken by the first simulation
+        pn.simulation(show=False)
+        pn.reinitialized()
+        self.assertEqual(map(lambda tok: tok.name, p0.token), ['tok0'])
+        self.assertFalse(p2.token)
+        self.assertIsNone(pn.initialState)
+
+        self.assertRaises(ValueError, pn.restore, 'end')
+        pn.addPlace(Place(name='p'))
+        self.assertRaises(ValueError, pn.restore, snapshot)
+
+    def testTimeSnapshot(self):
+        """ Does restore bring back the clocks of a TimePetriNet?
+        """
+        a, b = TimePlace(name='a', time=1.0), TimePlace(name='b')
+        t = TimeTransition(name='t', time=2.0)
+        pn = TimePetriNet(name='pn')
+        pn.addInput(a, t)
+        pn.addOutput(b, t)
+        pn.addToken(a, TimeToken(), TimeToken())
+
+        pn.simulation(show=False, niter=1)
+        self.assertEqual(pn.currentClock, 3.0)
+        pn.snapshot(name='middle')
+        pn.simulation(show=False)
+        self.assertEqual(pn.currentClock, 5.0)
+
+        pn.restore('middle')
+        self.assertEqual(pn.currentClock, 3.0)
+        pn.simulation(show=False)
+        self.assertEqual(pn.currentClock, 5.0)
+        self.assertEqual(len(b.token), 2)
+
+        pn.reinitialized()
+        self.assertEqual(pn.currentClock, 0.0)
+        self.assertEqual(len(a.token), 2)
+
+    def testSimulateIter(self):
+        """ Are the firings generated one by one, and only when they are asked?
+        """
+        pn = build_chain_petrinet(size=3)
+        p0, p1 = pn.getPlace('p0'), pn.getPlace('p1')
+        t0, t1 = pn.getTransition('t0'), pn.getTransition('t1')
+        token = Token(name='tok0')
+        pn.addToken(p0, token)
+
+        events = pn.simulate_iter()
+        event = next(events)
+        self.assertEqual(event[:3], (0, None, t0.index))
+        self.assertEqual(event.consumed, (id(token),))
+        self.assertEqual(event.produced, tuple(id(tok) for tok in p1.token))
+        # the next firing hasn't been done yet
+        self.assertEqual(len(p1.token), 1)
+        self.assertEqual([(e.step, e.transition) for e in events], [(1, t1.index), (2, t1.index + 1)])
+
+        # the Simulator protocol
+        pn.reinitialize()
+        self.assertTrue(pn.has_next())
+        self.assertEqual(pn.next().transition, t0.index)
+        self.assertEqual(pn.next().transition, t1.index)
+        self.assertTrue(pn.has_next())
+        pn.next()
+        self.assertFalse(pn.has_next())
+        self.assertIsNone(pn.next())
+        pn.reinitialize()
+        self.assertEqual(map(lambda tok: tok.name, p0.token), ['tok0'])
+        self.assertEqual(pn.next().step, 0)
+
+        # the clock of a TimePetriNet
+        a, b = TimePlace(name='a', time=1.0), TimePlace(name='b')
+        t = TimeTransition(name='t', time=2.0)
+        pn = TimePetriNet(name='pn')
+        pn.addInput(a, t)
+        pn.addOutput(b, t)
+        pn.addToken(a, TimeToken(), TimeToken())
+        self.assertEqual([event.clock for event in pn.simulate_iter()], [3.0, 5.0])
+        pn.reinitialized()
+        self.assertEqual([event.clock for event in pn.simulate_iter(step=2)], [4.0, 6.0])
+        self.assertEqual(pn.currentClock, 6.0)
+        self.assertRaises(ValueError, next, pn.simulate_iter(step=0))
+
+        # a token that never becomes available: the steps stop
+        pn.reinitialized()
+        c = TimePlace(name='c', time=float('inf'))
+        pn.addInput(c, t)
+        pn.addToken(c, TimeToken())
+        self.assertEqual(list(pn.simulate_iter(step=2)), [])
+
+    def testEventQueue(self):
+        """ Are the transitions fired in the order of their firing dates, computed again when the tokens change?
+        """
+        pn = TimePetriNet(name='pn')
+        places = [TimePlace(name='p%s' % i) for i in range(3)]
+        transitions = [TimeTransition(name='t%s' % i, time=float(3 - i)) for i in range(3)]
+        for p, t in zip(places, transitions):
+            pn.addInput(p, t)
+            pn.addToken(p, TimeToken())
+        # t2 puts a token back on p0, which waits until t0 has fired the first one
+        pn.addOutput(places[0], transitions[2])
+
+        ets = pn.enabledTransitionsSet()
+        fired = []
+        while ets:
+            duration, transition = pn.oneFireSimulation(ets)
+            pn.currentClock += duration
+            fired.append((transition.name, pn.currentClock))
+        self.assertEqual(fired, [('t2', 1.0), ('t1', 2.0), ('t0', 3.0), ('t0', 6.0)])
+
+        # the times are modified: the event queue has to be invalidated
+        pn.addToken(places[1], TimeToken())
+        transitions[1].time = 0.5
+        self.assertEqual(pn.oneFireSimulation(pn.enabledTransitionsSet())[0], 2.0)
+        pn.addToken(places[1], TimeToken())
+        pn.invalidateSchedule()
+        self.assertEqual(pn.oneFireSimulation(pn.enabledTransitionsSet())[0], 0.5)
+
+    def testAbsoluteClocks(self):
+        """ Are the clocks of the tokens absolute dates, not modified by the firings of other transitions?
+        """
+        a, b, c = TimePlace(name='a', time=1.0), TimePlace(name='b'), TimePlace(name='c', time=10.0)
+        t0 = TimeTransition(name='t0', time=2.0, minimumStartingTime=5.0)
+        t1 = TimeTransition(name='t1', time=1.0)
+        pn = TimePetriNet(name='pn')
+        pn.addInput(a, t0)
+        pn.addOutput(b, t0)
+        pn.addInput(c, t1)
+        idle = TimeToken()
+        pn.addToken(a, TimeToken())
+        pn.addToken(c, idle)
+
+        # t0 waits for its minimum starting time, then for its own time
+        ets = pn.enabledTransitionsSet()
+        duration, transition = pn.oneFireSimulation(ets)
+        pn.currentClock += duration
+        self.assertEqual((transition, pn.currentClock), (t0, 7.0))
+        self.assertEqual(b.token[0].pclock, 7.0)
+        self.assertEqual((idle.pclock, idle.tclock[t1]), (10.0, 0.0))
+
+        duration, transition = pn.oneFireSimulation(ets)
+        pn.currentClock += duration
+        self.assertEqual((transition, pn.currentClock), (t1, 11.0))
+
     def testSimulationSimpleConflictsPetrinet(self):
         """ Test token priority: on one place has a token two transition choices. We impose one choice
         """
@@ -82,6 +277,160 @@ class Test(unittest.TestCase):
         self.assertFalse(pn.getPlace('p0').token)
         self.assertFalse(pn.getPlace('p2').token)
 
+    def testConflicts(self):
+        pn = build_simple_conflicts()
+        p0, p1, p2 = pn.places
+        t0, t1 = pn.transitions
+        self.assertTrue(pn.isInStructuralConflict(t0, t1))
+        self.assertTrue(pn.isAllInStructuralConflict([t0, t1]))
+        self.assertFalse(pn.isAllInStructuralConflict([t0]))
+        self.assertEqual(pn.conflictPlaces(t0, t1), {p0: 1})
+        self.assertEqual(pn.AllConflictPlaces([t0, t1]), {p0: 1})
+
+        index = pn.getStructuralIndex()
+        self.assertEqual((index.consumers, index.producers, index.conflicts), ((3, 0, 0), (0, 1, 2), (3, 3)))
+        self.assertIs(pn.getStructuralIndex(), index)
+
+        # one token for two transitions
+        pn.addToken(p0, Token())
+        self.assertTrue(pn.isAllInBehavioralConflict([t0, t1]))
+        pn.addToken(p0, Token())
+        self.assertFalse(pn.isInBehavioralConflict(t0, t1))
+
+        # the index is computed again after a change of the structure
+        pn.removeInput(p0, t1)
+        self.assertIsNone(pn.structuralIndex)
+        self.assertFalse(pn.isInStructuralConflict(t0, t1))
+        self.assertFalse(pn.isAllInBehavioralConflict([t0, t1]))
+        pn.addInput(p1, t1)
+        pn.addOutput(p1, t0)
+        self.assertEqual(pn.getStructuralIndex().causes, (2, 0))
+
+    def assertEnabledIndex(self, pn):
+        """ Compare the incremental enabling index of ``pn`` with a full rescan of the tokens
+        """
+        enabledTokens = [{t: len([tok for tok in place.token if tok.isEnabled(place, pn.transitions[t])])
+                          for t in pn.inputs[place.index]} for place in pn.places]
+        satisfiedInputs = [len([p for p, nb in pn.upplaces[t].iteritems() if enabledTokens[p][t] >= nb])
+                           for t in range(len(pn.transitions))]
+        readyTransitions = {transition: transition.index for transition in pn.transitions
+                            if satisfiedInputs[transition.index] == len(pn.upplaces[transition.index])}
+        self.assertEqual(pn.enabledTokens, enabledTokens)
+        self.assertEqual(list(pn.satisfiedInputs), satisfiedInputs)
+        self.assertEqual(pn.readyTransitions, readyTransitions)
+
+    def testEnabledIndex(self):
+        pn = build_simple_conflicts()
+        p0 = pn.places[0]
+        t0, t1 = pn.transitions
+        p3 = Place(name='p3')
+        pn.addInput(p3, t0, tok=2)
+        a, b, c = Token(name='a'), Token(name='b'), Token(name='c')
+        self.assertEnabledIndex(pn)
+
+        pn.addToken(p0, a)
+        self.assertEnabledIndex(pn)
+        self.assertEqual(pn.readyTransitions, {t1: t1.index})
+        pn.addToken(p3, b)
+        self.assertEnabledIndex(pn)
+        pn.addToken(p3, c)
+        self.assertEnabledIndex(pn)
+        self.assertEqual(pn.readyTransitions, {t0: t0.index, t1: t1.index})
+
+        # a token that can't fire doesn't count anymore
+        pn.changeFireToken(p3, c, pn.enabledTransitionsSet())
+        self.assertEnabledIndex(pn)
+        self.assertEqual(pn.readyTransitions, {t1: t1.index})
+        pn.changeFireToken(p3, c, pn.enabledTransitionsSet())
+        self.assertEnabledIndex(pn)
+        pn.removeToken(p3, b)
+        self.assertEnabledIndex(pn)
+        self.assertEqual(pn.readyTransitions, {t1: t1.index})
+
+        # inputs added or removed on places holding tokens
+        pn.addInput(p3, t1, tok=3)
+        self.assertEnabledIndex(pn)
+        self.assertEqual(pn.readyTransitions, {})
+        pn.addToken(p3, b, Token(name='d'))
+        self.assertEnabledIndex(pn)
+        self.assertEqual(pn.readyTransitions, {t0: t0.index, t1: t1.index})
+        pn.removeInput(p3, t0)
+        self.assertEnabledIndex(pn)
+        pn.removeInput(p0, t1)
+        self.assertEnabledIndex(pn)
+        pn.removeToken(p3, c)
+        self.assertEnabledIndex(pn)
+        self.assertEqual(pn.readyTransitions, {t0: t0.index})
+
+        # a token already on a place gets a priority
+        a.addPriority(p0, t1, pref='priority')
+        pn.adapteEnabledTokens(p0)
+        self.assertEnabledIndex(pn)
+        self.assertEqual(pn.readyTransitions, {})
+        a.priority[p0]['pref'] = 'time'
+        a.addPriority(p0, t0)
+        pn.adapteEnabledTokens(p0)
+        self.assertEnabledIndex(pn)
+        self.assertEqual(pn.readyTransitions, {t0: t0.index})
+
+    def testPriorityQueues(self):
+        pn = build_simple_conflicts()
+        p0 = pn.places[0]
+        t0, t1 = pn.transitions
+        a, b, c, d = Token(name='a'), Token(name='b'), Token(name='c'), Token(name='d')
+        b.addPriority(p0, t1, t0)
+        c.addPriority(p0, t0, t1)
+        pn.addToken(p0, a, b, c, d)
+
+        # the tokens without priority on p0 come last, in their order of arrival
+        self.assertEqual(list(pn.getPrioritySortedToken(p0, t0)), [c, b, a, d])
+        self.assertEqual(list(pn.getPrioritySortedToken(p0, t1)), [b, c, a, d])
+        self.assertEqual(list(pn.getSortedNextFiredToken(p0, t0)), [c])
+
+        pn.removeToken(p0, c)
+        self.assertEqual(list(pn.getSortedNextFiredToken(p0, t0)), [b])
+        pn.changeFireToken(p0, b, pn.enabledTransitionsSet())
+        self.assertEqual(list(pn.getPrioritySortedToken(p0, t0)), [a, d])
+
+        # the queues are rebuilt when the priorities change
+        d.addPriority(p0, t0)
+        pn.adapteEnabledTokens(p0)
+        self.assertEqual(list(pn.getPrioritySortedToken(p0, t0)), [d, a])
+        self.assertEqual(list(pn.getPrioritySortedToken(p0, t1)), [a])
+
+        # the removed entries don't accumulate
+        for i in range(100):
+            token = Token(name=str(i))
+            pn.addToken(p0, token)
+            pn.removeToken(p0, token)
+        self.assertLessEqual(len(pn.priorityQueues[p0.index][t0.index]), 2 * len(p0.token) + 16)
+        self.assertEqual(list(pn.getPrioritySortedToken(p0, t0)), [d, a])
+
+    def testPreferences(self):
+        pn = build_simple_conflicts()
+        p0 = pn.places[0]
+        t0, t1 = pn.transitions
+        a, b = Token(name='a'), Token(name='b')
+        a.addPriority(p0, t1, t0)
+        pn.addToken(p0, a)
+        self.assertIs(pn.mostPriorityTransition(t0, t1), t1)
+        self.assertEqual(pn.preferences, {0: (None, 5.0), 1: (None, 10.0)})
+
+        # the preferences of the transitions down to p0 are computed again
+        b.addPriority(p0, t0)
+        pn.addToken(p0, b)
+        self.assertEqual(pn.preferences, {})
+        self.assertEqual(pn.pref(t0), 10.0)
+        pn.insertTokenQueue(t0, 'a')
+        self.assertEqual(pn.pref(t0), 5.0)
+        self.assertEqual(pn.preferences[0], (('a',), 5.0))
+
+        # the last transition is kept among the equal ones
+        pn.removeToken(p0, a, b)
+        self.assertIs(pn.mostPriorityTransition(t1, t0), t0)
+        self.assertIs(pn.mostPriorityTransition(t0, t1), t1)
+        self.assertIsNone(pn.mostPriorityTransition())
+
     def testSimulationParallelChainPetrinet(self):
         """ Test the fireheritance: a token could wait that another token hs been fired by a transition
             on a given place to have the right to be fired
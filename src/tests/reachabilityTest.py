@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 20:12:09 2026
+
+@author: Mickael Grima
+"""
+
+import sys
+sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
+
+import os
+import shutil
+import tempfile
+import unittest
+from Token import Token
+from Place import Place
+from Transition import Transition
+from Petrinet import PetriNet
+from Reachability import OMEGA
+from VisitedSet import MemoryVisitedSet, MmapVisitedSet, SortedRunsVisitedSet
+from utils.builder import build_chain_petrinet, build_parallel_chain_petrinet
+
+
+def mutex(processes=2):
+    """ ``processes`` processes entering a critical section protected by a mutex
+    """
+    pn = PetriNet(name='mutex')
+    lock = Place(name='lock')
+    for i in range(processes):
+        idle, critical = Place(name='idle%s' % i), Place(name='critical%s' % i)
+        enter, leave = Transition(name='enter%s' % i), Transition(name='leave%s' % i)
+        pn.addInput(idle, enter)
+        pn.addInput(lock, enter)
+        pn.addOutput(critical, enter)
+        pn.addInput(critical, leave)
+        pn.addOutput(idle, leave)
+        pn.addOutput(lock, leave)
+        pn.addToken(idle, Token())
+    pn.addToken(lock, Token())
+    return pn
+
+
+class ReachabilityTest(unittest.TestCase):
+    def testMutex(self):
+        pn = mutex(3)
+        graph = pn.reachabilityGraph()
+        self.assertEqual(len(graph), 4)
+        self.assertEqual(graph.edgeCount(), 6)
+        self.assertEqual(graph.deadlocks, [])
+        self.assertTrue(graph.complete)
+        self.assertTrue(graph.bounded)
+        self.assertEqual(set(graph.bounds), {1})
+        # only one process in the critical section
+        for marking in graph.markings:
+            self.assertLessEqual(sum(marking[pn.getPlace('critical%s' % i).index] for i in range(3)), 1)
+
+        # the depth first exploration finds the same markings
+        self.assertEqual(set(pn.reachabilityGraph(order='dfs').states), set(graph.states))
+
+    def testDeadlock(self):
+        pn = build_chain_petrinet(size=3)
+        pn.addToken(pn.getPlace('p0'), Token(), Token())
+        # the last transition consumes the tokens
+        graph = pn.reachabilityGraph()
+        self.assertEqual(len(graph), 10)
+        self.assertEqual(len(graph.deadlocks), 1)
+        deadlock = graph.deadlocks[0]
+        self.assertEqual(graph.markings[deadlock], (0, 0, 0))
+        self.assertEqual(len(graph.path(deadlock)), 6)
+        self.assertTrue(graph.bounded)
+
+        statistics = pn.reachabilityGraph(marking=[0, 1, 0]).statistics()
+        self.assertEqual((statistics['states'], statistics['edges'], statistics['deadlocks']), (3, 2, 1))
+        self.assertRaises(ValueError, pn.reachabilityGraph, marking=[1, 0])
+        self.assertRaises(ValueError, pn.reachabilityGraph, order='random')
+
+    def testUnbounded(self):
+        pn = PetriNet(name='unbounded')
+        p, q, t = Place(name='p'), Place(name='q'), Transition(name='t')
+        pn.addInput(p, t)
+        pn.addOutput(p, t)
+        pn.addOutput(q, t)
+        pn.addToken(p, Token())
+
+        graph = pn.reachabilityGraph(limit=10)
+        self.assertEqual(len(graph), 10)
+        self.assertFalse(graph.complete)
+        self.assertFalse(graph.bounded)
+        self.assertEqual(graph.bounds[q.index], 9)
+        self.assertFalse(pn.reachabilityGraph(limit=10, order='dfs').bounded)
+        visited = SortedRunsVisitedSet(2)
+        self.assertFalse(pn.reachabilityGraph(limit=10, visited=visited).bounded)
+        visited.close()
+
+        # the markings of a bounded petriNet don't cover each other
+        graph = mutex(3).reachabilityGraph(limit=3)
+        self.assertFalse(graph.complete)
+        self.assertIsNone(graph.bounded)
+        graph.complete = True
+        self.assertTrue(graph.computeBounded())
+
+    def assertSameGraph(self, graph, other):
+        self.assertEqual(list(graph.markings), list(other.markings))
+        self.assertEqual(list(graph.successors), list(other.successors))
+        self.assertEqual(list(graph.parents), list(other.parents))
+        self.assertEqual(graph.deadlocks, other.deadlocks)
+        self.assertEqual((graph.complete, graph.bounded, graph.bounds), (other.complete, other.bounded, other.bounds))
+
+    def testParallel(self):
+        pn = mutex(4)
+        for workers in (2, 3):
+            self.assertSameGraph(pn.reachabilityGraph(workers=workers), pn.reachabilityGraph())
+
+        pn = build_chain_petrinet(size=4)
+        pn.addToken(pn.getPlace('p0'), Token(), Token(), Token())
+        self.assertSameGraph(pn.reachabilityGraph(workers=2), pn.reachabilityGraph())
+        for limit in (1, 7, 12):
+            self.assertSameGraph(pn.reachabilityGraph(limit=limit, workers=3), pn.reachabilityGraph(limit=limit))
+        self.assertRaises(ValueError, pn.reachabilityGraph, order='dfs', workers=2)
+        visited = MmapVisitedSet(len(pn.places))
+        self.assertRaises(ValueError, pn.reachabilityGraph, workers=2, visited=visited)
+        visited.close()
+        self.assertSameGraph(pn.reachabilityGraph(workers=2, visited=MemoryVisitedSet()), pn.reachabilityGraph())
+
+    def testReduced(self):
+        pn = build_parallel_chain_petrinet(size=3, branchs=4)
+        for b in range(4):
+            pn.addToken(pn.getPlace('p_%s_0' % b), Token())
+        graph, reduced = pn.reachabilityGraph(), pn.reachabilityGraph(reduced=True)
+        self.assertEqual((len(graph), len(reduced)), (256, 13))
+        self.assertEqual([reduced.markings[d] for d in reduced.deadlocks], [graph.markings[d] for d in graph.deadlocks])
+        self.assertTrue(reduced.reduced)
+        self.assertIsNone(reduced.bounded)
+
+        # two processes taking two locks in opposite orders
+        pn = PetriNet(name='locks')
+        locks = [Place(name='lock0'), Place(name='lock1')]
+        for i in range(2):
+            idle, first, second = Place(name='idle%s' % i), Place(name='first%s' % i), Place(name='second%s' % i)
+            take, take_, release = [Transition(name='%s%s' % (name, i)) for name in ('take', 'take_', 'release')]
+            pn.addInput(idle, take)
+            pn.addInput(locks[i], take)
+            pn.addOutput(first, take)
+            pn.addInput(first, take_)
+            pn.addInput(locks[1 - i], take_)
+            pn.addOutput(second, take_)
+            pn.addInput(second, release)
+            pn.addOutput(idle, release)
+            pn.addOutput(locks[0], release)
+            pn.addOutput(locks[1], release)
+            pn.addToken(idle, Token())
+        pn.addToken(locks[0], Token())
+        pn.addToken(locks[1], Token())
+        graph = pn.reachabilityGraph()
+        for reduced in (pn.reachabilityGraph(reduced=True), pn.reachabilityGraph(reduced=True, workers=2)):
+            self.assertEqual([reduced.markings[d] for d in reduced.deadlocks],
+                             [graph.markings[d] for d in graph.deadlocks])
+            self.assertEqual(len(reduced.deadlocks), 1)
+
+    def testCoverability(self):
+        pn = PetriNet(name='unbounded')
+        p, q, r, t, u = Place(name='p'), Place(name='q'), Place(name='r'), Transition(name='t'), Transition(name='u')
+        pn.addInput(p, t)
+        pn.addOutput(p, t)
+        pn.addOutput(q, t)
+        # u moves the token of p to r, where it stays
+        pn.addInput(p, u)
+        pn.addOutput(r, u)
+        pn.addToken(p, Token())
+
+        graph = pn.coverabilityGraph()
+        self.assertEqual(graph.markings, [(1, 0, 0), (1, OMEGA, 0), (0, 0, 1), (0, OMEGA, 1)])
+        self.assertFalse(graph.isBounded())
+        self.assertEqual(graph.unboundedPlaces(), [q])
+        self.assertEqual(graph.statistics()['bounds'], {p: 1, q: None, r: 1})
+        self.assertEqual(len(pn.coverabilityGraph(limit=2)), 2)
+
+        # on a bounded petriNet, the coverability graph is the reachability graph
+        pn = mutex(3)
+        graph = pn.coverabilityGraph()
+        self.assertTrue(graph.isBounded())
+        self.assertEqual(set(graph.states), set(pn.reachabilityGraph().states))
+        self.assertEqual(graph.bounds, pn.reachabilityGraph().bounds)
+        self.assertRaises(ValueError, pn.coverabilityGraph, marking=[1, 0])
+
+    def testVisitedSets(self):
+        pn = build_chain_petrinet(size=4)
+        pn.addToken(pn.getPlace('p0'), Token(), Token(), Token())
+        graph = pn.reachabilityGraph()
+        for limit in (None, 9):
+            expected = pn.reachabilityGraph(limit=limit)
+            # small capacities and buffers: the table grows and the runs are merged
+            for visited in (MemoryVisitedSet(), MmapVisitedSet(4, capacity=2),
+                            SortedRunsVisitedSet(4, bufferSize=2, chunkSize=2)):
+                graph_ = pn.reachabilityGraph(limit=limit, visited=visited)
+                self.assertSameGraph(graph_, expected)
+                self.assertEqual(graph_.edgeCount(), expected.edgeCount())
+                self.assertEqual(graph_.path(len(graph_) - 1), expected.path(len(expected) - 1))
+                if limit is None:
+                    self.assertEqual(visited.get((0, 0, 0, 0)), graph.states.get((0, 0, 0, 0)))
+                    self.assertNotIn((5, 0, 0, 0), visited)
+                visited.close()
+
+        visited = SortedRunsVisitedSet(4)
+        self.assertRaises(ValueError, pn.reachabilityGraph, order='dfs', visited=visited)
+        visited.close()
+
+        # the directory of the files is created
+        directory = tempfile.mkdtemp()
+        try:
+            visited = MmapVisitedSet(4, directory=os.path.join(directory, 'visited'))
+            self.assertSameGraph(pn.reachabilityGraph(visited=visited), graph)
+            visited.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:40:21 2026
+
+@author: Mickael Grima
+"""
+
+import sys
+sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
+
+import unittest
+from Token import Token
+from TimePlace import TimePlace
+from TimeTransition import TimeTransition
+from TimeToken import TimeToken
+from TimePetrinet import TimePetriNet
+from Replay import Replay
+from reachabilityTest import mutex
+
+
+class ReplayTest(unittest.TestCase):
+    def testSeek(self):
+        """ Are the past states rebuilt from the checkpoints, and the saved firings fired again?
+        """
+        pn = mutex(3)
+        pn.addToken(pn.getPlace('idle0'), Token(name='named'))
+        pn.checkpointInterval = 4
+        markings, transitions = [list(pn.token)], []
+        for i in range(10):
+            transitions.append(pn.next().transition)
+            markings.append(list(pn.token))
+
+        self.assertTrue(pn.previous())
+        self.assertEqual(pn.token, markings[9])
+        for step in [3, 8, 0, 10, 5, 5, 6]:
+            self.assertEqual(pn.seek(step), step)
+            self.assertEqual(pn.token, markings[step])
+
+        # the saved firings are the next ones
+        events = [pn.next() for i in range(4)]
+        self.assertEqual([(e.step, e.transition) for e in events], zip(range(6, 10), transitions[6:]))
+        self.assertEqual(pn.token, markings[10])
+        self.assertEqual(pn.seek(15), 15)
+
+        pn.seek(0)
+        self.assertFalse(pn.previous())
+        pn.reinitialize()
+        self.assertEqual(pn.token, markings[0])
+
+    def testCheckpoints(self):
+        """ Is a checkpoint saved every interval firings, and the simulation stopped when it is blocked?
+        """
+        a, b = TimePlace(name='a', time=1.0), TimePlace(name='b')
+        t = TimeTransition(name='t', time=2.0)
+        pn = TimePetriNet(name='pn')
+        pn.addInput(a, t)
+        pn.addOutput(b, t)
+        pn.addToken(a, *[TimeToken() for i in range(5)])
+
+        replay = Replay(pn, interval=2)
+        self.assertEqual(replay.seek(10), 5)
+        self.assertEqual(len(replay.checkpoints), 3)
+        self.assertEqual(list(replay.clocks), [3.0, 5.0, 7.0, 9.0, 11.0])
+        self.assertIsNone(replay.next())
+
+        replay.seek(1)
+        self.assertEqual((pn.currentClock, len(a.token), len(b.token)), (3.0, 4, 1))
+        self.assertEqual(replay.next().clock, 5.0)
+        self.assertEqual(pn.currentClock, 5.0)
+        self.assertRaises(ValueError, replay.seek, -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
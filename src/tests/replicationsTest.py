@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:41:05 2026
+
+@author: Mickael Grima
+"""
+
+import sys
+sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
+
+import unittest
+from TimePlace import TimePlace
+from TimeTransition import TimeTransition
+from TimeToken import TimeToken
+from TimePetrinet import TimePetriNet
+from Replications import run_replications, ReplicationStatistics
+
+
+def chain():
+    """ two steps chain sharing a resource, with three tokens
+    """
+    a, b = TimePlace(name='a', time=1.0), TimePlace(name='b', time=2.0)
+    c, r = TimePlace(name='c'), TimePlace(name='r')
+    t0, t1 = TimeTransition(name='t0', time=3.0), TimeTransition(name='t1', time=1.0)
+
+    pn = TimePetriNet(name='pn')
+    pn.addInput(a, t0)
+    pn.addInput(r, t0)
+    pn.addOutput(b, t0)
+    pn.addInput(b, t1)
+    pn.addOutput(c, t1)
+    pn.addOutput(r, t1)
+    pn.addToken(a, TimeToken(), TimeToken(), TimeToken())
+    pn.addToken(r, TimeToken())
+    return pn
+
+
+def sampler(petriNet, rand):
+    for t in petriNet.transitions:
+        if t.name == 't0':
+            t.time = float(rand.randint(1, 5))
+
+
+class ReplicationsTest(unittest.TestCase):
+    def testRuns(self):
+        statistics = run_replications(chain, 5, workers=1).statistics()
+        self.assertEqual(statistics['runs'], 5)
+        self.assertEqual(statistics['completionTime']['mean'], 19.0)
+        self.assertEqual(statistics['completionTime']['std'], 0.0)
+        self.assertEqual(sorted(t.name for t in statistics['firings']), ['t0', 't1'])
+        self.assertEqual(set(statistics['firings'].values()), {3.0})
+
+    def testSeeds(self):
+        """ the result depends on the seed but not on the workers
+        """
+        sequential = run_replications(chain, 20, workers=1, sampler=sampler, seed=3)
+        parallel = run_replications(chain, 20, workers=2, sampler=sampler, seed=3, chunksize=3)
+        self.assertEqual(sequential.runs, parallel.runs)
+        self.assertAlmostEqual(sequential.mean, parallel.mean)
+        self.assertAlmostEqual(sequential.variance(), parallel.variance())
+        self.assertEqual((sequential.min, sequential.max), (parallel.min, parallel.max))
+        self.assertEqual(sequential.firings, parallel.firings)
+        self.assertGreater(sequential.variance(), 0.0)
+
+    def testMerge(self):
+        statistics, other = ReplicationStatistics(['t']), ReplicationStatistics(['t'])
+        for time in (1.0, 2.0):
+            statistics.add(time, [1])
+        for time in (3.0, 6.0):
+            other.add(time, [2])
+        statistics.merge(other)
+        self.assertEqual(statistics.mean, 3.0)
+        self.assertAlmostEqual(statistics.variance(), 3.5)
+        self.assertEqual(statistics.firings, [6])
+        self.assertRaises(ValueError, statistics.merge, ReplicationStatistics())
+
+    def testWrongNet(self):
+        self.assertRaises(TypeError, run_replications, lambda: None, 1, workers=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
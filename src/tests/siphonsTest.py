@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:03:52 2026
+
+@author: Mickael Grima
+"""
+
+import sys
+sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
+
+import unittest
+from Token import Token
+from Place import Place
+from Transition import Transition
+from Petrinet import PetriNet
+from utils.builder import build_chain_petrinet
+from reachabilityTest import mutex
+
+
+def cycle(size=3):
+    """ ``size`` places in a cycle
+    """
+    pn = build_chain_petrinet(size=size)
+    pn.addOutput(pn.places[0], pn.transitions[-1])
+    return pn
+
+
+class SiphonsTest(unittest.TestCase):
+    def testMutex(self):
+        pn = mutex(3)
+        siphons = sorted(sorted(p.name for p in siphon) for siphon in pn.minimalSiphons())
+        self.assertEqual(siphons, [['critical0', 'critical1', 'critical2', 'lock'], ['critical0', 'idle0'],
+                                   ['critical1', 'idle1'], ['critical2', 'idle2']])
+        self.assertEqual(pn.maximalTrap(), pn.places)
+        self.assertTrue(pn.isDeadlockFree())
+        # the transitions taking the lock don't have the same input places
+        self.assertFalse(pn.isFreeChoice())
+        self.assertIsNone(pn.isLive())
+
+        # nobody can take the lock
+        marking = list(pn.token)
+        marking[pn.getPlace('lock').index] = 0
+        self.assertIsNone(pn.isDeadlockFree(marking=marking))
+
+    def testTraps(self):
+        pn = build_chain_petrinet(size=3)
+        p0, p1, p2 = pn.places
+        # the last transition doesn't put its tokens anywhere
+        self.assertEqual(pn.maximalTrap(), [])
+        self.assertEqual(pn.minimalSiphons(), [[p0]])
+        pn.addOutput(p0, pn.transitions[-1])
+        self.assertEqual(pn.maximalTrap([p1, p2]), [])
+        self.assertEqual(pn.maximalTrap(), [p0, p1, p2])
+
+    def testLiveness(self):
+        pn = cycle(3)
+        self.assertTrue(pn.isFreeChoice())
+        self.assertFalse(pn.isLive())
+        pn.addToken(pn.places[1], Token())
+        self.assertTrue(pn.isLive())
+        self.assertTrue(pn.isDeadlockFree())
+
+        # a choice between two transitions with the same input places
+        p, t = Place(name='p'), Transition(name='t')
+        pn.addInput(pn.places[0], t)
+        pn.addOutput(p, t)
+        self.assertTrue(pn.isFreeChoice())
+        self.assertFalse(pn.isLive())
+        pn.addInput(pn.places[1], t)
+        self.assertFalse(pn.isFreeChoice())
+
+        # the check only applies when each input and output carries one token
+        pn = cycle(2)
+        pn.addToken(pn.places[0], Token())
+        pn.removeInput(pn.places[0], pn.transitions[0])
+        pn.addInput(pn.places[0], pn.transitions[0], 2)
+        self.assertIsNone(pn.isDeadlockFree())
+        self.assertIsNone(pn.isLive())
+        self.assertIsNone(PetriNet(name='empty').isDeadlockFree())
+
+
+if __name__ == '__main__':
+    unittest.main()
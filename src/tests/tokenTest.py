@@ -9,7 +9,9 @@ import sys
 sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
 
 import unittest
-from Token import Token
+from Token import Token, EMPTY, NO_NAME
+from Place import Place
+from Transition import Transition
 
 
 class TokenTest(unittest.TestCase):
@@ -22,8 +24,82 @@ class TokenTest(unittest.TestCase):
         """ does token.copy() copy everything?
         """
         tok = self.token.copy()
-        for key in tok.__dict__.iterkeys():
-            self.assertNotEqual(tok.__dict__[key] or '', self.token.__dict__[key] or {})
+        self.assertIsNot(tok, self.token)
+        for key in Token.__slots__:
+            self.assertEqual(getattr(tok, key), getattr(self.token, key))
+
+    def testCopyOnWrite(self):
+        """ does the copy share the properties until one of the tokens modifies them?
+        """
+        place, tr0, tr1 = Place(name='place'), Transition(name='tr0'), Transition(name='tr1')
+        self.token.addPriority(place, tr0)
+        self.token.addFireHeritance('castle', place, tr0)
+        tok = self.token.copy()
+        self.assertIs(tok.priority, self.token.priority)
+        self.assertIs(tok.fireHeritance, self.token.fireHeritance)
+
+        tok.addPriority(place, tr1)
+        self.assertEqual(tok.priority[place]['priority'], [tr0, tr1])
+        self.assertEqual(self.token.priority[place]['priority'], [tr0])
+        self.assertIs(tok.fireHeritance, self.token.fireHeritance)
+
+        self.token.addFireHeritance('city', place, tr0)
+        self.assertEqual(self.token.fireHeritance[tr0][place], ['castle', 'city'])
+        self.assertEqual(tok.fireHeritance[tr0][place], ['castle'])
+
+    def testSlots(self):
+        """ the token has no instance dictionnary and allocates its advanced properties lazily
+        """
+        self.assertFalse(hasattr(self.token, '__dict__'))
+        self.assertIs(self.token.priority, EMPTY)
+        self.assertRaises(TypeError, self.token.priority.setdefault, 'place', {})
+
+        place, tr = Place(name='place'), Transition(name='tr')
+        self.token.addPriority(place, tr)
+        self.assertEqual(self.token.priority[place]['priority'], [tr])
+        self.assertIs(self.token.fireHeritance, EMPTY)
+
+        self.token.priority = {}
+        self.assertIs(self.token.priority, EMPTY)
+
+    def testIsEnabled(self):
+        """ is the token enabled regarding fire and priorities?
+        """
+        place = Place(name='place')
+        tr0, tr1, tr2 = Transition(name='tr0'), Transition(name='tr1'), Transition(name='tr2')
+        self.assertTrue(self.token.isEnabled(place, tr0))
+
+        self.token.addPriority(place, tr0, tr1, pref='priority')
+        self.assertTrue(self.token.isEnabled(place, tr0))
+        self.assertFalse(self.token.isEnabled(place, tr1))
+
+        self.token.priority[place]['pref'] = 'time'
+        self.assertTrue(self.token.isEnabled(place, tr1))
+        self.assertFalse(self.token.isEnabled(place, tr2))
+
+        self.token.fire = False
+        self.assertFalse(self.token.isEnabled(place, tr0))
+
+    def testNames(self):
+        """ are the names interned sets of words, merged by a union?
+        """
+        self.assertEqual(self.token.names, {'name', 'castle', 'city'})
+        self.assertIs(Token(name='city_castle_name').names, self.token.names)
+        self.assertIs(Token().names, NO_NAME)
+        self.assertTrue(self.token.containsName('castle'))
+        self.assertTrue(self.token.containsNames('name', 'castle', 'city', 'country'))
+        self.assertFalse(self.token.containsNames('name', 'castle'))
+
+        tok = Token()
+        tok.addFirstProperties(self.token, Token(name='country'), Token())
+        self.assertIs(tok.names, Token(name='castle_city_country_name').names)
+        self.assertEqual(tok.name, 'castle_city_country_name')
+
+        tok.addFirstProperties(self.token, Token())
+        self.assertEqual(tok.name, 'name_castle_city')
+
+        tok.addFirstProperties(Token())
+        self.assertEqual(tok.name, 'no name')
 
 
 if __name__ == '__main__':
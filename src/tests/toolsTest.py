@@ -9,8 +9,67 @@ import sys
 sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
 
 import unittest
-from src.utils.builder import build_chain_petrinet, build_simple_conflicts
-from src.Tools import concatenate
+from StringIO import StringIO
+from utils.builder import build_chain_petrinet, build_simple_conflicts
+from Tools import concatenate, read_graph
+from TimePlace import TimePlace
+from Token import Token
+
+
+GRAPHML = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns" xmlns:y="http://www.yworks.com/xml/graphml">
+  <key for="node" id="d6" yfiles.type="nodegraphics"/>
+  <key for="edge" id="d10" yfiles.type="edgegraphics"/>
+  <graph edgedefault="directed" id="G">
+    <edge id="e1" source="n1" target="n2">
+      <data key="d10"><y:PolyLineEdge><y:Path sx="0.0" sy="0.0" tx="0.0" ty="0.0"/></y:PolyLineEdge></data>
+    </edge>
+    <node id="n0">
+      <data key="d6">
+        <y:ShapeNode>
+          <y:Geometry height="30.0" width="30.0" x="10.0" y="20.0"/>
+          <y:NodeLabel>start</y:NodeLabel>
+          <y:NodeLabel>2</y:NodeLabel>
+          <y:Shape type="ellipse"/>
+        </y:ShapeNode>
+      </data>
+    </node>
+    <node id="n1">
+      <data key="d6">
+        <y:ShapeNode>
+          <y:Geometry height="30.0" width="10.0" x="60.0" y="20.0"/>
+          <y:NodeLabel>go</y:NodeLabel>
+          <y:Shape type="rectangle"/>
+        </y:ShapeNode>
+      </data>
+    </node>
+    <edge id="e0" source="n0" target="n1">
+      <data key="d10">
+        <y:PolyLineEdge>
+          <y:Path sx="0.0" sy="0.0" tx="0.0" ty="0.0">
+            <y:Point x="30.0" y="50.0"/>
+            <y:Point x="50.0" y="50.0"/>
+          </y:Path>
+        </y:PolyLineEdge>
+      </data>
+    </edge>
+    <node id="g0" yfiles.foldertype="group">
+      <data key="d6"><y:ProxyAutoBoundsNode/></data>
+      <graph edgedefault="directed" id="g0:">
+        <node id="n2">
+          <data key="d6">
+            <y:ShapeNode>
+              <y:Geometry height="30.0" width="30.0" x="110.0" y="20.0"/>
+              <y:NodeLabel>end</y:NodeLabel>
+              <y:Shape type="ellipse"/>
+            </y:ShapeNode>
+          </data>
+        </node>
+      </graph>
+    </node>
+  </graph>
+</graphml>
+"""
 
 
 class ToolsTest(unittest.TestCase):
@@ -20,6 +79,45 @@ class ToolsTest(unittest.TestCase):
         """ considering two petrinets, test wether the concatenate function returned the right result
         """
         pn1 = build_chain_petrinet(size=2)
+        pn1.addToken(pn1.getPlace('p0'), Token())
         pn2 = build_simple_conflicts()
+        # the last transition of the chain feeds the conflict
+        pn = concatenate(pn1, pn2, name='pn', output_connections=[(pn2.places[0], pn1.getTransition('t1'))])
+
+        self.assertEqual(pn.name, 'pn')
+        self.assertEqual([p.name for p in pn.places], ['p0', 'p1', 'p0', 'p1', 'p2'])
+        self.assertEqual([t.name for t in pn.transitions], ['t0', 't1', 't0', 't1'])
+        self.assertEqual(pn.inputs, [{0: 1}, {1: 1}, {2: 1, 3: 1}, {}, {}])
+        self.assertEqual(pn.outputs, [{}, {0: 1}, {1: 1}, {2: 1}, {3: 1}])
+        self.assertEqual(pn.token, [1, 0, 0, 0, 0])
+        self.assertTrue(all(p is not p_ for p, p_ in zip(pn.places, pn1.places + pn2.places)))
+
+        pn.simulation(show=False)
+        self.assertEqual(sum(pn.token[3:]), 1)
+
+        # the given petriNets aren't modified
+        self.assertEqual([p.index for p in pn2.places], [0, 1, 2])
+        self.assertEqual(pn1.token, [1, 0])
+        pn1.simulation(show=False)
+        self.assertEqual(pn1.token, [0, 0])
+
+    def testReadGraph(self):
+        """ Are the nodes, the tokens, the positions and the edges read from a yEd document?
+        """
+        pn = read_graph(StringIO(GRAPHML))
+        start, end = pn.places
+        go, = pn.transitions
+        self.assertEqual((start.name, end.name, go.name), ('start', 'end', 'go'))
+        self.assertIsInstance(start, TimePlace)
+        self.assertEqual([p.idd for p in pn.places], ['n0', 'n2'])
+        self.assertEqual(pn.token, [2, 0])
+        self.assertEqual(pn.posPlaces, [(10.0, 20.0), (110.0, 20.0)])
+        self.assertEqual(pn.inputs, [{0: 1}, {}])
+        self.assertEqual(pn.outputs, [{}, {0: 1}])
+        self.assertEqual(pn.paths[(start, go)], [(30.0, 50.0), (50.0, 50.0)])
+
+        # the loaded petriNet can be simulated
+        pn.simulation(show=False)
+        self.assertEqual(pn.token, [0, 2])
 
-        pn = concatenate(pn1, pn2)
+        self.assertRaises(ValueError, read_graph, StringIO(GRAPHML.replace('"rectangle"', '"hexagon"')))
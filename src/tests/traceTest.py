@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:40 2026
+
+@author: Mickael Grima
+"""
+
+import sys
+sys.path.append("/home/mickael/Documents/projects/petrinetX/src/")
+
+import unittest
+import shutil
+import tempfile
+import numpy as np
+from Token import Token
+from TimePlace import TimePlace
+from TimeTransition import TimeTransition
+from TimeToken import TimeToken
+from TimePetrinet import TimePetriNet
+from Trace import Trace, TraceRecorder
+from reachabilityTest import mutex
+
+
+class TraceTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def testMarkings(self):
+        """ Are the markings rebuilt at every step, across the chunks?
+        """
+        pn = mutex(3)
+        # a token with a name: the petriNet isn't plain
+        pn.addToken(pn.getPlace('idle0'), Token(name='named'))
+        markings = []
+        with TraceRecorder(pn, self.path, chunkSize=4) as recorder:
+            markings.append(list(pn.token))
+            for event in pn.simulate_iter(niter=10):
+                recorder.record(event.step, event.clock, event.transition)
+                markings.append(list(pn.token))
+
+        trace = Trace(self.path)
+        self.assertEqual(len(trace), 10)
+        self.assertEqual(list(trace.steps), range(10))
+        self.assertTrue(np.isnan(trace.clocks).all())
+        self.assertEqual(trace.places, [p.name for p in pn.places])
+        for step, marking in enumerate(markings):
+            self.assertEqual(list(trace.marking(step)), marking)
+        self.assertRaises(IndexError, trace.marking, 11)
+
+    def testSimulation(self):
+        """ Do the simulations record their firings?
+        """
+        pn = mutex(2)
+        with TraceRecorder(pn, self.path) as recorder:
+            pn.simulation(show=False, niter=5, trace=recorder)
+        trace = Trace(self.path)
+        self.assertEqual(len(trace), 5)
+        self.assertEqual(list(trace.marking(5)), pn.token)
+
+        a, b = TimePlace(name='a', time=1.0), TimePlace(name='b')
+        t = TimeTransition(name='t', time=2.0)
+        pn = TimePetriNet(name='pn')
+        pn.addInput(a, t)
+        pn.addOutput(b, t)
+        pn.addToken(a, TimeToken(), TimeToken())
+        with TraceRecorder(pn, self.path) as recorder:
+            pn.simulation(show=False, trace=recorder)
+        trace = Trace(self.path)
+        self.assertEqual(list(trace.clocks), [3.0, 5.0])
+        self.assertEqual(list(trace.transitionIndices), [0, 0])
+        self.assertEqual(list(trace.marking(1)), [1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,10 +6,6 @@ Created on Thu Jul 21 21:38:37 2016
 """
 
 
-def get_id(obj):
-    return hash(obj)
-
-
 def pref_func(x):
     """ Higher ``x`` is, lower the result is
 
@@ -19,3 +15,15 @@ def pref_func(x):
         :returns: float
     """
     return 10.0 / (1.0 + x)
+
+
+def bits(mask):
+    """ Generate the indices of the bits set in ``mask``, in increasing order
+
+        :param mask: *
+        :type mask: int or long
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low